@@ -0,0 +1,40 @@
+"""
+Standalone benchmarks for the events app.
+
+Each module is runnable with ``python -m benchmarks.<name>`` from the project
+root. They build a throwaway SQLite database and file cache so they never
+touch db.sqlite3 or var/cache.
+``benchmarks.data`` generates realistic datasets for them, and
+``benchmarks.bench_endpoints`` is the end-to-end run to compare in CI.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path=None):
+    """Configure Django against a scratch database and run migrations."""
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+    from django.conf import settings
+
+    if db_path is None:
+        db_path = Path(tempfile.mkdtemp(prefix='eventflow-bench-')) / 'bench.sqlite3'
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    if settings.CACHES['default']['BACKEND'].endswith('FileBasedCache'):
+        settings.CACHES['default']['LOCATION'] = str(Path(db_path).parent / 'cache')
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return db_path
@@ -0,0 +1,133 @@
+"""
+Flash-opening load test for the admission queue in front of register_event.
+
+A burst of students hits /register/<id>/ at once; students held in the
+waiting room re-poll until they are let through. Runs once with admission
+effectively off and once rate-limited, and reports per-request latency
+percentiles, database lock errors and overbooking.
+
+    python -m benchmarks.bench_admission --students 300 --capacity 100 --threads 32 --rate 40
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+from . import setup_django
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(label, students, capacity, threads, poll_interval):
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, connection
+    from django.test import Client
+    from django.utils import timezone
+    from events.admission import reset_admission_backend
+    from events.models import Event, Registration, UserProfile
+
+    reset_admission_backend()
+    event = Event.objects.create(
+        title=f'Fest {label}', description='Benchmark event', venue='Grounds',
+        date=timezone.now() + timedelta(days=1), capacity=capacity,
+    )
+    users = User.objects.bulk_create(User(username=f'{label}-{i}') for i in range(students))
+    UserProfile.objects.bulk_create(
+        UserProfile(
+            user=user, college_email=f'{user.username}@mvgrce.edu.in',
+            registration_number=user.username, branch='CSE', department='Engg', year_of_study=1,
+        )
+        for user in users
+    )
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+
+    latencies = []
+    lock_errors = [0]
+    lock = threading.Lock()
+    pending = list(clients)
+    barrier = threading.Barrier(threads)
+    url = f'/register/{event.id}/'
+
+    def worker():
+        barrier.wait()
+        while True:
+            with lock:
+                if not pending:
+                    break
+                client = pending.pop()
+            while True:
+                start = time.perf_counter()
+                try:
+                    response = client.get(url)
+                except OperationalError:
+                    with lock:
+                        lock_errors[0] += 1
+                    continue
+                finally:
+                    with lock:
+                        latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code == 302:
+                    break
+                # Still in the waiting room: go to the back of the line
+                with lock:
+                    pending.insert(0, client)
+                time.sleep(poll_interval)
+                break
+        connection.close()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    registered = Registration.objects.filter(event=event).count()
+    return {
+        'mode': label,
+        'students': students,
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2),
+        'lock_errors': lock_errors[0],
+        'registered': registered,
+        'overbooked': max(0, registered - capacity),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=300)
+    parser.add_argument('--capacity', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--rate', type=float, default=40, help="Admissions per second when the queue is on.")
+    parser.add_argument('--poll-interval', type=float, default=0.05)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    settings.ALLOWED_HOSTS = ['*']
+    results = []
+    for label, rate, burst in (('unthrottled', 1e9, 10 ** 9), ('queued', args.rate, args.rate)):
+        settings.ADMISSION_RATE = rate
+        settings.ADMISSION_BURST = burst
+        results.append(run(label, args.students, args.capacity, args.threads, args.poll_interval))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
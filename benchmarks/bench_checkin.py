@@ -0,0 +1,88 @@
+"""
+Gate check-in throughput: scans per second through each entry path.
+
+Compares the HTML form (one request and template render per scan) against
+POST /api/check-in/ at several batch sizes, scanning legacy bare-UUID
+passes and then signed passes on the no-read fast path (event given,
+details off). Every pass is scanned twice per run so duplicates are
+exercised too.
+
+    python -m benchmarks.bench_checkin --passes 2000 --batch-sizes 1 50 200
+"""
+
+import argparse
+import json
+import time
+from datetime import timedelta
+
+from . import setup_django
+
+
+def reset():
+    from events.models import Registration
+
+    Registration.objects.update(attended=False, verified_at=None, verified_by=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--passes', type=int, default=2000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 50, 200])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.utils import timezone
+    from events.models import Event, Registration
+    from events.passes import pass_payload
+
+    settings.ALLOWED_HOSTS = ['*']
+    event = Event.objects.create(
+        title='Fest', description='Benchmark event', venue='Grounds',
+        date=timezone.now() + timedelta(days=1), capacity=args.passes,
+    )
+    users = User.objects.bulk_create(User(username=f'student{i}') for i in range(args.passes))
+    Registration.objects.bulk_create(Registration(user=user, event=event) for user in users)
+    scans = [str(pk) for pk in Registration.objects.values_list('registration_id', flat=True)] * 2
+    signed = [pass_payload(reg) for reg in Registration.objects.select_related('event')] * 2
+
+    staff = User.objects.create_user(username='bench-staff', is_staff=True)
+    client = Client()
+    client.force_login(staff)
+
+    results = []
+    start = time.perf_counter()
+    for scan in scans:
+        client.post('/verify-qr/', {'registration_id': scan})
+    elapsed = time.perf_counter() - start
+    results.append({'mode': 'form /verify-qr/', 'scans_per_sec': round(len(scans) / elapsed)})
+
+    runs = [(f'api uuid batch={size}', scans, size, {}) for size in args.batch_sizes]
+    runs += [
+        (f'api signed batch={size}', signed, size, {'event': event.pk, 'details': False})
+        for size in args.batch_sizes
+    ]
+    for label, passes, batch_size, options in runs:
+        reset()
+        start = time.perf_counter()
+        verified = 0
+        for offset in range(0, len(passes), batch_size):
+            response = client.post(
+                '/api/check-in/',
+                json.dumps({'scans': passes[offset:offset + batch_size], **options}),
+                content_type='application/json',
+            )
+            verified += sum(r['status'] == 'verified' for r in response.json()['results'])
+        elapsed = time.perf_counter() - start
+        results.append({
+            'mode': label,
+            'scans_per_sec': round(len(passes) / elapsed),
+            'verified': verified,
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
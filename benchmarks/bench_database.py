@@ -0,0 +1,143 @@
+"""
+Concurrent registrations against SQLite: default settings vs config.database.
+
+Each configuration runs in a fresh process on its own database file.
+Worker threads act like request handlers: they mix catalogue reads with
+transactions that read an event and then reserve_seat, never retry, and close or keep their connection
+after each operation as Django's request_finished handling would. The
+benchmark reports throughput and the share of writes that failed with
+"database is locked".
+
+    python -m benchmarks.bench_database --threads 8 --seconds 5 --write-ratio 0.3
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from . import PROJECT_ROOT
+
+
+# What config/settings.py used before config.database: Python's sqlite3
+# defaults (rollback journal, deferred transactions, 5 s busy timeout) and
+# a new connection per request.
+LEGACY_DATABASE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'CONN_MAX_AGE': 0,
+    'OPTIONS': {},
+}
+
+
+def child(mode, threads, seconds, write_ratio):
+    import random
+    import threading
+    import time
+    from datetime import timedelta
+
+    from django.conf import settings
+
+    from . import setup_django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    if mode == 'legacy':
+        settings.DATABASES['default'] = dict(LEGACY_DATABASE)
+    setup_django()
+
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, close_old_connections, connection, transaction
+    from django.utils import timezone
+    from events.booking import reserve_seat
+    from events.catalogue import catalogue, keyset_page
+    from events.models import Event
+
+    events = Event.objects.bulk_create(
+        Event(
+            title=f'Event {i}', description='Benchmark event', venue='Hall',
+            date=timezone.now() + timedelta(days=i), capacity=10 ** 6,
+        )
+        for i in range(20)
+    )
+    users = iter(User.objects.bulk_create(User(username=f'student-{i}') for i in range(200000)))
+    users_lock = threading.Lock()
+    totals = {'reads': 0, 'writes': 0, 'write_errors': 0, 'read_errors': 0}
+    totals_lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    barrier = threading.Barrier(threads)
+    journal_mode = connection.cursor().execute('PRAGMA journal_mode').fetchone()[0]
+    connection.close()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        counts = dict.fromkeys(totals, 0)
+        barrier.wait()
+        while time.perf_counter() < deadline:
+            write = rng.random() < write_ratio
+            try:
+                if write:
+                    with users_lock:
+                        user = next(users)
+                    # Read, then write, in one transaction, as sync_scans
+                    # and waitlist promotion do
+                    with transaction.atomic():
+                        event = Event.objects.get(pk=rng.choice(events).pk)
+                        reserve_seat(user, event)
+                    counts['writes'] += 1
+                else:
+                    keyset_page(catalogue(), 24)
+                    counts['reads'] += 1
+            except OperationalError:
+                counts['write_errors' if write else 'read_errors'] += 1
+            # End of "request": drops the connection unless CONN_MAX_AGE keeps it
+            close_old_connections()
+        connection.close()
+        with totals_lock:
+            for key, value in counts.items():
+                totals[key] += value
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    attempted_writes = totals['writes'] + totals['write_errors']
+    print(json.dumps({
+        'config': mode,
+        'journal_mode': journal_mode,
+        'ops_per_sec': round((totals['reads'] + totals['writes']) / elapsed, 1),
+        'writes_per_sec': round(totals['writes'] / elapsed, 1),
+        'lock_error_rate': round(totals['write_errors'] / attempted_writes, 4) if attempted_writes else 0.0,
+        **totals,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--child', choices=['legacy', 'tuned'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.threads, args.seconds, args.write_ratio)
+        return
+
+    results = []
+    for mode in ('legacy', 'tuned'):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_database', '--child', mode,
+             '--threads', str(args.threads), '--seconds', str(args.seconds),
+             '--write-ratio', str(args.write_ratio)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Latency, throughput and query counts for the main endpoints.
+
+Generates a dataset with benchmarks.data, then drives each endpoint with
+the Django test client from --concurrency threads (one client and database
+connection each). Reports p50/p95/p99 latency, requests per second and
+queries per request as JSON, with the share of cache lookups that hit.
+Queries are counted on the connection, so a streamed CSV export's are
+included.
+
+The admission queue is opened wide so register_event measures the
+registration itself rather than the waiting room.
+
+Save a run with --output and compare a later one against it with
+--baseline: the exit status is 1 when any endpoint's p95 grows by more than
+--max-regression (and --min-delta-ms, so timer noise on fast endpoints
+passes) or one of its requests runs more queries than any did before.
+
+    python -m benchmarks.bench_endpoints --requests 200 --concurrency 4 --output base.json
+    python -m benchmarks.bench_endpoints --requests 200 --concurrency 4 --baseline base.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+
+from . import setup_django
+
+
+CHATBOT_MESSAGES = [
+    'how many events', 'how to register', 'show me workshops', 'find events about robotics',
+    'where is my qr', 'what is this portal', 'sports', 'analytics',
+]
+
+
+class Scenario:
+    """An endpoint to drive: ``request(client, rng)`` returns (method, path, data)."""
+
+    def __init__(self, name, login, request, prepare=None):
+        self.name = name
+        self.login = login  # None, 'student' or 'staff'
+        self.request = request
+        self.prepare = prepare  # called untimed before each request, with (client, rng)
+
+
+def build_scenarios(data):
+    from django.db.models import F
+    from events.models import Event
+
+    open_events = list(
+        Event.objects.filter(registered_seats__lt=F('capacity')).values_list('pk', flat=True)
+    )
+    fresh_students = iter(data['fresh_students'])
+    fresh_lock = threading.Lock()
+
+    def login_fresh_student(client, rng):
+        with fresh_lock:
+            client.force_login(next(fresh_students))
+
+    return [
+        Scenario('home', None, lambda client, rng: ('get', '/', None)),
+        Scenario('home_student', 'student', lambda client, rng: ('get', '/', None)),
+        Scenario('events_api', None, lambda client, rng: ('get', '/api/events/', {'category': 'workshop'})),
+        Scenario(
+            'register_event', None,
+            lambda client, rng: ('get', f'/register/{rng.choice(open_events)}/', None),
+            prepare=login_fresh_student,
+        ),
+        Scenario('my_registrations', 'student', lambda client, rng: ('get', '/my-events/', None)),
+        Scenario(
+            'verify_qr', 'staff',
+            lambda client, rng: ('post', '/verify-qr/', {'registration_id': rng.choice(data['passes'])}),
+        ),
+        Scenario(
+            'export_csv', 'staff',
+            lambda client, rng: ('get', '/export-csv/', {'event': rng.choice(data['busy_events'])}),
+        ),
+        Scenario('analytics_dashboard', 'staff', lambda client, rng: ('get', '/analytics/', None)),
+        Scenario(
+            'chatbot_reply', None,
+            lambda client, rng: ('get', '/chatbot/', {'message': rng.choice(CHATBOT_MESSAGES)}),
+        ),
+    ]
+
+
+def percentile(sorted_samples, pct):
+    index = min(len(sorted_samples) - 1, round(pct / 100 * (len(sorted_samples) - 1)))
+    return sorted_samples[index]
+
+
+def drive(scenario, data, requests, concurrency, warmup, seed):
+    from django.db import connection
+    from django.test import Client
+    from events.caching import cache_stats, reset_cache_stats
+
+    jobs = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    queries = []
+    errors = [0]
+    # Count cache lookups from the end of the warmup
+    barrier = threading.Barrier(concurrency, action=reset_cache_stats)
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        client = Client()
+        if scenario.login == 'student':
+            client.force_login(rng.choice(data['students']))
+        elif scenario.login == 'staff':
+            client.force_login(data['staff'])
+
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        def once():
+            if scenario.prepare:
+                scenario.prepare(client, rng)
+            method, path, payload = scenario.request(client, rng)
+            count[0] = 0
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response = getattr(client, method)(path, payload)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - start
+            return response.status_code, elapsed, count[0]
+
+        for _ in range(warmup):
+            once()
+        barrier.wait()
+        while next(jobs) < requests:
+            status, elapsed, used = once()
+            with lock:
+                latencies.append(elapsed * 1000)
+                queries.append(used)
+                if status >= 400:
+                    errors[0] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    lookups = Counter()
+    for counts in cache_stats().values():
+        lookups.update(counts)
+    looked_up = lookups['hits'] + lookups['misses']
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'requests_per_sec': round(len(latencies) / wall, 1),
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'max_queries': max(queries),
+        'cache_hit_ratio': round(lookups['hits'] / looked_up, 3) if looked_up else None,
+    }
+
+
+def compare(results, baseline, max_regression, min_delta_ms=0.0):
+    """Regressions of ``results`` against a saved ``baseline`` run, as messages."""
+    problems = []
+    for name, current in results['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None:
+            continue
+        growth = current['p95_ms'] - before['p95_ms']
+        if growth > before['p95_ms'] * max_regression and growth > min_delta_ms:
+            problems.append(f"{name}: p95 {before['p95_ms']} ms -> {current['p95_ms']} ms")
+        # The most queries any request ran: per-row query growth shows up
+        # here, while the mean drifts with how often caches were cold
+        if current['max_queries'] > before['max_queries']:
+            problems.append(f"{name}: {before['max_queries']} -> {current['max_queries']} queries per request")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--registrations', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--warmup', type=int, default=3, help="untimed requests per thread first")
+    parser.add_argument('--only', nargs='*', help="endpoint names to run (default: all)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON results here")
+    parser.add_argument('--baseline', help="earlier --output to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.25, help="allowed p95 growth (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help="ignore p95 growth smaller than this")
+    args = parser.parse_args()
+
+    setup_django()
+    import django
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db.models import Count
+    from events.models import Registration
+
+    from .data import generate, make_students
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['*']
+    settings.ADMISSION_RATE = settings.ADMISSION_BURST = 10 ** 9
+
+    summary = generate(args.events, args.students, args.registrations, args.seed)
+    fresh = args.concurrency * args.warmup + args.requests
+    data = {
+        'students': list(User.objects.filter(username__startswith='student-', registration__isnull=False).distinct()[:200]),
+        'fresh_students': make_students(fresh, prefix='fresh', seed=args.seed),
+        'staff': User.objects.get(username='bench-staff'),
+        'passes': [str(value) for value in Registration.objects.values_list('registration_id', flat=True)[:5000]],
+        'busy_events': list(
+            Registration.objects.values('event').annotate(n=Count('pk')).order_by('-n').values_list('event', flat=True)[:20]
+        ),
+    }
+
+    results = {
+        'config': {
+            **{key: getattr(args, key) for key in ('requests', 'concurrency', 'warmup', 'seed')},
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'data': summary,
+        'endpoints': {},
+    }
+    for scenario in build_scenarios(data):
+        if args.only and scenario.name not in args.only:
+            continue
+        results['endpoints'][scenario.name] = drive(
+            scenario, data, args.requests, args.concurrency, args.warmup, args.seed,
+        )
+        print(f"{scenario.name}: {results['endpoints'][scenario.name]}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            problems = compare(results, json.load(handle), args.max_regression, args.min_delta_ms)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Memory and throughput of the streaming CSV export as the table grows.
+
+Seeds registrations up to each requested size and streams /export-csv/
+through the test client, recording peak Python heap (tracemalloc), rows/sec
+and query count. Peak memory should stay flat across sizes.
+
+    python -m benchmarks.bench_export --sizes 50000 200000 500000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import timedelta
+
+from . import setup_django
+
+
+def grow_to(size, event_ids, staff):
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from events.models import Registration, UserProfile
+
+    existing = Registration.objects.count()
+    if size <= existing:
+        return
+    start = User.objects.count()
+    users = User.objects.bulk_create(
+        (User(username=f'student{start + i}') for i in range(size - existing)),
+        batch_size=5000,
+    )
+    UserProfile.objects.bulk_create(
+        (
+            UserProfile(
+                user=user, college_email=f'{user.username}@mvgrce.edu.in',
+                registration_number=user.username, branch='CSE', department='Engg', year_of_study=2,
+            )
+            for user in users
+        ),
+        batch_size=5000,
+    )
+    now = timezone.now()
+    Registration.objects.bulk_create(
+        (
+            Registration(
+                user=user, event_id=event_ids[i % len(event_ids)],
+                attended=i % 3 == 0, verified_at=now if i % 3 == 0 else None,
+                verified_by=staff if i % 3 == 0 else None,
+            )
+            for i, user in enumerate(users)
+        ),
+        batch_size=5000,
+    )
+
+
+def stream(client):
+    response = client.get('/export-csv/')
+    rows = size = 0
+    for chunk in response.streaming_content:
+        rows += chunk.count(b'\n')
+        size += len(chunk)
+    return rows - 1, size
+
+
+def export(client):
+    from django.db import connection, reset_queries
+
+    # Timed pass without tracemalloc, whose bookkeeping slows allocation-heavy code
+    reset_queries()
+    start = time.perf_counter()
+    rows, size = stream(client)
+    elapsed = time.perf_counter() - start
+    queries = len(connection.queries)
+
+    tracemalloc.start()
+    stream(client)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'rows': rows,
+        'mib_written': round(size / 2 ** 20, 1),
+        'seconds': round(elapsed, 2),
+        'rows_per_sec': round(rows / elapsed),
+        'peak_heap_mib': round(peak / 2 ** 20, 2),
+        'queries': queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50000, 200000])
+    parser.add_argument('--events', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.utils import timezone
+    from events.models import Event
+
+    settings.ALLOWED_HOSTS = ['*']
+    settings.DEBUG = True  # record connection.queries
+    now = timezone.now()
+    Event.objects.bulk_create(
+        Event(title=f'Event {i}', description='Synthetic', venue='Hall', date=now + timedelta(days=i))
+        for i in range(args.events)
+    )
+    event_ids = list(Event.objects.values_list('pk', flat=True))
+    staff = User.objects.create_user(username='bench-staff', is_staff=True)
+    client = Client()
+    client.force_login(staff)
+
+    # Warm up one-time allocations (URL resolver, templates) before measuring
+    client.get('/export-csv/?event=0')
+
+    results = []
+    for size in sorted(args.sizes):
+        grow_to(size, event_ids, staff)
+        results.append(export(client))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Cost of serving a QR pass image: inline re-render vs the cached endpoint.
+
+Times, per request through the test client, the old behaviour (render the
+PNG and base64 it into the page on every view) against /qr/<id>.png when
+cold (first render), warm in memory, warm on disk only (a fresh worker) and
+revalidated with If-None-Match (304).
+
+    python -m benchmarks.bench_qr --students 200
+"""
+
+import argparse
+import base64
+import io
+import json
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from . import setup_django
+
+
+def legacy_render(registration_id):
+    import qrcode
+
+    buffer = io.BytesIO()
+    qrcode.make(str(registration_id)).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def timed(fn, items):
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': round(statistics.median(samples), 3), 'max_ms': round(max(samples), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.utils import timezone
+    from events.models import Event, Registration
+    from events.qr import qr_images
+
+    settings.ALLOWED_HOSTS = ['*']
+    settings.QR_CACHE_DIR = tempfile.mkdtemp(prefix='eventflow-qr-')
+    event = Event.objects.create(
+        title='Fest', description='Benchmark event', venue='Grounds',
+        date=timezone.now() + timedelta(days=1), capacity=args.students,
+    )
+    users = User.objects.bulk_create(User(username=f'student{i}') for i in range(args.students))
+    Registration.objects.bulk_create(Registration(user=user, event=event) for user in users)
+    passes = []
+    for registration in Registration.objects.select_related('user'):
+        client = Client()
+        client.force_login(registration.user)
+        passes.append((client, f'/qr/{registration.registration_id}.png', registration.registration_id))
+
+    etags = {}
+
+    def fetch(item):
+        client, url, _ = item
+        etags[url] = client.get(url)['ETag']
+
+    def revalidate(item):
+        client, url, _ = item
+        assert client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code == 304
+
+    results = {'legacy_inline_render': timed(lambda item: legacy_render(item[2]), passes)}
+    results['endpoint_cold'] = timed(fetch, passes)
+    results['endpoint_memory'] = timed(fetch, passes)
+    qr_images.reset()
+    results['endpoint_disk'] = timed(fetch, passes)
+    results['endpoint_304'] = timed(revalidate, passes)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
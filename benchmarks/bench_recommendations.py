@@ -0,0 +1,123 @@
+"""
+Recommendation latency: per-request TF-IDF refit vs the in-process index.
+
+    python -m benchmarks.bench_recommendations --events 10000 --users 2000 --per-user 8
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from . import setup_django
+
+
+def legacy_recommendations(user):
+    """The pre-index implementation, kept here as the baseline."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    from events.models import Event, Registration
+
+    events = Event.objects.all()
+    if not events:
+        return []
+    vectorizer = TfidfVectorizer()
+    event_vectors = vectorizer.fit_transform([event.category for event in events])
+    user_regs = Registration.objects.filter(user=user)
+    if not user_regs:
+        return []
+    user_vector = vectorizer.transform([" ".join(reg.event.category for reg in user_regs)])
+    similarity = cosine_similarity(user_vector, event_vectors)
+    scores = sorted(enumerate(similarity[0]), key=lambda x: x[1], reverse=True)
+    recommended = []
+    for index, _ in scores:
+        event = list(events)[index]
+        if event not in [reg.event for reg in user_regs]:
+            recommended.append(event)
+    return recommended[:3]
+
+
+def seed(n_events, n_users, per_user):
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from events.models import Event, Registration
+
+    rng = random.Random(42)
+    categories = [value for value, _ in Event.CATEGORY_CHOICES]
+    now = timezone.now()
+    Event.objects.bulk_create(
+        (
+            Event(
+                title=f'Event {i}',
+                description='Synthetic event',
+                date=now + timedelta(hours=i),
+                venue='Hall',
+                category=rng.choice(categories),
+            )
+            for i in range(n_events)
+        ),
+        batch_size=2000,
+    )
+    User.objects.bulk_create(
+        (User(username=f'student{i}') for i in range(n_users)), batch_size=2000
+    )
+    event_ids = list(Event.objects.values_list('pk', flat=True))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    Registration.objects.bulk_create(
+        (
+            Registration(user_id=user_id, event_id=event_id)
+            for user_id in user_ids
+            for event_id in rng.sample(event_ids, per_user)
+        ),
+        batch_size=2000,
+    )
+    return user_ids
+
+
+def timed(fn, samples):
+    latencies = []
+    for arg in samples:
+        start = time.perf_counter()
+        fn(arg)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'calls': len(latencies),
+        'p50_ms': round(statistics.median(latencies), 4),
+        'max_ms': round(max(latencies), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--per-user', type=int, default=8)
+    parser.add_argument('--legacy-calls', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from events.recommendation import recommendation_index
+
+    user_ids = seed(args.events, args.users, args.per_user)
+    rng = random.Random(7)
+    users = list(User.objects.filter(pk__in=rng.sample(user_ids, 200)))
+
+    start = time.perf_counter()
+    recommendation_index.build()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    results = {
+        'events': args.events,
+        'registrations': args.users * args.per_user,
+        'legacy_tfidf': timed(legacy_recommendations, users[:args.legacy_calls]),
+        'index_build_ms': round(build_ms, 1),
+        'index_top_k': timed(lambda u: recommendation_index.top_event_ids(u.pk, 3), users),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Registration stampede: many students hit one event at the same moment.
+
+Compares the old check-then-insert path (COUNT, EXISTS, INSERT with no
+transaction) against ``events.booking.reserve_seat`` and reports throughput
+and how far each path overbooks the event.
+
+    python -m benchmarks.bench_registration --students 400 --capacity 100 --threads 16
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import timedelta
+
+from . import setup_django
+
+
+def legacy_register(user, event):
+    """The pre-counter registration path, kept here as the baseline."""
+    from events.models import Registration
+
+    if event.capacity - event.registration_set.count() <= 0:
+        return 'full'
+    if Registration.objects.filter(user=user, event=event).exists():
+        return 'duplicate'
+    Registration.objects.create(user=user, event=event)
+    return 'registered'
+
+
+def run(register, label, students, capacity, threads):
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, connection
+    from django.utils import timezone
+    from events.models import Event, Registration
+
+    event = Event.objects.create(
+        title=f'Stampede {label}',
+        description='Benchmark event',
+        date=timezone.now() + timedelta(days=1),
+        venue='Hall',
+        capacity=capacity,
+    )
+    users = User.objects.bulk_create(
+        User(username=f'{label}-{i}') for i in range(students)
+    )
+
+    queue = list(users)
+    lock = threading.Lock()
+    outcomes = []
+    lock_errors = [0]
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        while True:
+            with lock:
+                if not queue:
+                    break
+                user = queue.pop()
+            while True:
+                try:
+                    result = register(user, Event.objects.get(pk=event.pk))
+                    break
+                except OperationalError:
+                    with lock:
+                        lock_errors[0] += 1
+            with lock:
+                outcomes.append(result)
+        connection.close()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    registered = Registration.objects.filter(event=event).count()
+    return {
+        'path': label,
+        'attempts': students,
+        'seconds': round(elapsed, 4),
+        'registrations_per_sec': round(students / elapsed, 1),
+        'registered': registered,
+        'capacity': capacity,
+        'overbooked': max(0, registered - capacity),
+        'lock_errors': lock_errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=400)
+    parser.add_argument('--capacity', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    setup_django()
+    from events.booking import reserve_seat
+
+    results = [
+        run(legacy_register, 'legacy', args.students, args.capacity, args.threads),
+        run(reserve_seat, 'atomic', args.students, args.capacity, args.threads),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
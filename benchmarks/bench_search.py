@@ -0,0 +1,110 @@
+"""
+Event search latency: title__icontains LIKE scan vs the FTS5 index.
+
+Seeds synthetic events with generated titles, descriptions and venues, then
+times a mix of queries both ways and through the home page (GET /?q=).
+
+    python -m benchmarks.bench_search --events 50000
+"""
+
+import argparse
+import itertools
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from . import setup_django
+
+
+WORDS = (
+    'robotics coding music dance drama quiz debate football cricket chess painting photography '
+    'startup finance marketing design cloud security data machine learning poetry film yoga '
+    'chemistry physics biology astronomy history literature theatre drone electronics gaming'
+).split()
+VENUES = ['Main Auditorium', 'Seminar Hall', 'Open Air Theatre', 'Library', 'Sports Complex', 'Lab 2']
+# Filler vocabulary so descriptions look like prose rather than a list of
+# topics, keeping match sets realistic
+FILLER = [''.join(chars) for chars in itertools.product('bcdfgklmnprst', 'aeiou', 'lmnrst', 'aeio')][:4000]
+QUERIES = ['robotics', 'danc', 'machine learning', 'theatre', 'chess tournament', 'photo', 'quantum']
+
+
+def seed(count):
+    from django.utils import timezone
+    from events.models import Event
+
+    rng = random.Random(7)
+    categories = [value for value, _ in Event.CATEGORY_CHOICES]
+    now = timezone.now()
+    Event.objects.bulk_create(
+        (
+            Event(
+                title=' '.join(rng.sample(WORDS, 3)).title(),
+                description=' '.join(rng.choices(WORDS, k=2) + rng.choices(FILLER, k=38)),
+                venue=rng.choice(VENUES),
+                category=rng.choice(categories),
+                date=now + timedelta(hours=i),
+            )
+            for i in range(count)
+        ),
+        batch_size=2000,
+    )
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': round(statistics.median(samples), 2), 'max_ms': round(max(samples), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db.models import Q
+    from django.test import Client
+    from events.models import Event
+    from events.search import search_event_ids
+
+    settings.ALLOWED_HOSTS = ['*']
+    start = time.perf_counter()
+    seed(args.events)
+    client = Client()
+
+    def legacy(query):
+        return list(Event.objects.filter(title__icontains=query).order_by('date').values_list('pk', flat=True))
+
+    def legacy_all_columns(query):
+        events = Event.objects.all()
+        for token in query.split():
+            events = events.filter(
+                Q(title__icontains=token) | Q(description__icontains=token)
+                | Q(venue__icontains=token) | Q(category__icontains=token)
+            )
+        return list(events.order_by('date').values_list('pk', flat=True)[:200])
+
+    results = {
+        'events': args.events,
+        'seed_seconds': round(time.perf_counter() - start, 1),
+        'legacy_icontains_title': timed(legacy, args.repeat),
+        'legacy_icontains_all_columns': timed(legacy_all_columns, args.repeat),
+        'fts_bm25': timed(search_event_ids, args.repeat),
+        'home_page_search': timed(lambda query: client.get('/', {'q': query}), args.repeat),
+        'matches_legacy_vs_fts': {
+            query: [len(legacy(query)), len(search_event_ids(query, limit=10 ** 9))] for query in QUERIES
+        },
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Item-item similarity engine vs the TF-IDF path at campus scale.
+
+Reports build time, peak memory and on-disk size of the co-registration
+matrix, then per-query latency of the blended index against a per-request
+TF-IDF refit.
+
+    python -m benchmarks.bench_similarity --events 2000 --users 10000 --per-user 10
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from . import setup_django
+from .bench_recommendations import legacy_recommendations, seed, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--per-user', type=int, default=10)
+    parser.add_argument('--legacy-calls', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from events.recommendation import item_similarity, recommendation_index
+
+    settings.RECOMMENDATION_SIMILARITY_PATH = Path(tempfile.mkdtemp()) / 'similarity.joblib'
+    user_ids = seed(args.events, args.users, args.per_user)
+    users = list(User.objects.filter(pk__in=random.Random(7).sample(user_ids, 200)))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    matrix = item_similarity.build()
+    build_ms = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    item_similarity.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    recommendation_index.build()
+
+    results = {
+        'events': args.events,
+        'registrations': args.users * args.per_user,
+        'similarity_build_ms': round(build_ms, 1),
+        'similarity_build_peak_mib': round(peak / 2 ** 20, 1),
+        'similarity_nnz': int(matrix.nnz),
+        'similarity_file_kib': round(item_similarity.path.stat().st_size / 1024, 1),
+        'similarity_mmap_load_ms': round(load_ms, 2),
+        'legacy_tfidf': timed(legacy_recommendations, users[:args.legacy_calls]),
+        'blended_top_k': timed(lambda u: recommendation_index.top_event_ids(u.pk, 3), users),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
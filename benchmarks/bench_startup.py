@@ -0,0 +1,88 @@
+"""
+Worker startup cost: import time and resident memory of a fresh process.
+
+Each sample starts a new interpreter that does what a WSGI worker does
+before serving its first request (load settings, set up apps, import the
+URLconf and so every view module) and reports wall time, peak RSS and which
+heavy optional libraries ended up imported. The "eager" row additionally
+imports those libraries, i.e. what every worker paid before they were made
+lazy.
+
+Exits non-zero when the lazy startup exceeds --max-seconds / --max-rss-mib
+or imports one of the heavy libraries, so it can run as a regression guard.
+
+    python -m benchmarks.bench_startup --samples 5 --max-rss-mib 80
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from . import PROJECT_ROOT
+
+
+HEAVY_MODULES = ('matplotlib', 'qrcode', 'PIL', 'scipy', 'sklearn', 'joblib')
+
+CHILD = '''
+import json, os, resource, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+import django
+django.setup()
+import config.wsgi, config.urls
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'loaded': sorted(m for m in %r if m in sys.modules),
+}))
+''' % (HEAVY_MODULES,)
+
+
+def sample(extra_imports=()):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, *extra_imports],
+        cwd=PROJECT_ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def measure(label, samples, extra_imports=()):
+    sample(extra_imports)  # warm the OS page cache and .pyc files
+    runs = [sample(extra_imports) for _ in range(samples)]
+    return {
+        'mode': label,
+        'seconds_p50': round(statistics.median(r['seconds'] for r in runs), 3),
+        'rss_mib_p50': round(statistics.median(r['rss_mib'] for r in runs), 1),
+        'heavy_modules_loaded': runs[-1]['loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=None)
+    parser.add_argument('--max-rss-mib', type=float, default=None)
+    args = parser.parse_args()
+
+    lazy = measure('lazy', args.samples)
+    eager = measure('eager', args.samples, ('matplotlib.pyplot', 'qrcode', 'scipy.sparse', 'joblib'))
+    print(json.dumps([lazy, eager], indent=2))
+
+    problems = []
+    if lazy['heavy_modules_loaded']:
+        problems.append(f"imported at startup: {', '.join(lazy['heavy_modules_loaded'])}")
+    if args.max_seconds is not None and lazy['seconds_p50'] > args.max_seconds:
+        problems.append(f"startup {lazy['seconds_p50']}s > {args.max_seconds}s")
+    if args.max_rss_mib is not None and lazy['rss_mib_p50'] > args.max_rss_mib:
+        problems.append(f"RSS {lazy['rss_mib_p50']} MiB > {args.max_rss_mib} MiB")
+    if problems:
+        sys.exit('Startup regression: ' + '; '.join(problems))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Synthetic data for benchmarks: events, students with complete profiles and
+registrations, written with bulk_create in a few seconds per 100k rows.
+
+Generation is seeded, so the same arguments give the same data. Run it on
+its own to build a database file for a real server:
+
+    python -m benchmarks.data --events 500 --students 5000 --registrations 20000 --db /tmp/bench.sqlite3
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from . import setup_django
+
+
+TOPICS = (
+    'robotics coding music dance drama quiz debate football cricket chess painting photography '
+    'startup finance marketing design cloud security data poetry film yoga astronomy drone'
+).split()
+VENUES = ['Main Auditorium', 'Seminar Hall', 'Open Air Theatre', 'Library', 'Sports Complex', 'Lab 2']
+BRANCHES = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL', 'IT']
+
+# Share of registrations for events already past that were checked in
+ATTENDANCE_RATE = 0.7
+
+BATCH_SIZE = 2000
+
+
+def make_students(count, prefix='student', seed=0):
+    """Create ``count`` students, each with a complete UserProfile."""
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from events.models import UserProfile
+
+    rng = random.Random(seed)
+    password = make_password('bench-password')
+    users = User.objects.bulk_create(
+        (User(username=f'{prefix}-{i}', password=password) for i in range(count)),
+        batch_size=BATCH_SIZE,
+    )
+    # bulk_create skips the post_save signal that creates profiles
+    UserProfile.objects.bulk_create(
+        (
+            UserProfile(
+                user=user,
+                interests=','.join(rng.sample(TOPICS, 2)),
+                college_email=f'{user.username}@mvgrce.edu.in',
+                registration_number=f'REG-{user.username}',
+                branch=rng.choice(BRANCHES),
+                department='Engineering',
+                year_of_study=rng.randint(1, 4),
+            )
+            for user in users
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return users
+
+
+def generate(events=500, students=5000, registrations=20000, seed=0):
+    """
+    Fill the database and return a summary. Registrations never exceed an
+    event's capacity, seat counters and analytics rollups match the rows,
+    and about a third of the events are already over, with most of their
+    registrations checked in.
+    """
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from events.models import CategoryRollup, DailyRollup, Event, EventRollup, Registration
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    now = timezone.now()
+    categories = [value for value, _ in Event.CATEGORY_CHOICES]
+
+    plan = [
+        {
+            'title': ' '.join(rng.sample(TOPICS, 2)).title(),
+            'category': rng.choice(categories),
+            'date': now + timedelta(hours=rng.randint(-24 * 60, 24 * 120)),
+            'capacity': rng.choice([30, 50, 100, 200, 500]),
+        }
+        for _ in range(events)
+    ]
+    users = make_students(students, seed=seed)
+
+    # Popular events draw more registrations (a skewed, Zipf-like pick)
+    weights = [1 / (rank + 1) for rank in range(events)]
+    pairs = set()
+    seats = Counter()
+    attempts = 0
+    while len(pairs) < registrations and attempts < registrations * 20:
+        attempts += 1
+        index = rng.choices(range(events), weights)[0]
+        user = rng.randrange(students)
+        if seats[index] < plan[index]['capacity'] and (user, index) not in pairs:
+            pairs.add((user, index))
+            seats[index] += 1
+
+    event_rows = Event.objects.bulk_create(
+        (
+            Event(
+                title=row['title'],
+                description=f"A {row['category']} on {row['title'].lower()} for all branches.",
+                date=row['date'],
+                venue=rng.choice(VENUES),
+                category=row['category'],
+                capacity=row['capacity'],
+                registered_seats=seats[i],
+            )
+            for i, row in enumerate(plan)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    staff = User.objects.create_superuser('bench-staff', 'staff@mvgrce.edu.in', 'bench-password')
+    rows = []
+    for user, index in sorted(pairs):
+        event = event_rows[index]
+        attended = event.date < now and rng.random() < ATTENDANCE_RATE
+        rows.append(Registration(
+            user=users[user],
+            event=event,
+            attended=attended,
+            verified_at=event.date if attended else None,
+            verified_by=staff if attended else None,
+        ))
+    Registration.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+    # bulk_create skips the signals that keep the rollups current
+    per_event = Counter(row.event_id for row in rows)
+    attended_per_event = Counter(row.event_id for row in rows if row.attended)
+    by_category = {category: Counter() for category in categories}
+    for event in event_rows:
+        by_category[event.category].update(
+            events=1, registrations=per_event[event.pk], attended=attended_per_event[event.pk],
+        )
+    CategoryRollup.objects.all().delete()
+    CategoryRollup.objects.bulk_create(
+        CategoryRollup(category=category, **counts) for category, counts in by_category.items()
+    )
+    EventRollup.objects.bulk_create(
+        (
+            EventRollup(event_id=event_id, registrations=count, attended=attended_per_event[event_id])
+            for event_id, count in per_event.items()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    per_day = Counter(timezone.localdate(row.verified_at) for row in rows if row.attended)
+    DailyRollup.objects.bulk_create(DailyRollup(day=day, attended=count) for day, count in per_day.items())
+
+    return {
+        'events': events,
+        'students': students,
+        'registrations': len(rows),
+        'attended': sum(attended_per_event.values()),
+        'seed': seed,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--registrations', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help="SQLite file to create (default: a temporary one)")
+    args = parser.parse_args()
+
+    db_path = setup_django(args.db)
+    summary = generate(args.events, args.students, args.registrations, args.seed)
+    print(json.dumps({'db': str(db_path), **summary}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
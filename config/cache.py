@@ -0,0 +1,70 @@
+"""
+Cache configuration shared by every worker process.
+
+Django's default cache is local memory, private to each gunicorn worker,
+so an entry one worker invalidates stays live in the others. Without
+CACHE_URL the default cache is a directory on disk that every worker on
+the host reads and writes (no service to run). CACHE_URL points all hosts
+at one Redis or memcached server instead:
+
+    CACHE_URL=redis://127.0.0.1:6379/0
+    CACHE_URL=memcached://127.0.0.1:11211
+
+Redis needs the redis package installed and memcached needs pymemcache;
+neither is imported unless it is configured.
+
+Namespaces, stampede protection and hit/miss counters are in
+events.caching.
+"""
+
+from urllib.parse import urlsplit
+
+
+KEY_PREFIX = 'eventflow'
+
+# Entries the file cache keeps before it culls a third of them
+FILE_CACHE_MAX_ENTRIES = 10000
+
+BACKENDS = {
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+
+
+def cache_backends(url=None, directory=None, version=1, timeout=300):
+    """
+    CACHES with a single "default" alias: the server ``url`` names, or a
+    file cache in ``directory``. ``version`` is part of every key; raise it
+    when a release changes the shape of cached values, so old workers and
+    new ones never read each other's entries.
+    """
+    common = {
+        'KEY_PREFIX': KEY_PREFIX,
+        'VERSION': version,
+        'TIMEOUT': timeout,
+    }
+    if not url:
+        return {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(directory),
+                'OPTIONS': {'MAX_ENTRIES': FILE_CACHE_MAX_ENTRIES},
+                **common,
+            },
+        }
+
+    parts = urlsplit(url)
+    try:
+        backend = BACKENDS[parts.scheme]
+    except KeyError:
+        raise ValueError(f"Unsupported CACHE_URL scheme {parts.scheme!r}.") from None
+    # RedisCache takes the URL itself; memcached wants host:port
+    location = url if backend.endswith('RedisCache') else parts.netloc
+    return {
+        'default': {
+            'BACKEND': backend,
+            'LOCATION': location,
+            **common,
+        },
+    }
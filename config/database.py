@@ -0,0 +1,155 @@
+"""
+Database configuration: tuned SQLite connections and an optional read replica.
+
+Every connection switches the file to WAL, so readers never block the
+writer and vice versa, and opens its transactions with BEGIN IMMEDIATE so
+concurrent writers queue on the busy timeout instead of failing with
+"database is locked" when a deferred read transaction tries to upgrade to
+a write. Connections are kept open between requests (CONN_MAX_AGE).
+
+When DATABASE_REPLICA_PATH names a read-only copy of the database (for
+example one kept current by Litestream or LiteFS), ReplicaRouter sends the
+events app's reads from the views in settings.REPLICA_VIEWS to it. A
+request that writes anything pins its client to the primary for
+REPLICA_PIN_SECONDS (via a cookie), so users always read their own writes
+despite replication lag.
+"""
+
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+REPLICA = 'replica'
+
+# Bytes of the database file each connection memory-maps for reads
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    # Durable across application crashes; only an OS crash or power loss
+    # can lose the last commits, and never corrupts the file in WAL mode
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+    'PRAGMA temp_store=MEMORY',
+)
+
+
+def sqlite_databases(path, replica_path=None, busy_timeout=20, conn_max_age=60):
+    """
+    DATABASES for the SQLite file at ``path``, plus a read-only "replica"
+    alias when ``replica_path`` is given. ``busy_timeout`` is how many
+    seconds a writer waits for the lock before giving up.
+    """
+    databases = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': path,
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': '; '.join(SQLITE_PRAGMAS),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': busy_timeout,  # sqlite3's busy_timeout
+            },
+        },
+    }
+    if replica_path:
+        databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': f'file:{replica_path}?mode=ro',
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'uri': True,
+                'init_command': f'PRAGMA query_only=1; PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+                'timeout': busy_timeout,
+            },
+            'TEST': {'MIRROR': 'default'},
+        }
+    return databases
+
+
+class RequestState:
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+_request_state = ContextVar('database_request_state', default=None)
+
+# Apps whose reads may come from the replica; sessions and auth always
+# read the primary so logins take effect immediately
+REPLICA_APPS = frozenset({'events'})
+
+
+class ReplicaRouter:
+    """Reads from the replica inside REPLICA_VIEWS, everything else to default."""
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if (
+            state is not None
+            and state.use_replica
+            and not state.wrote
+            and model._meta.app_label in REPLICA_APPS
+            and REPLICA in settings.DATABASES
+        ):
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
+
+
+PIN_COOKIE = 'db_primary_until'
+
+
+class ReplicaMiddleware:
+    """
+    Tracks each request's database use for ReplicaRouter: enables replica
+    reads for REPLICA_VIEWS unless the client recently wrote, and pins the
+    client to the primary after a request that writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.replica_views = frozenset(getattr(settings, 'REPLICA_VIEWS', ()))
+
+    def __call__(self, request):
+        state = RequestState()
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state.wrote:
+            pin = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time()) + pin), max_age=pin, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _request_state.get()
+        if state is None or f'{view_func.__module__}.{view_func.__name__}' not in self.replica_views:
+            return None
+        try:
+            pinned = int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        state.use_replica = not pinned
+        return None
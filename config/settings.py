@@ -10,9 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
 
+from config.cache import cache_backends
+from config.database import sqlite_databases
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,12 +47,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'events.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.database.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,7 +63,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'events.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -76,12 +82,37 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# SQLite in WAL mode with persistent connections, and an optional
+# read-only replica; see config/database.py.
+DATABASES = sqlite_databases(
+    BASE_DIR / 'db.sqlite3',
+    replica_path=os.environ.get('DATABASE_REPLICA_PATH'),
+    conn_max_age=int(os.environ.get('CONN_MAX_AGE', 60)),
+)
+DATABASE_ROUTERS = ['config.database.ReplicaRouter']
+
+# Views whose events reads may be served by the replica, and how long a
+# client that just wrote keeps reading from the primary instead.
+REPLICA_VIEWS = [
+    'events.views.home',
+    'events.views.my_registrations',
+    'events.views.analytics_dashboard',
+    'events.views.chatbot_reply',
+]
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# One cache for every worker: files under var/cache, or the Redis or
+# memcached server CACHE_URL names; see config/cache.py. Raise
+# CACHE_VERSION when a release changes the shape of cached values.
+CACHES = cache_backends(
+    os.environ.get('CACHE_URL'),
+    directory=BASE_DIR / 'var' / 'cache',
+    version=int(os.environ.get('CACHE_VERSION', 1)),
+)
 
 
 # Password validation
@@ -139,3 +170,43 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = 'media'
+
+# Seconds before the in-process recommendation index is rebuilt from the
+# database, so workers pick up writes that other processes made.
+RECOMMENDATION_INDEX_TTL = 300
+
+# Co-registration similarity matrix written by `manage.py build_similarity`
+# and memory-mapped by every worker. Recommendations blend it with the
+# category signal at this weight (0 disables it).
+RECOMMENDATION_SIMILARITY_PATH = BASE_DIR / 'var' / 'event_similarity.joblib'
+RECOMMENDATION_CF_WEIGHT = 0.5
+
+# Admission queue in front of register_event: each event admits
+# ADMISSION_RATE requests per second (bursts up to ADMISSION_BURST) and an
+# admitted requester has ADMISSION_TICKET_TTL seconds to finish registering.
+ADMISSION_BACKEND = 'events.admission.LocalAdmissionBackend'
+ADMISSION_RATE = 20
+ADMISSION_BURST = 50
+ADMISSION_TICKET_TTL = 120
+
+# Rendered QR pass images, shared by all workers on disk; each worker also
+# keeps up to QR_MEMORY_CACHE_SIZE of them in memory.
+QR_CACHE_DIR = BASE_DIR / 'var' / 'qr'
+QR_MEMORY_CACHE_SIZE = 2048
+
+# QR passes are HMAC-signed so gates can check them without a database
+# read. Rotating the key invalidates every pass already issued. A pass stays
+# valid until PASS_VALID_AFTER_EVENT after its event starts.
+PASS_SIGNING_KEY = os.environ.get("PASS_SIGNING_KEY", SECRET_KEY)
+PASS_VALID_AFTER_EVENT = timedelta(days=1)
+
+# Event cards rendered with the home page; the rest load from /api/events/
+# as the visitor scrolls.
+EVENTS_PAGE_SIZE = 24
+
+# Request instrumentation (events.instrumentation): statements slower than
+# SLOW_QUERY_MS are logged, and a view running more queries than its
+# @query_budget fails under QUERY_BUDGET_STRICT (set by the test suite) and
+# logs a warning otherwise.
+SLOW_QUERY_MS = 100
+QUERY_BUDGET_STRICT = False
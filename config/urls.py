@@ -7,15 +7,21 @@ from events import views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.home, name='home'),
+    path('api/events/', views.events_api, name='events_api'),
     path('signup/', views.signup_view, name='signup'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('register/<int:event_id>/', views.register_event, name='register_event'),
     path('my-events/', views.my_registrations, name='my_registrations'),
     path('analytics/', views.analytics_dashboard, name='analytics'),
+    path('analytics/chart/<str:digest>.png', views.analytics_chart, name='analytics_chart'),
     path('qr/<uuid:registration_id>/', views.generate_qr, name='generate_qr'),
+    path('qr/<uuid:registration_id>.<str:fmt>', views.qr_image, name='qr_image'),
     path('export-csv/', views.export_registrations_csv, name='export_csv'),
     path('verify-qr/', views.verify_qr, name='verify_qr'),
+    path('api/check-in/', views.check_in_api, name='check_in_api'),
+    path('api/check-in/sync/', views.check_in_sync, name='check_in_sync'),
+    path('events/<int:event_id>/manifest/', views.event_manifest, name='event_manifest'),
     path('chatbot/', views.chatbot_reply, name='chatbot_reply'),
 ]
 
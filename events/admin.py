@@ -1,10 +1,14 @@
 from django.contrib import admin
+from django.db.models import F
+from .booking import release_seat
 from .models import Event, Registration
-from .models import UserProfile
+from .recommendation import recommendation_index
+from .rollups import record_attendance, record_registration
+from .models import EmailOutbox, UserProfile, WaitlistEntry
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ('title', 'date', 'venue', 'capacity')
+    list_display = ('title', 'date', 'venue', 'capacity', 'registered_seats')
     search_fields = ('title', 'venue')
     list_filter = ('date',)
 
@@ -15,6 +19,33 @@ class RegistrationAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'event__title', 'registration_id')
     list_filter = ('attended', 'event__category')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+
+        # Keep the denormalized seat counter in step for manual edits
+        if change and 'event' in form.changed_data:
+            release_seat(form.initial['event'])
+            recommendation_index.reset()
+        if not change or 'event' in form.changed_data:
+            Event.objects.filter(pk=obj.event_id).update(
+                registered_seats=F('registered_seats') + 1
+            )
+
+        # ...and the analytics rollups (new registrations are counted by the
+        # post_save signal)
+        if change and 'event' in form.changed_data:
+            old_event = Event.objects.get(pk=form.initial['event'])
+            record_registration(
+                old_event.pk, old_event.category,
+                delta=-1, attended=-1 if form.initial['attended'] else 0,
+            )
+            record_registration(
+                obj.event_id, obj.event.category,
+                attended=1 if obj.attended else 0,
+            )
+        elif change and 'attended' in form.changed_data:
+            record_attendance(obj.event_id, obj.event.category, 1 if obj.attended else -1)
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = (
@@ -26,4 +57,17 @@ class UserProfileAdmin(admin.ModelAdmin):
         'year_of_study',
     )
     search_fields = ('user__username', 'college_email', 'registration_number', 'branch', 'department')
-    list_filter = ('year_of_study', 'branch', 'department')
\ No newline at end of file
+    list_filter = ('year_of_study', 'branch', 'department')
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    search_fields = ('subject', 'recipients')
+    list_filter = ('status',)
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'event', 'joined_at')
+    search_fields = ('user__username', 'event__title')
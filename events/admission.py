@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+@dataclass
+class Ticket:
+    """A requester's place in an event's admission queue."""
+
+    event_id: int
+    user_id: int
+    number: int
+    admitted: bool = False
+    expires_at: float = 0.0
+    position: int = 0
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``burst``."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+
+    def take(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _EventQueue:
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.waiting = OrderedDict()
+        self.admitted = {}
+        self.issued = 0
+
+
+class LocalAdmissionBackend:
+    """
+    In-process admission queue: one FIFO and token bucket per event.
+
+    Requesters join the queue, are admitted in arrival order as tokens become
+    available, and stay admitted for ``ticket_ttl`` seconds to finish
+    registering. Waiting tickets that stop polling for ``ticket_ttl`` are
+    dropped. State is per process; a shared backend (e.g. Redis) can be
+    plugged in through ADMISSION_BACKEND with the same three methods.
+    """
+
+    def __init__(self, rate, burst, ticket_ttl, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.ticket_ttl = ticket_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._queues = {}
+
+    def _queue(self, event_id):
+        queue = self._queues.get(event_id)
+        if queue is None:
+            queue = self._queues[event_id] = _EventQueue(
+                TokenBucket(self.rate, self.burst, self.clock)
+            )
+        return queue
+
+    def enter(self, event_id, user_id):
+        """Join (or re-poll) the queue and return the caller's ticket."""
+        with self._lock:
+            queue = self._queue(event_id)
+            now = self.clock()
+            self._expire(queue, now)
+
+            ticket = queue.admitted.get(user_id)
+            if ticket is not None:
+                return ticket
+
+            ticket = queue.waiting.get(user_id)
+            if ticket is None:
+                queue.issued += 1
+                ticket = queue.waiting[user_id] = Ticket(event_id, user_id, queue.issued)
+            ticket.expires_at = now + self.ticket_ttl
+
+            while queue.waiting and queue.bucket.take():
+                _, head = queue.waiting.popitem(last=False)
+                head.admitted = True
+                head.position = 0
+                head.expires_at = now + self.ticket_ttl
+                queue.admitted[head.user_id] = head
+
+            if not ticket.admitted:
+                first = next(iter(queue.waiting.values()))
+                ticket.position = ticket.number - first.number + 1
+            return ticket
+
+    def leave(self, event_id, user_id):
+        """Drop the caller's ticket once their registration attempt is over."""
+        with self._lock:
+            queue = self._queues.get(event_id)
+            if queue is not None:
+                queue.admitted.pop(user_id, None)
+                queue.waiting.pop(user_id, None)
+
+    def reset(self):
+        with self._lock:
+            self._queues.clear()
+
+    def _expire(self, queue, now):
+        for tickets in (queue.admitted, queue.waiting):
+            stale = [user_id for user_id, ticket in tickets.items() if ticket.expires_at < now]
+            for user_id in stale:
+                del tickets[user_id]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_admission_backend():
+    """The configured backend, built once per process from settings."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_class = import_string(settings.ADMISSION_BACKEND)
+                _backend = backend_class(
+                    rate=settings.ADMISSION_RATE,
+                    burst=settings.ADMISSION_BURST,
+                    ticket_ttl=settings.ADMISSION_TICKET_TTL,
+                )
+    return _backend
+
+
+def reset_admission_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
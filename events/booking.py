@@ -0,0 +1,99 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+
+from .mail import queue_mail
+from .models import Event, Registration, UserProfile, WaitlistEntry
+
+
+REGISTERED = 'registered'
+FULL = 'full'
+DUPLICATE = 'duplicate'
+
+
+def reserve_seat(user, event):
+    """
+    Register ``user`` for ``event`` if a seat is free.
+
+    The seat is claimed with a single conditional UPDATE on the event's
+    ``registered_seats`` counter, so concurrent requests can never push it
+    past ``capacity``. Duplicates are caught by the ``unique_together``
+    constraint on Registration, which rolls the counter back.
+
+    Returns REGISTERED, FULL or DUPLICATE.
+    """
+    try:
+        with transaction.atomic():
+            claimed = Event.objects.filter(
+                pk=event.pk,
+                registered_seats__lt=F('capacity'),
+            ).update(registered_seats=F('registered_seats') + 1)
+
+            if not claimed:
+                return FULL
+
+            Registration.objects.create(user=user, event=event)
+    except IntegrityError:
+        return DUPLICATE
+
+    return REGISTERED
+
+
+def release_seat(event_id):
+    """Give back the seat held by a deleted registration."""
+    Event.objects.filter(
+        pk=event_id,
+        registered_seats__gt=0,
+    ).update(registered_seats=F('registered_seats') - 1)
+
+
+def join_waitlist(user, event):
+    """Put ``user`` on the event's waitlist and return their 1-based position."""
+    entry, _ = WaitlistEntry.objects.get_or_create(user=user, event=event)
+    return WaitlistEntry.objects.filter(event=event, pk__lt=entry.pk).count() + 1
+
+
+def _complete_profile(prefix):
+    """Q matching rows whose UserProfile (at ``prefix``) has every required detail."""
+    complete = Q()
+    for name in UserProfile.REQUIRED_FIELDS:
+        complete &= Q(**{f'{prefix}{name}__isnull': False})
+        if isinstance(UserProfile._meta.get_field(name), models.CharField):
+            complete &= ~Q(**{f'{prefix}{name}': ''})
+    return complete
+
+
+def promote_waitlist(event_id):
+    """
+    Register waitlisted students, in joined order, while seats are free.
+
+    Each promotion goes through reserve_seat, so it competes fairly with
+    direct registrations for the freed seat. Students whose profile is
+    missing required details keep their place but are passed over until
+    they fill it in, as register_event would ask them to. Returns the
+    promoted users.
+    """
+    promoted = []
+    while True:
+        entry = (
+            WaitlistEntry.objects.filter(event_id=event_id)
+            .filter(_complete_profile('user__userprofile__'))
+            .select_related('user', 'event')
+            .first()
+        )
+        if entry is None:
+            break
+
+        status = reserve_seat(entry.user, entry.event)
+        if status == FULL:
+            break
+        entry.delete()
+
+        if status == REGISTERED:
+            promoted.append(entry.user)
+            queue_mail(
+                'Event Registration Confirmation',
+                f'A seat opened up and you are now registered for {entry.event.title}',
+                'admin@college.com',
+                [entry.user.email],
+            )
+    return promoted
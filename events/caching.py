@@ -0,0 +1,218 @@
+"""
+Namespaced cache access with stampede protection and hit/miss counters.
+
+A CacheNamespace prefixes its keys with its name. A versioned namespace
+also puts a version, kept in the cache itself, in every key: invalidate()
+moves the whole namespace to a new version at once, and entries under the
+old one are never read again and expire on their own. A version missing
+from the cache (evicted, or never set) is replaced with a fresh random
+one, never a reused value.
+
+get_or_set() recomputes a value at most once at a time. Threads of one
+process queue on a lock; other processes find a lock entry in the cache
+and wait for the winner's value instead of computing it too. Entries are
+also refreshed shortly before they expire, with a probability that grows
+as expiry nears and with how long the value took to compute (the XFetch
+scheme). One request then recomputes a popular key while the rest keep
+reading the current value, rather than all of them missing together.
+
+cache.add() is atomic on Redis, memcached and local memory. On the file
+cache two processes can occasionally both take a lock, which costs a
+duplicate computation, never a wrong value.
+
+Hits and misses are counted per namespace for the process (cache_stats())
+and per request in the Server-Timing header.
+"""
+
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .instrumentation import record_cache_lookup
+
+
+# Seconds a recompute holds its key's lock, and the longest other
+# processes wait for its value before computing it themselves
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+# How early entries are refreshed; 1 is the usual choice, larger is earlier
+EARLY_EXPIRY_BETA = 1.0
+
+# In-process locks, shared by keys that hash alike, so their number is bounded
+LOCAL_LOCK_STRIPES = 64
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def cache_stats():
+    """
+    This process's counters per namespace: hits, misses, early_refreshes
+    (hits that also recomputed the value) and waits (misses answered by
+    another process's recompute).
+    """
+    with _stats_lock:
+        return {name: dict(counter) for name, counter in _stats.items()}
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def new_version():
+    return uuid.uuid4().hex[:12]
+
+
+class CacheNamespace:
+    def __init__(self, name, timeout=300, versioned=False, alias='default'):
+        self.name = name
+        self.timeout = timeout
+        self.versioned = versioned
+        self.alias = alias
+        self._locks = [threading.Lock() for _ in range(LOCAL_LOCK_STRIPES)]
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _record(self, hits=0, misses=0, **counts):
+        with _stats_lock:
+            _stats.setdefault(self.name, Counter()).update(hits=hits, misses=misses, **counts)
+        record_cache_lookup(hits, misses)
+
+    def version(self):
+        """
+        The namespace's current version. Read it before querying for a value
+        to cache, and pass it to the other methods, so a value built from
+        rows that a concurrent invalidate() replaced is stored under the
+        version that call made obsolete.
+        """
+        if not self.versioned:
+            return None
+        key = f'{self.name}:version'
+        version = self.cache.get(key)
+        if version is None:
+            version = new_version()
+            if not self.cache.add(key, version, None):
+                version = self.cache.get(key, version)
+        return version
+
+    def invalidate(self):
+        if not self.versioned:
+            raise ValueError(f"Cache namespace {self.name!r} is not versioned.")
+        self.cache.set(f'{self.name}:version', new_version(), None)
+
+    def _key(self, key, version):
+        if self.versioned:
+            if version is None:
+                version = self.version()
+            return f'{self.name}:{version}:{key}'
+        return f'{self.name}:{key}'
+
+    def _timeout(self, timeout):
+        return self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get(self, key, default=None, version=None):
+        value = self.cache.get(self._key(key, version))
+        if value is None:
+            self._record(misses=1)
+            return default
+        self._record(hits=1)
+        return value
+
+    def get_many(self, keys, version=None):
+        """{key: value} for those of ``keys`` that are cached."""
+        if self.versioned and version is None:
+            version = self.version()
+        full_keys = {self._key(key, version): key for key in keys}
+        found = self.cache.get_many(full_keys)
+        self._record(hits=len(found), misses=len(full_keys) - len(found))
+        return {full_keys[full_key]: value for full_key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.cache.set(self._key(key, version), value, self._timeout(timeout))
+
+    def set_many(self, mapping, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.versioned and version is None:
+            version = self.version()
+        self.cache.set_many(
+            {self._key(key, version): value for key, value in mapping.items()}, self._timeout(timeout),
+        )
+
+    def delete(self, key, version=None):
+        self.cache.delete(self._key(key, version))
+
+    def get_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        The cached value for ``key``, calling ``compute()`` to fill it when
+        missing or about to expire. Values stored here carry their expiry
+        and cost, so read them only through get_or_set().
+        """
+        timeout = self._timeout(timeout)
+        full_key = self._key(key, version)
+
+        entry = self.cache.get(full_key)
+        if entry is not None:
+            if self._refresh_early(entry) and self.cache.add(f'{full_key}:lock', 1, LOCK_TIMEOUT):
+                self._record(hits=1, early_refreshes=1)
+                try:
+                    return self._compute(full_key, compute, timeout)
+                finally:
+                    self.cache.delete(f'{full_key}:lock')
+            self._record(hits=1)
+            return entry[0]
+
+        self._record(misses=1)
+        with self._locks[hash(full_key) % LOCAL_LOCK_STRIPES]:
+            # Another thread may have filled it while this one queued
+            entry = self.cache.get(full_key)
+            if entry is not None:
+                return entry[0]
+            locked, entry = self._wait_for_lock(full_key)
+            if entry is not None:
+                self._record(waits=1)
+                return entry[0]
+            try:
+                return self._compute(full_key, compute, timeout)
+            finally:
+                if locked:
+                    self.cache.delete(f'{full_key}:lock')
+
+    def _wait_for_lock(self, full_key):
+        """
+        Take the recompute lock for ``full_key``: (True, None), or
+        (False, entry) once another process has stored the value, or
+        (False, None) if it takes longer than LOCK_TIMEOUT.
+        """
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while not self.cache.add(f'{full_key}:lock', 1, LOCK_TIMEOUT):
+            entry = self.cache.get(full_key)
+            if entry is not None or time.monotonic() >= deadline:
+                return False, entry
+            time.sleep(LOCK_POLL_INTERVAL)
+        return True, None
+
+    def _compute(self, full_key, compute, timeout):
+        start = time.monotonic()
+        value = compute()
+        cost = time.monotonic() - start
+        expires = None if timeout is None else time.time() + timeout
+        self.cache.set(full_key, (value, expires, cost), timeout)
+        return value
+
+    @staticmethod
+    def _refresh_early(entry):
+        _, expires, cost = entry
+        if expires is None:
+            return False
+        # -log(u) for u in (0, 1] is exponentially distributed: usually
+        # small, so refreshes cluster just before expiry
+        return time.time() - cost * EARLY_EXPIRY_BETA * math.log(1.0 - random.random()) >= expires
@@ -0,0 +1,98 @@
+import base64
+from datetime import datetime
+
+from django.db.models import F, Q
+from django.db.models.functions import Substr
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .models import Event
+
+
+# Card descriptions are cut to this many characters, as home.html does
+SUMMARY_CHARS = 110
+
+CARD_FIELDS = ('id', 'title', 'category', 'date', 'venue', 'capacity', 'registered_seats', 'image')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(date, pk):
+    raw = f'{date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """The (date, pk) of the last event a client has seen."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        date, pk = raw.rsplit('|', 1)
+        date, pk = datetime.fromisoformat(date), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Malformed cursor.")
+    if timezone.is_naive(date):
+        raise InvalidCursor("Malformed cursor.")
+    return date, pk
+
+
+def catalogue(category=None, upcoming=False):
+    """Events as the listings show them, with seats_remaining annotated."""
+    events = Event.objects.annotate(seats_remaining=F('capacity') - F('registered_seats'))
+    if category:
+        events = events.filter(category=category)
+    if upcoming:
+        events = events.filter(date__gte=timezone.now())
+    return events
+
+
+def keyset_page(events, size, after=None):
+    """
+    One page of ``events`` in (date, id) order, following the cursor
+    ``after``: (rows, cursor for the next page or None).
+
+    The page is found by seeking past the last (date, id) seen rather than
+    with OFFSET, so page 1000 costs what page 1 does and events added or
+    removed meanwhile never shift rows between pages. Works on model and
+    values() querysets alike (the latter must include "id" and "date").
+    """
+    if after is not None:
+        date, pk = decode_cursor(after)
+        # The date__gte is implied by the OR but gives SQLite a range to
+        # seek to in event_date_idx; the OR alone scans from the start
+        events = events.filter(date__gte=date).filter(Q(date__gt=date) | Q(date=date, pk__gt=pk))
+    rows = list(events.order_by('date', 'pk')[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last['date'], last['id'])
+    return rows, encode_cursor(last.date, last.pk)
+
+
+def event_cards(events):
+    """
+    ``events`` as values() rows holding only what a card shows; the
+    description is cut in SQL so long ones are never read in full.
+    """
+    return events.values(*CARD_FIELDS, 'seats_remaining').annotate(
+        summary=Substr('description', 1, SUMMARY_CHARS + 1),
+    )
+
+
+def card_json(row):
+    image = row['image']
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'category': row['category'],
+        'date': row['date'].isoformat(),
+        'venue': row['venue'],
+        'capacity': row['capacity'],
+        'registered_seats': row['registered_seats'],
+        'seats_remaining': row['seats_remaining'],
+        'summary': Truncator(row['summary']).chars(SUMMARY_CHARS),
+        'image': Event._meta.get_field('image').storage.url(image) if image else None,
+    }
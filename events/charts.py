@@ -0,0 +1,44 @@
+import hashlib
+import io
+import json
+
+from .caching import CacheNamespace
+
+
+CHART_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+chart_cache = CacheNamespace('analytics-chart', timeout=CHART_CACHE_TIMEOUT)
+
+
+def chart_digest(counts):
+    """Content hash of the chart's input; identical data gives the same image."""
+    payload = json.dumps(counts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def render_category_chart(counts):
+    # matplotlib costs most of a second and tens of MB to import, so only
+    # processes that actually draw a chart pay for it
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    ax.bar(list(counts.keys()), list(counts.values()))
+    ax.set_title("Event Category Distribution")
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def category_chart_png(counts):
+    """
+    PNG bytes for ``counts``, rendered at most once per distinct input.
+
+    Returns (digest, png).
+    """
+    digest = chart_digest(counts)
+    png = chart_cache.get_or_set(digest, lambda: render_category_chart(counts))
+    return digest, png
@@ -0,0 +1,192 @@
+import re
+from functools import lru_cache
+
+from .caching import CacheNamespace
+from .models import Event
+from .search import search_event_ids
+
+
+GREETING = (
+    "Hi! Ask me about events, registration, QR pass, login, verification, analytics, or admin features."
+)
+FALLBACK = (
+    "im a Basic chatbot where I can help with login/signup, event registration, student details form, "
+    "QR pass, QR verification, analytics, CSV export, and event search.Please ask questions related to these only"
+)
+
+CATEGORY_NAMES = {
+    'workshop': 'workshops',
+    'seminar': 'seminars',
+    'sports': 'sports events',
+    'cultural': 'cultural events',
+}
+
+# Intents in priority order: the first whose condition holds answers. A
+# condition is a list of alternatives, each a tuple of keywords that must
+# all occur in the message (as substrings, like the original `in` checks).
+# A reply starting with "@" is filled in from the event facts.
+INTENTS = [
+    ('greeting', [('hello',), ('hi',), ('hey',), ('hii',)],
+     "Hello! 👋 I’m your Event Assistant. I can help with registration, QR pass, event search, "
+     "verification, and analytics access."),
+    ('about', [('what is this',), ('what is this portal',), ('about portal',)],
+     "This is a College Event Registration Portal where students can register for events, get QR "
+     "passes, and staff can verify attendance."),
+    ('event_count', [('how many events',), ('total', 'event')], '@count'),
+    ('workshop', [('workshop',)], '@workshop'),
+    ('seminar', [('seminar',)], '@seminar'),
+    ('sports', [('sports',), ('sport',)], '@sports'),
+    ('cultural', [('cultural',)], '@cultural'),
+    ('register', [('how to register',), ('register', 'event')],
+     "To register: Login → choose an event → click Register → complete student details (first time "
+     "only) → registration confirmed."),
+    ('register_without_login', [('can i register without login',), ('without login', 'register')],
+     "No. You must login first to register for events and receive your QR pass."),
+    ('duplicate_registration',
+     [('already registered',), ('why can’t i register again',), ('duplicate registration',)],
+     "The system allows only one registration per user per event. Duplicate registrations are blocked "
+     "automatically."),
+    ('capacity', [('event full',), ('why event full',), ('capacity',), ('seat',)],
+     "Each event has a capacity limit. If seats are full, the system blocks registration and shows "
+     "'Event Full'."),
+    ('profile', [('registration number',), ('college email',), ('branch',), ('year of study',)],
+     "During first event registration, you’ll be asked to fill student details like college email, "
+     "registration number, branch, department, and year of study."),
+    ('account', [('login',), ('signup',), ('sign up',), ('create account',)],
+     "Use Signup to create an account, then Login to register for events, access your QR pass, and "
+     "view your registrations."),
+    ('qr_pass', [('qr', 'pass'), ('qr', 'code')],
+     "After registration, go to 'My Events' and click 'View QR Pass'. Show this QR at event entry for "
+     "verification."),
+    ('lost_qr', [('lost qr',), ('lose qr',), ('where is my qr',)],
+     "You can reopen your QR pass anytime from the 'My Events' page after logging in."),
+    ('verify', [('verify',), ('scan',)],
+     "Staff/Admin can use the Verify QR page to scan QR codes or paste the registration ID manually. "
+     "Duplicate scans are blocked."),
+    ('already_verified', [('already verified',), ('duplicate scan',)],
+     "If the same QR is scanned again after successful verification, the system shows 'Already "
+     "Verified' and prevents duplicate entry."),
+    ('analytics', [('analytics',)],
+     "Analytics dashboard is available for Admin/Staff users and shows event and registration "
+     "statistics."),
+    ('export', [('csv',), ('export',)],
+     "Admin/Staff can export registration records as CSV from the navigation bar using the Export CSV "
+     "option."),
+    ('admin', [('admin', 'event')],
+     "Admins can create, edit, and manage events using the Django Admin panel."),
+    ('search', [('find',), ('search',), ('filter',)],
+     "Use the search box and category filter on the home page to quickly find events."),
+    ('email', [('email',)],
+     "A confirmation email is generated when you register for an event. In demo mode, it appears in "
+     "the server terminal."),
+]
+
+
+def _compile(intents):
+    """
+    One regex finding every keyword in a single scan of the message.
+
+    At each position a lookahead matches the longest keyword starting
+    there (alternatives are tried longest first); keywords that are
+    prefixes of it ("sport" in "sports") are added from a prefix map, so
+    the result is exactly the set of keywords occurring as substrings.
+    """
+    keywords = sorted(
+        {keyword for _, condition, _ in intents for clause in condition for keyword in clause},
+        key=lambda keyword: (-len(keyword), keyword),
+    )
+    pattern = re.compile('(?=(%s))' % '|'.join(re.escape(keyword) for keyword in keywords))
+    prefixes = {
+        keyword: frozenset(other for other in keywords if keyword.startswith(other))
+        for keyword in keywords
+    }
+    return pattern, prefixes
+
+
+KEYWORD_RE, KEYWORD_PREFIXES = _compile(INTENTS)
+
+
+# "find events about robotics", "show me events on music", ... answered
+# from the search index ahead of the keyword intents
+FIND_EVENTS_RE = re.compile(
+    r'\b(?:find|search|show|list|look for|looking for)\b.*?\bevents? (?:about|on|for|related to|matching) (.+)'
+)
+
+
+def normalize(message):
+    return ' '.join(message.lower().split())
+
+
+@lru_cache(maxsize=4096)
+def match_intent(message):
+    """The first intent whose keywords occur in the normalized ``message``."""
+    found = set()
+    for match in KEYWORD_RE.finditer(message):
+        found |= KEYWORD_PREFIXES[match.group(1)]
+    for name, condition, reply in INTENTS:
+        if any(found.issuperset(clause) for clause in condition):
+            return name, reply
+    return None, FALLBACK
+
+
+# Event facts used in replies, shared by every worker through the cache
+# and moved to a new version by the Event signals
+FACTS_TIMEOUT = 300
+
+facts_cache = CacheNamespace('chatbot-facts', timeout=FACTS_TIMEOUT, versioned=True)
+
+
+def _load_facts():
+    return {
+        'count': Event.objects.count(),
+        'titles': {
+            category: list(
+                Event.objects.filter(category=category).order_by('pk').values_list('title', flat=True)[:5]
+            )
+            for category in CATEGORY_NAMES
+        },
+    }
+
+
+def get_facts():
+    return facts_cache.get_or_set('facts', _load_facts)
+
+
+def invalidate_facts():
+    facts_cache.invalidate()
+
+
+def reply_to(message):
+    """
+    The chatbot's answer to ``message``. Apart from event searches, it
+    reads the database at most once per facts refresh.
+    """
+    message = normalize(message)
+    if not message:
+        return GREETING
+
+    find = FIND_EVENTS_RE.search(message)
+    if find:
+        return search_reply(find.group(1).strip(' ?.!'))
+
+    _, reply = match_intent(message)
+    if not reply.startswith('@'):
+        return reply
+
+    facts = get_facts()
+    key = reply[1:]
+    if key == 'count':
+        return f"There are currently {facts['count']} events available."
+    titles = facts['titles'][key]
+    name = CATEGORY_NAMES[key]
+    if titles:
+        return f"Available {name}: {', '.join(titles)}."
+    return f"There are no {key} events available right now."
+
+
+def search_reply(topic):
+    ids = search_event_ids(topic, limit=5)
+    if not ids:
+        return f"I couldn't find any events about {topic}."
+    titles = Event.objects.in_bulk(ids)
+    return f"Events about {topic}: {', '.join(titles[pk].title for pk in ids if pk in titles)}."
@@ -0,0 +1,270 @@
+import hashlib
+import re
+import struct
+import uuid
+from collections import Counter
+from typing import NamedTuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Event, Registration
+from .passes import ExpiredPass, InvalidPass, find_pass, pass_expiry, read_pass, sign_pass
+from .rollups import record_event_attendance
+
+
+VERIFIED = 'verified'
+ALREADY_VERIFIED = 'already_verified'
+NOT_FOUND = 'not_found'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+WRONG_EVENT = 'wrong_event'
+
+# Scanners sometimes send the pass text with extra words around the UUID
+UUID_RE = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+
+class ScanTarget(NamedTuple):
+    """The registration a scan points at, by ``field`` (pk or registration_id)."""
+    field: str
+    value: object
+    event_id: object  # known up front for signed passes only
+
+
+def parse_scan(scan, event_id=None, now=None):
+    """
+    Resolve scanned text without touching the database: a ScanTarget, or
+    the final status (INVALID, EXPIRED, WRONG_EVENT, NOT_FOUND) when the
+    scan can be rejected outright.
+
+    Signed passes (see events.passes) carry their own proof; a bare UUID
+    from a pass printed before they existed is only a lookup key.
+    """
+    payload = find_pass(scan)
+    if payload is not None:
+        try:
+            claims = read_pass(payload, now)
+        except ExpiredPass:
+            return EXPIRED
+        except InvalidPass:
+            return INVALID
+        if event_id is not None and claims.event_id != event_id:
+            return WRONG_EVENT
+        return ScanTarget('pk', claims.registration_pk, claims.event_id)
+
+    match = UUID_RE.search(scan)
+    if match is None:
+        return NOT_FOUND
+    return ScanTarget('registration_id', match.group(0).lower(), None)
+
+
+def _load(targets, for_update=False):
+    """Registrations for ``targets``, keyed by (field, value)."""
+    registrations = Registration.objects.select_related('user', 'event')
+    if for_update:
+        registrations = registrations.select_for_update()
+    found = {}
+    for field in ('pk', 'registration_id'):
+        values = {target.value for target in targets if target.field == field}
+        if values:
+            for key, registration in registrations.in_bulk(values, field_name=field).items():
+                # in_bulk keys UUID fields by UUID objects; targets hold strings
+                found[field, str(key) if field == 'registration_id' else key] = registration
+    return found
+
+
+def check_in(scans, verified_by, event_id=None, details=True):
+    """
+    Mark the scanned passes as attended, optionally only for ``event_id``.
+
+    Each pass is claimed with its own ``UPDATE ... WHERE attended = false``,
+    so when two scanners read the same pass exactly one of them gets
+    VERIFIED. The whole batch commits once.
+
+    A signed pass is authenticated and matched to the event in memory, so
+    its first scan costs just that UPDATE. The database is only read to
+    explain a miss (a repeat scan or a deleted registration), for legacy
+    bare-UUID passes, and when ``details`` asks for the registrations.
+
+    Returns one (status, registration or None) pair per scan, in order.
+    """
+    now = timezone.now()
+    targets = [parse_scan(scan, event_id, now) for scan in scans]
+    statuses = []
+    with transaction.atomic():
+        for target in targets:
+            if not isinstance(target, ScanTarget):
+                statuses.append(target)
+                continue
+            lookup = {target.field: target.value, 'attended': False}
+            if event_id is not None:
+                lookup['event_id'] = event_id
+            claimed = Registration.objects.filter(**lookup).update(
+                attended=True,
+                verified_at=now,
+                verified_by=verified_by,
+                updated_at=now,  # update() skips auto_now
+            )
+            statuses.append(VERIFIED if claimed else None)
+
+        found = _load([
+            target for target, status in zip(targets, statuses)
+            if isinstance(target, ScanTarget)
+            and (details or status is None or target.event_id is None)
+        ])
+
+        for i, (target, status) in enumerate(zip(targets, statuses)):
+            if status is None:
+                registration = found.get((target.field, target.value))
+                if registration is None:
+                    statuses[i] = NOT_FOUND
+                elif event_id is not None and registration.event_id != event_id:
+                    statuses[i] = WRONG_EVENT
+                else:
+                    statuses[i] = ALREADY_VERIFIED
+
+        record_event_attendance(Counter(
+            target.event_id or found[(target.field, target.value)].event_id
+            for target, status in zip(targets, statuses)
+            if status == VERIFIED
+        ))
+
+    return [
+        (status, found.get((target.field, target.value)) if isinstance(target, ScanTarget) else None)
+        for target, status in zip(targets, statuses)
+    ]
+
+
+# Offline gates: scanners download a manifest of an event's passes, check
+# scans against it locally and upload their scan log when back online.
+
+MANIFEST_MAGIC = b'EFM2'
+MANIFEST_HEADER = struct.Struct('>4sIII')  # magic, event id, legacy pass count, signed pass count
+MANIFEST_ENTRY_BYTES = 16
+
+
+def pass_digest(payload):
+    """
+    Manifest entry for a signed pass payload. Scanners can't check a pass's
+    HMAC without the signing key, but the payload includes it, so only
+    passes this server issued hash to an entry.
+    """
+    return hashlib.sha256(payload.encode('ascii')).digest()[:MANIFEST_ENTRY_BYTES]
+
+
+def build_manifest(event_id):
+    """
+    Binary manifest of an event's passes: a header, every registration_id
+    as 16 raw bytes (passes printed before signing), then the pass_digest
+    of every signed pass, each section sorted so a device can test
+    membership with a binary search over a memory-mapped file.
+    """
+    expires = pass_expiry(Event.objects.values_list('date', flat=True).get(pk=event_id))
+    ids, digests = [], []
+    for pk, registration_id in (
+        Registration.objects.filter(event_id=event_id)
+        .values_list('pk', 'registration_id')
+        .iterator(chunk_size=5000)
+    ):
+        ids.append(registration_id.bytes)
+        digests.append(pass_digest(sign_pass(pk, event_id, expires)))
+    ids.sort()
+    digests.sort()
+    header = MANIFEST_HEADER.pack(MANIFEST_MAGIC, event_id, len(ids), len(digests))
+    return header + b''.join(ids) + b''.join(digests)
+
+
+def _section_contains(manifest, offset, count, target):
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = offset + mid * MANIFEST_ENTRY_BYTES
+        if manifest[start:start + MANIFEST_ENTRY_BYTES] < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    start = offset + lo * MANIFEST_ENTRY_BYTES
+    return lo < count and manifest[start:start + MANIFEST_ENTRY_BYTES] == target
+
+
+def manifest_contains(manifest, scan):
+    """
+    Reference lookup for scanner clients: is the pass in ``scan`` (scanned
+    text or a registration_id) in ``manifest``?
+    """
+    magic, _, id_count, digest_count = MANIFEST_HEADER.unpack_from(manifest)
+    if magic != MANIFEST_MAGIC:
+        raise ValueError("Not an event manifest.")
+    ids_offset = MANIFEST_HEADER.size
+    digests_offset = ids_offset + id_count * MANIFEST_ENTRY_BYTES
+
+    payload = find_pass(str(scan))
+    if payload is not None:
+        return _section_contains(manifest, digests_offset, digest_count, pass_digest(payload))
+    match = UUID_RE.search(str(scan))
+    if match is None:
+        return False
+    return _section_contains(manifest, ids_offset, id_count, uuid.UUID(match.group(0)).bytes)
+
+
+def sync_scans(scans, verified_by):
+    """
+    Apply an offline scan log: ``scans`` is an iterable of
+    (scanned text, scanned_at) pairs, possibly with repeats.
+
+    A pass counts as verified at its earliest scan, whichever device or
+    path recorded it: a later upload with an earlier scan time moves
+    ``verified_at``/``verified_by`` back to it. Signed passes are checked
+    against their expiry at scan time. All changes are written with one
+    bulk_update.
+
+    Returns {registration_id, or the scanned text if it names no pass: status}.
+    """
+    statuses = {}
+    earliest = {}
+    for scan, scanned_at in scans:
+        target = parse_scan(scan, now=scanned_at)
+        if not isinstance(target, ScanTarget):
+            statuses[scan] = target
+            continue
+        key = (target.field, target.value)
+        if key not in earliest or scanned_at < earliest[key][0]:
+            earliest[key] = (scanned_at, scan)
+
+    now = timezone.now()
+    changed = []
+    newly_attended = Counter()
+    with transaction.atomic():
+        found = _load([ScanTarget(field, value, None) for field, value in earliest], for_update=True)
+
+        # A legacy UUID and a signed pass can name the same registration
+        # (and load it twice); keep its earliest scan by either
+        by_registration = {}
+        for key, (scanned_at, scan) in earliest.items():
+            registration = found.get(key)
+            if registration is None:
+                statuses[scan] = NOT_FOUND
+            elif registration.pk not in by_registration or scanned_at < by_registration[registration.pk][1]:
+                by_registration[registration.pk] = (registration, scanned_at)
+
+        for registration, scanned_at in by_registration.values():
+            registration_id = str(registration.registration_id)
+            if registration.attended:
+                statuses[registration_id] = ALREADY_VERIFIED
+                if registration.verified_at is not None and registration.verified_at <= scanned_at:
+                    continue
+            else:
+                statuses[registration_id] = VERIFIED
+                newly_attended[registration.event_id] += 1
+                registration.attended = True
+            registration.verified_at = scanned_at
+            registration.verified_by = verified_by
+            registration.updated_at = now  # bulk_update skips auto_now
+            changed.append(registration)
+
+        Registration.objects.bulk_update(
+            changed, ['attended', 'verified_at', 'verified_by', 'updated_at'], batch_size=500
+        )
+        record_event_attendance(newly_attended)
+
+    return statuses
@@ -0,0 +1,167 @@
+"""
+Per-request instrumentation: query count and time, template render time,
+view time and cache hits (counted by events.caching), reported in a
+Server-Timing header (visible in the browser's network panel) and checked
+against per-view query budgets.
+
+RequestTimingMiddleware should come first in MIDDLEWARE so its total
+covers the whole stack; template times need TimedDjangoTemplates as the
+TEMPLATES backend. The body of a streaming response is produced after the
+middleware returns, so its queries (the CSV export's) are not counted.
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    """
+    Declare the most queries a view may run, from the moment it is called
+    until its response is back, including the lazy session and user loads
+    it triggers. Over budget fails under QUERY_BUDGET_STRICT (the test
+    suite) and logs a warning otherwise.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+# Slow statements logged per request, slowest first
+SLOW_QUERY_LOG_LIMIT = 3
+
+
+class RequestMetrics:
+    __slots__ = (
+        'queries', 'db_seconds', 'template_seconds', 'slowest', 'view_start', 'view_queries', 'budget',
+        'cache_hits', 'cache_misses',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.slowest = []  # (seconds, sql), at most SLOW_QUERY_LOG_LIMIT
+        self.view_start = None
+        self.view_queries = 0
+        self.budget = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record_query(self, sql, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds * 1000 >= settings.SLOW_QUERY_MS:
+            self.slowest.append((seconds, sql))
+            self.slowest.sort(reverse=True)
+            del self.slowest[SLOW_QUERY_LOG_LIMIT:]
+
+
+_metrics = ContextVar('request_metrics', default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    metrics = _metrics.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics.record_query(sql, time.perf_counter() - start)
+
+
+def record_cache_lookup(hits, misses):
+    metrics = _metrics.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_timed_execute))
+                response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        end = time.perf_counter()
+
+        timings = [
+            f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.queries} queries"',
+            f'tpl;dur={metrics.template_seconds * 1000:.1f}',
+            f'cache;desc="{metrics.cache_hits}/{metrics.cache_hits + metrics.cache_misses} hits"',
+        ]
+        if metrics.view_start is not None:
+            timings.append(f'view;dur={(end - metrics.view_start) * 1000:.1f}')
+        timings.append(f'total;dur={(end - start) * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        for seconds, sql in metrics.slowest:
+            logger.warning("Slow query (%.1f ms) on %s: %s", seconds * 1000, request.path, sql)
+
+        if metrics.budget is not None:
+            used = metrics.queries - metrics.view_queries
+            if used > metrics.budget:
+                message = f"{request.path} ran {used} queries, over its budget of {metrics.budget}."
+                if settings.QUERY_BUDGET_STRICT:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _metrics.get()
+        if metrics is not None:
+            metrics.view_start = time.perf_counter()
+            metrics.view_queries = metrics.queries
+            metrics.budget = getattr(view_func, 'query_budget', None)
+        return None
+
+
+class TimedTemplate:
+    """A template from TimedDjangoTemplates: times render() into the request's metrics."""
+
+    def __init__(self, template):
+        self.template = template
+
+    @property
+    def origin(self):
+        return self.template.origin
+
+    def render(self, context=None, request=None):
+        metrics = _metrics.get()
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            if metrics is not None:
+                metrics.template_seconds += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render times counted per request."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
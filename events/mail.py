@@ -0,0 +1,135 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+
+logger = logging.getLogger(__name__)
+
+# Retry delays grow as BACKOFF_BASE * 2 ** (attempts - 1), capped at BACKOFF_MAX
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+
+# How long a claimed batch stays reserved before another worker may retry it
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def queue_mail(subject, body, from_email, recipient_list):
+    """Store a message for the outbox worker instead of sending it in the request."""
+    recipients = [address for address in recipient_list if address]
+    if not recipients:
+        return None
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        recipients=recipients,
+    )
+
+
+def backoff_delay(attempts):
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def claim_batch(batch_size):
+    """
+    Reserve up to ``batch_size`` due messages for this worker.
+
+    The claim is one UPDATE tagging rows with a fresh token, so two workers
+    never pick up the same message. Rows stuck in SENDING past their lease
+    (a crashed worker) become due again.
+    """
+    now = timezone.now()
+    token = uuid.uuid4()
+    due = EmailOutbox.objects.filter(
+        status__in=[EmailOutbox.PENDING, EmailOutbox.SENDING],
+        next_attempt_at__lte=now,
+    )
+    due_ids = list(due.order_by('next_attempt_at', 'pk').values_list('pk', flat=True)[:batch_size])
+
+    # Re-checking the due filter in the UPDATE skips rows another worker
+    # claimed between the two statements
+    due.filter(pk__in=due_ids).update(
+        status=EmailOutbox.SENDING,
+        claim_token=token,
+        next_attempt_at=now + CLAIM_LEASE,
+    )
+
+    return list(EmailOutbox.objects.filter(claim_token=token).order_by('pk'))
+
+
+def deliver_batch(batch_size=100, max_attempts=5, connection=None):
+    """
+    Send one batch of queued mail over a single backend connection.
+
+    Returns a dict of per-batch metrics (claimed, sent, retried, failed,
+    seconds, per_second).
+    """
+    messages = claim_batch(batch_size)
+    stats = {'claimed': len(messages), 'sent': 0, 'retried': 0, 'failed': 0}
+    if not messages:
+        stats.update(seconds=0.0, per_second=0.0)
+        return stats
+
+    start = time.perf_counter()
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # Backend unreachable: the whole batch waits for its next attempt
+        for message in messages:
+            _record_failure(message, exc, max_attempts, stats)
+    else:
+        try:
+            for message in messages:
+                try:
+                    EmailMessage(
+                        message.subject,
+                        message.body,
+                        message.from_email,
+                        message.recipients,
+                        connection=connection,
+                    ).send()
+                except Exception as exc:
+                    _record_failure(message, exc, max_attempts, stats)
+                else:
+                    message.attempts += 1
+                    message.status = EmailOutbox.SENT
+                    message.sent_at = timezone.now()
+                    message.last_error = ""
+                    message.claim_token = None
+                    stats['sent'] += 1
+        finally:
+            connection.close()
+
+    EmailOutbox.objects.bulk_update(
+        messages,
+        ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'claim_token'],
+    )
+
+    elapsed = time.perf_counter() - start
+    stats.update(seconds=round(elapsed, 4), per_second=round(stats['sent'] / elapsed, 1) if elapsed else 0.0)
+    logger.info(
+        "Outbox batch: %(claimed)d claimed, %(sent)d sent, %(retried)d retried, "
+        "%(failed)d failed in %(seconds).3fs (%(per_second).1f msg/s)",
+        stats,
+    )
+    return stats
+
+
+def _record_failure(message, exc, max_attempts, stats):
+    message.attempts += 1
+    message.last_error = f"{type(exc).__name__}: {exc}"
+    message.claim_token = None
+    if message.attempts >= max_attempts:
+        message.status = EmailOutbox.FAILED
+        stats['failed'] += 1
+    else:
+        message.status = EmailOutbox.PENDING
+        message.next_attempt_at = timezone.now() + backoff_delay(message.attempts)
+        stats['retried'] += 1
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.recommendation import item_similarity
+
+
+class Command(BaseCommand):
+    help = "Build the event x event co-registration similarity matrix used by recommendations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-neighbours', type=int, default=100,
+            help="Similar events kept per event (0 keeps all).",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        matrix = item_similarity.build(max_neighbours=options['max_neighbours'])
+        elapsed = time.perf_counter() - start
+
+        size_kb = (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {matrix.shape[0]}x{matrix.shape[1]} matrix ({matrix.nnz} pairs, "
+            f"{size_kb:.0f} KiB) to {item_similarity.path} in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,51 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event, Registration
+from events.passes import pass_expiry, sign_pass
+from events.qr import FORMATS, write_pass_archive
+
+
+class Command(BaseCommand):
+    help = "Render every registration's QR pass for an event into a single ZIP file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, required=True, help="Event id.")
+        parser.add_argument('--output', help="ZIP file to write (default: passes-event-<id>.zip).")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='png', help="Image format.")
+        parser.add_argument('--workers', type=int, default=1, help="Processes used to render passes.")
+        parser.add_argument('--batch-size', type=int, default=64, help="Passes rendered per task.")
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event']} does not exist.")
+
+        output = Path(options['output'] or f'passes-event-{event.pk}.zip')
+        expires = pass_expiry(event.date)
+        passes = (
+            (sign_pass(pk, event.pk, expires), f'{username}-{registration_id}')
+            for pk, registration_id, username in Registration.objects.filter(event=event)
+            .order_by('pk')
+            .values_list('pk', 'registration_id', 'user__username')
+            .iterator(chunk_size=2000)
+        )
+
+        start = time.perf_counter()
+        written = write_pass_archive(
+            passes,
+            output,
+            fmt=options['format'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+        )
+        elapsed = time.perf_counter() - start
+
+        rate = written / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} passes for {event.title} to {output} "
+            f"in {elapsed:.2f}s ({rate:.0f} passes/s, {output.stat().st_size / 2 ** 20:.1f} MiB)"
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.recommendation import precompute_recommendations
+
+
+class Command(BaseCommand):
+    help = "Precompute top-k event recommendations for every user into the Recommendation table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=10, help="Recommendations stored per user.")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Users scored per matrix block.")
+        parser.add_argument('--workers', type=int, default=1, help="Processes used to score blocks.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        users, rows = precompute_recommendations(
+            k=options['top_k'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+        )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {rows} recommendations for {users} users in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.mail import deliver_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued EmailOutbox messages in batches over one mail connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5, help="Attempts before a message is marked failed.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting once the queue is drained.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        start = time.perf_counter()
+
+        while True:
+            stats = deliver_batch(options['batch_size'], options['max_attempts'])
+            if stats['claimed']:
+                for key in totals:
+                    totals[key] += stats[key]
+                self.stdout.write(
+                    f"batch: {stats['sent']} sent, {stats['retried']} retried, "
+                    f"{stats['failed']} failed ({stats['per_second']} msg/s)"
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        elapsed = time.perf_counter() - start
+        rate = totals['sent'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['sent']}, retrying {totals['retried']}, failed {totals['failed']} "
+            f"in {elapsed:.2f}s ({rate:.1f} msg/s)"
+        ))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.11 on 2026-10-18 09:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_registered_seats(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Registration = apps.get_model('events', 'Registration')
+
+    counts = (
+        Registration.objects.filter(event=OuterRef('pk'))
+        .values('event')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Event.objects.update(registered_seats=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_userprofile_branch_userprofile_college_email_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='registered_seats',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_registered_seats, migrations.RunPython.noop),
+    ]
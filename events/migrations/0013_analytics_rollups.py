@@ -0,0 +1,92 @@
+# Generated by Django 5.2.11 on 2026-10-18 09:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Registration = apps.get_model('events', 'Registration')
+    CategoryRollup = apps.get_model('events', 'CategoryRollup')
+    EventRollup = apps.get_model('events', 'EventRollup')
+    DailyRollup = apps.get_model('events', 'DailyRollup')
+
+    attended = Count('pk', filter=Q(attended=True))
+
+    per_category = {
+        row['category']: row
+        for row in Event.objects.values('category').annotate(events=Count('pk'))
+    }
+    for row in Registration.objects.values('event__category').annotate(
+        registrations=Count('pk'), attended=attended
+    ):
+        per_category.setdefault(row['event__category'], {'events': 0}).update(row)
+    CategoryRollup.objects.bulk_create(
+        CategoryRollup(
+            category=category,
+            events=row.get('events', 0),
+            registrations=row.get('registrations', 0),
+            attended=row.get('attended', 0),
+        )
+        for category, row in per_category.items()
+    )
+
+    EventRollup.objects.bulk_create(
+        EventRollup(event_id=row['event'], registrations=row['registrations'], attended=row['attended'])
+        for row in Registration.objects.values('event').annotate(
+            registrations=Count('pk'), attended=attended
+        )
+    )
+
+    # Registrations carry no creation timestamp, so only check-ins can be
+    # placed on a day
+    DailyRollup.objects.bulk_create(
+        DailyRollup(day=row['day'], attended=row['attended'])
+        for row in Registration.objects.filter(verified_at__isnull=False)
+        .annotate(day=TruncDate('verified_at'))
+        .values('day')
+        .annotate(attended=Count('pk'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_registration_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=20, unique=True)),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('registrations', models.PositiveIntegerField(default=0)),
+                ('attended', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('registrations', models.PositiveIntegerField(default=0)),
+                ('attended', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventRollup',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='events.event')),
+                ('registrations', models.PositiveIntegerField(default=0)),
+                ('attended', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations
+
+
+# Full-text index over events (Porter-stemmed, so "robots" finds
+# "robotics"), kept in step by triggers so every write path (ORM,
+# bulk_create, admin, raw SQL) is covered. The triggers only fire when a
+# searchable column changes, so seat counter updates never touch it.
+#
+# SQLite-only: on other databases events.search falls back to LIKE queries.
+# Note that a later migration that makes SQLite remake events_event (e.g.
+# AlterField) drops these triggers; re-create them in that migration.
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE events_event_fts USING fts5(
+        title, description, venue, category,
+        content='events_event', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER events_event_fts_insert AFTER INSERT ON events_event BEGIN
+        INSERT INTO events_event_fts(rowid, title, description, venue, category)
+        VALUES (new.id, new.title, new.description, new.venue, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER events_event_fts_delete AFTER DELETE ON events_event BEGIN
+        INSERT INTO events_event_fts(events_event_fts, rowid, title, description, venue, category)
+        VALUES ('delete', old.id, old.title, old.description, old.venue, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER events_event_fts_update AFTER UPDATE OF title, description, venue, category
+    ON events_event BEGIN
+        INSERT INTO events_event_fts(events_event_fts, rowid, title, description, venue, category)
+        VALUES ('delete', old.id, old.title, old.description, old.venue, old.category);
+        INSERT INTO events_event_fts(rowid, title, description, venue, category)
+        VALUES (new.id, new.title, new.description, new.venue, new.category);
+    END
+    """,
+    # Backfill existing events
+    "INSERT INTO events_event_fts(events_event_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS events_event_fts_insert",
+    "DROP TRIGGER IF EXISTS events_event_fts_delete",
+    "DROP TRIGGER IF EXISTS events_event_fts_update",
+    "DROP TABLE IF EXISTS events_event_fts",
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE_SQL), run(DROP_SQL)),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
 class Event(models.Model):
@@ -19,11 +20,23 @@ class Event(models.Model):
     capacity = models.IntegerField(default=100)
     image = models.ImageField(upload_to='event_images/', blank=True, null=True)
 
+    # Denormalized count of Registration rows, maintained by events.booking
+    # and the Registration post_delete signal.
+    registered_seats = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # The catalogue: date order (the index also carries the id, so
+            # keyset pages need no sort), optionally within one category
+            models.Index(fields=['date'], name='event_date_idx'),
+            models.Index(fields=['category', 'date'], name='event_category_date_idx'),
+        ]
+
     def registered_count(self):
-        return self.registration_set.count()
+        return self.registered_seats
 
     def seats_left(self):
-        return self.capacity - self.registered_count()
+        return self.capacity - self.registered_seats
 
     def __str__(self):
         return self.title
@@ -43,9 +56,20 @@ class Registration(models.Model):
         blank=True,
         related_name='verified_registrations'
     )
+    # Bumped on every write so incremental exports can pick up changes.
+    # Paths that use update()/bulk_update() must set it themselves.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('user', 'event')
+        indexes = [
+            # The admin's attended filter, newest first. Django renders
+            # attended=True/False as a bare "attended" / "NOT attended"
+            # condition, which SQLite matches to these partial indexes but
+            # cannot look up in an ordinary index on the column.
+            models.Index(fields=['id'], condition=models.Q(attended=True), name='registration_attended_idx'),
+            models.Index(fields=['id'], condition=models.Q(attended=False), name='registration_pending_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.event.title}"
@@ -73,5 +97,120 @@ class UserProfile(models.Model):
     department = models.CharField(max_length=100, blank=True, null=True)
     year_of_study = models.IntegerField(choices=YEAR_CHOICES, blank=True, null=True)
 
+    # Details a student must give before registering for an event
+    REQUIRED_FIELDS = ('college_email', 'registration_number', 'branch', 'department', 'year_of_study')
+
+    def is_complete(self):
+        return all(getattr(self, field) for field in self.REQUIRED_FIELDS)
+
+    def __str__(self):
+        return self.user.username
+
+class Recommendation(models.Model):
+    """Top-k events per user, written by ``manage.py precompute_recommendations``."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'rank')
+        ordering = ['user', 'rank']
+
+    def __str__(self):
+        return f"{self.user.username} #{self.rank} - {self.event.title}"
+
+
+class EmailOutbox(models.Model):
+    """Outgoing mail queued by requests and delivered by ``manage.py send_outbox``."""
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class WaitlistEntry(models.Model):
+    """A student waiting for a seat at a full event, promoted in joined order."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist')
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'event')
+        ordering = ['joined_at', 'id']
+        indexes = [
+            # An event's queue in promotion order
+            models.Index(fields=['event', 'joined_at'], name='waitlist_event_joined_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} waiting for {self.event.title}"
+
+
+class CategoryRollup(models.Model):
+    """Running totals per event category, maintained by events.rollups."""
+
+    category = models.CharField(max_length=20, unique=True)
+    events = models.PositiveIntegerField(default=0)
+    registrations = models.PositiveIntegerField(default=0)
+    attended = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.category
+
+
+class EventRollup(models.Model):
+    """Running registration and attendance totals for one event."""
+
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    registrations = models.PositiveIntegerField(default=0)
+    attended = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.event.title
+
+
+class DailyRollup(models.Model):
+    """Registrations made and check-ins recorded on each day."""
+
+    day = models.DateField(unique=True)
+    registrations = models.PositiveIntegerField(default=0)
+    attended = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return str(self.day)
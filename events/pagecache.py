@@ -0,0 +1,78 @@
+"""
+Cached renderings of the event catalogue.
+
+Two layers, both invalidated through versions stored in the cache rather
+than by deleting entries (see events.caching):
+
+- The catalogue_pages namespace moves to a new version whenever an Event
+  or Registration is saved or deleted (see events.signals). The anonymous
+  home page and the listing shown to signed-in users are cached in it.
+  Handlers read the version before querying, so a page built from rows
+  older than a change is always stored under the version that change
+  replaced.
+- Each event card is cached under its event's version, which changes when
+  the event is saved or deleted, plus its seat count. Registrations move
+  only the seat count, so a new catalogue version re-renders just the
+  cards whose counts changed.
+"""
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .caching import CacheNamespace, new_version
+
+
+# Seconds cached pages and cards live; versions keep them fresh, this only
+# bounds the space unused entries take
+PAGE_TIMEOUT = 300
+CARD_TIMEOUT = 3600
+
+catalogue_pages = CacheNamespace('catalogue', timeout=PAGE_TIMEOUT, versioned=True)
+event_card_cache = CacheNamespace('card', timeout=CARD_TIMEOUT)
+event_card_versions = CacheNamespace('card-version', timeout=None)
+
+
+def event_versions(event_ids):
+    """
+    The card version of each event. One missing from the cache is replaced
+    with a fresh random value, so cards cached under an evicted version
+    are never served again.
+    """
+    found = event_card_versions.get_many(event_ids)
+    missing = {event_id: new_version() for event_id in event_ids if event_id not in found}
+    if missing:
+        event_card_versions.set_many(missing)
+        found.update(missing)
+    return found
+
+
+def invalidate_catalogue(event_id=None):
+    """New catalogue version, and a new version for ``event_id``'s card if given."""
+    catalogue_pages.invalidate()
+    if event_id is not None:
+        event_card_versions.set(event_id, new_version())
+
+
+def render_cards(events, authenticated):
+    """
+    HTML for each event's card (events need the seats_remaining annotation),
+    rendering only those not already cached.
+    """
+    versions = event_versions([event.pk for event in events])
+    keys = [
+        f'{event.pk}:{versions[event.pk]}:{event.registered_seats}:{int(authenticated)}'
+        for event in events
+    ]
+    cached = event_card_cache.get_many(keys)
+    cards = []
+    rendered = {}
+    for event, key in zip(events, keys):
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(
+                'event_card.html', {'event': event, 'authenticated': authenticated},
+            )
+        cards.append(mark_safe(html))
+    if rendered:
+        event_card_cache.set_many(rendered)
+    return cards
@@ -0,0 +1,89 @@
+import base64
+import re
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+
+# Signed pass payload, as encoded in the QR code:
+#
+#   version (1 byte) | registration pk (4) | event pk (4) | expiry, epoch s (4) | HMAC-SHA256[:10]
+#
+# base32 without padding gives 37 characters from [A-Z2-7], which QR
+# encodes in alphanumeric mode: a version 2 code instead of the version 3
+# needed for a bare UUID string, and checkable without a database read.
+PASS_VERSION = 1
+PASS_FIELDS = struct.Struct('>BIII')
+PASS_MAC_BYTES = 10
+PASS_LENGTH = 37
+PASS_RE = re.compile(r'\b[A-Z2-7]{%d}\b' % PASS_LENGTH)
+
+
+class InvalidPass(ValueError):
+    pass
+
+
+class ExpiredPass(InvalidPass):
+    pass
+
+
+@dataclass(frozen=True)
+class PassClaims:
+    registration_pk: int
+    event_id: int
+    expires: int
+
+
+def _mac(body):
+    return salted_hmac(
+        'events.passes', body, secret=settings.PASS_SIGNING_KEY, algorithm='sha256'
+    ).digest()[:PASS_MAC_BYTES]
+
+
+def sign_pass(registration_pk, event_id, expires):
+    """Payload text for a pass valid until ``expires`` (epoch seconds)."""
+    body = PASS_FIELDS.pack(PASS_VERSION, registration_pk, event_id, expires)
+    return base64.b32encode(body + _mac(body)).decode('ascii').rstrip('=')
+
+
+def pass_expiry(event_date):
+    return int((event_date + settings.PASS_VALID_AFTER_EVENT).timestamp())
+
+
+def pass_payload(registration):
+    """The text a registration's QR pass encodes (needs ``registration.event``)."""
+    return sign_pass(registration.pk, registration.event_id, pass_expiry(registration.event.date))
+
+
+def find_pass(text):
+    """The signed payload inside scanned ``text``, or None."""
+    match = PASS_RE.search(text.upper())
+    return match.group(0) if match else None
+
+
+def read_pass(payload, now=None):
+    """
+    Verify a signed payload and return its PassClaims, using no database.
+
+    Raises InvalidPass for anything forged, truncated or of an unknown
+    version, and ExpiredPass once the pass has expired.
+    """
+    try:
+        raw = base64.b32decode(payload + '=' * (-len(payload) % 8))
+    except ValueError:
+        raise InvalidPass("Not a pass payload.")
+    body, mac = raw[:PASS_FIELDS.size], raw[PASS_FIELDS.size:]
+    if len(body) != PASS_FIELDS.size or not constant_time_compare(mac, _mac(body)):
+        raise InvalidPass("Bad signature.")
+    version, registration_pk, event_id, expires = PASS_FIELDS.unpack(body)
+    if version != PASS_VERSION:
+        raise InvalidPass(f"Unknown pass version {version}.")
+
+    if now is None:
+        now = datetime.now(dt_timezone.utc)
+    if now.timestamp() > expires:
+        raise ExpiredPass("Pass has expired.")
+    return PassClaims(registration_pk, event_id, expires)
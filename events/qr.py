@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# Part of every digest: bump it when rendering options change so stale
+# images on disk and in browsers are never served for the new look
+RENDER_VERSION = 1
+
+
+def qr_digest(value, fmt):
+    """
+    Identifier of the image encoding ``value`` in ``fmt``.
+
+    Rendering is deterministic, so the input names the bytes as well as a
+    hash of the bytes would, and can be computed without rendering.
+    """
+    key = f'{RENDER_VERSION}:{fmt}:{value}'
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def render_qr(value, fmt):
+    import qrcode
+
+    if fmt == 'svg':
+        from qrcode.image.svg import SvgPathImage
+
+        image = qrcode.make(value, image_factory=SvgPathImage)
+    else:
+        image = qrcode.make(value)
+
+    buffer = io.BytesIO()
+    image.save(buffer)
+    return buffer.getvalue()
+
+
+class QRImageCache:
+    """
+    Rendered QR images, kept in a bounded in-process LRU in front of a
+    directory shared by every worker (QR_CACHE_DIR), both keyed by
+    qr_digest. An image is rendered once per deployment, then read from disk
+    once per worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+
+    @property
+    def directory(self):
+        return Path(settings.QR_CACHE_DIR)
+
+    def reset(self):
+        with self._lock:
+            self._images.clear()
+
+    def get(self, value, fmt):
+        """Return (digest, image bytes) for ``value`` rendered as ``fmt``."""
+        digest = qr_digest(value, fmt)
+        with self._lock:
+            image = self._images.get(digest)
+            if image is not None:
+                self._images.move_to_end(digest)
+                return digest, image
+
+        path = self.directory / digest[:2] / f'{digest}.{fmt}'
+        try:
+            image = path.read_bytes()
+        except FileNotFoundError:
+            image = render_qr(value, fmt)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write under a unique name and rename, so a concurrent reader
+            # never sees a partial file
+            tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            tmp.write_bytes(image)
+            os.replace(tmp, path)
+
+        with self._lock:
+            self._images[digest] = image
+            self._images.move_to_end(digest)
+            while len(self._images) > settings.QR_MEMORY_CACHE_SIZE:
+                self._images.popitem(last=False)
+        return digest, image
+
+
+qr_images = QRImageCache()
+
+
+# Bulk generation (manage.py generate_passes)
+
+def _render_batch(values, fmt):
+    return [render_qr(value, fmt) for value in values]
+
+
+def write_pass_archive(passes, archive, fmt='png', workers=1, batch_size=64):
+    """
+    Render ``passes`` (an iterable of (payload, filename) pairs) into the
+    ZIP file ``archive``, one ``<filename>.<fmt>`` member each. Returns the
+    number written.
+
+    Batches are rendered in a process pool, with at most two per worker in
+    flight and results written in submission order. Memory therefore stays
+    bounded by the in-flight batches, however many passes there are.
+    """
+    def batches():
+        batch = []
+        for payload, filename in passes:
+            batch.append((payload, f'{filename}.{fmt}'))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    written = 0
+    # PNGs are already compressed; deflating them again only costs time
+    compression = zipfile.ZIP_STORED if fmt == 'png' else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(archive, 'w', compression=compression) as zf:
+        def write(batch, images):
+            for (_, filename), image in zip(batch, images):
+                zf.writestr(filename, image)
+            return len(batch)
+
+        if workers <= 1:
+            for batch in batches():
+                written += write(batch, _render_batch([value for value, _ in batch], fmt))
+            return written
+
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for batch in batches():
+                if len(in_flight) >= workers * 2:
+                    done, future = in_flight.popleft()
+                    written += write(done, future.result())
+                future = pool.submit(_render_batch, [value for value, _ in batch], fmt)
+                in_flight.append((batch, future))
+            while in_flight:
+                done, future = in_flight.popleft()
+                written += write(done, future.result())
+    return written
@@ -1,37 +1,531 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from .models import Event, Registration
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
-def get_recommendations(user):
-    events = Event.objects.all()
-    if not events:
-        return []
+from .models import Event, Recommendation, Registration
 
-    # Prepare event category list
-    event_categories = [event.category for event in events]
 
-    # Create vectorizer
-    vectorizer = TfidfVectorizer()
-    event_vectors = vectorizer.fit_transform(event_categories)
+CATEGORIES = [value for value, _ in Event.CATEGORY_CHOICES]
+CATEGORY_INDEX = {value: i for i, value in enumerate(CATEGORIES)}
 
-    # Get user's registered categories
-    user_regs = Registration.objects.filter(user=user)
-    if not user_regs:
-        return []
+# Category codes outside CATEGORY_CHOICES, and slots of deleted events
+UNKNOWN = len(CATEGORIES)
+DELETED = -1
 
-    user_categories = [reg.event.category for reg in user_regs]
-    user_vector = vectorizer.transform([" ".join(user_categories)])
+# Sort key given to events a user must never see (deleted or already registered)
+EXCLUDED = np.iinfo(np.int64).max
 
-    similarity = cosine_similarity(user_vector, event_vectors)
 
-    scores = list(enumerate(similarity[0]))
-    scores = sorted(scores, key=lambda x: x[1], reverse=True)
+class RecommendationIndex:
+    """
+    In-process index answering "top-k events for this user".
 
-    recommended_events = []
-    for index, score in scores:
-        event = list(events)[index]
-        if event not in [reg.event for reg in user_regs]:
-            recommended_events.append(event)
+    Events are stored as parallel NumPy arrays (primary key, category code,
+    start time and seats left, by position). Each user is a vector of registration counts per
+    category plus the positions they already registered for. Registration
+    and Event signals keep it current; anything that would need a full
+    recount (e.g. an event changing category) just marks it stale so the
+    next lookup rebuilds from the database.
 
-    return recommended_events[:3]
\ No newline at end of file
+    Scores reproduce the old TF-IDF/cosine ranking: with one category token
+    per event, cosine similarity reduces to the user's idf-weighted weight
+    for the event's category. Ties keep the old order (ascending pk).
+    Past and full events are ranked last with deleted ones, so they never
+    crowd upcoming events out of the top k.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at = None
+
+    def reset(self):
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_built(self):
+        ttl = getattr(settings, 'RECOMMENDATION_INDEX_TTL', 300)
+        if self._built_at is None or time.monotonic() - self._built_at > ttl:
+            self.build()
+
+    def build(self):
+        with self._lock:
+            rows = list(
+                Event.objects.order_by('pk').values_list(
+                    'pk', 'category', 'date', 'capacity', 'registered_seats',
+                )
+            )
+            self.event_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            self.categories = np.fromiter(
+                (CATEGORY_INDEX.get(row[1], UNKNOWN) for row in rows),
+                dtype=np.int8,
+                count=len(rows),
+            )
+            self.starts = np.fromiter((row[2].timestamp() for row in rows), dtype=np.float64, count=len(rows))
+            self.seats_left = np.fromiter((row[3] - row[4] for row in rows), dtype=np.int64, count=len(rows))
+            self.positions = {row[0]: i for i, row in enumerate(rows)}
+            self.category_sizes = np.bincount(self.categories, minlength=UNKNOWN + 1)
+
+            self.affinity = {}
+            self.registered = {}
+            for user_id, event_id in Registration.objects.values_list('user_id', 'event_id').iterator():
+                self._add_registration(user_id, event_id)
+
+            self._built_at = time.monotonic()
+
+    # Incremental updates (called from events.signals)
+
+    def event_saved(self, event):
+        with self._lock:
+            if self._built_at is None:
+                return
+            code = CATEGORY_INDEX.get(event.category, UNKNOWN)
+            position = self.positions.get(event.pk)
+            start = event.date.timestamp()
+            seats_left = event.capacity - event.registered_seats
+            if position is None:
+                self.positions[event.pk] = len(self.event_ids)
+                self.event_ids = np.append(self.event_ids, event.pk)
+                self.categories = np.append(self.categories, np.int8(code))
+                self.starts = np.append(self.starts, start)
+                self.seats_left = np.append(self.seats_left, seats_left)
+                self.category_sizes[code] += 1
+            elif self.categories[position] != code:
+                # Every registered user's affinity would shift; recount lazily
+                self._built_at = None
+            else:
+                self.starts[position] = start
+                self.seats_left[position] = seats_left
+
+    def event_deleted(self, event_id):
+        with self._lock:
+            if self._built_at is None:
+                return
+            position = self.positions.pop(event_id, None)
+            if position is not None:
+                self.category_sizes[self.categories[position]] -= 1
+                self.categories[position] = DELETED
+
+    def registration_saved(self, user_id, event_id):
+        with self._lock:
+            if self._built_at is not None and self._add_registration(user_id, event_id):
+                self.seats_left[self.positions[event_id]] -= 1
+
+    def registration_deleted(self, user_id, event_id):
+        with self._lock:
+            if self._built_at is None:
+                return
+            position = self.positions.get(event_id)
+            registered = self.registered.get(user_id)
+            if position is None or registered is None or position not in registered:
+                return
+            registered.discard(position)
+            self.affinity[user_id][self.categories[position]] -= 1
+            self.seats_left[position] += 1
+
+    def _add_registration(self, user_id, event_id):
+        """Count the registration; False if it was unknown or already counted."""
+        position = self.positions.get(event_id)
+        if position is None:
+            return False
+        registered = self.registered.setdefault(user_id, set())
+        if position in registered:
+            return False
+        registered.add(position)
+        vector = self.affinity.setdefault(user_id, np.zeros(UNKNOWN + 1, dtype=np.float64))
+        vector[self.categories[position]] += 1
+        return True
+
+    # Queries
+
+    def top_event_ids(self, user_id, k=3):
+        with self._lock:
+            self._ensure_built()
+            registered = self.registered.get(user_id)
+            if not registered:
+                return []
+
+            # idf as sklearn's TfidfVectorizer(smooth_idf=True) computes it
+            n_events = len(self.positions)
+            idf = np.log((1 + n_events) / (1 + self.category_sizes)) + 1
+            weights = self.affinity[user_id] * idf
+            weights[UNKNOWN] = 0  # the old vectorizer had no token for these
+
+            size = len(self.event_ids)
+            open_ = self._open_mask()
+            excluded = list(registered)
+
+            cf_weight = getattr(settings, 'RECOMMENDATION_CF_WEIGHT', 0.5)
+            cf_scores = item_similarity.user_scores(self.event_ids[excluded]) if cf_weight else None
+            if cf_scores is not None:
+                return self._blended_top_k(weights, cf_scores, cf_weight, open_, excluded, k)
+
+            # Dense-rank categories by weight so equal scores share a rank,
+            # then order events by (category rank, position)
+            category_rank = np.searchsorted(np.unique(-weights), -weights)
+            keys = np.full(size, EXCLUDED, dtype=np.int64)
+            keys[open_] = category_rank[self.categories[open_]] * size + np.flatnonzero(open_)
+            keys[excluded] = EXCLUDED
+
+            available = size - np.count_nonzero(keys == EXCLUDED)
+            k = min(k, available)
+            if k <= 0:
+                return []
+            top = np.argpartition(keys, k - 1)[:k]
+            top = top[np.argsort(keys[top])]
+            return self.event_ids[top].tolist()
+
+    def _open_mask(self):
+        """Positions of events that exist, have not started and have seats left."""
+        return (
+            (self.categories != DELETED)
+            & (self.starts >= timezone.now().timestamp())
+            & (self.seats_left > 0)
+        )
+
+    def _blended_top_k(self, weights, cf_scores, cf_weight, open_, excluded, k):
+        """Mix the cosine category score with co-registration similarity."""
+        cf_event_ids, cf_values = cf_scores
+        norm = np.linalg.norm(weights)
+        category_scores = weights[self.categories] / (norm or 1)
+
+        # Both id arrays are ascending pks, so align them with searchsorted
+        spread = np.zeros(len(self.event_ids))
+        slots = np.searchsorted(self.event_ids, cf_event_ids).clip(max=len(self.event_ids) - 1)
+        matched = self.event_ids[slots] == cf_event_ids
+        spread[slots[matched]] = cf_values[matched]
+
+        scores = (1 - cf_weight) * category_scores + cf_weight * spread
+        scores[~open_] = -np.inf
+        scores[excluded] = -np.inf
+
+        k = min(k, int(np.count_nonzero(np.isfinite(scores))))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return self.event_ids[top].tolist()
+
+
+class ItemSimilarity:
+    """
+    Event x event cosine similarity from co-registrations.
+
+    Built offline by ``manage.py build_similarity`` and persisted with joblib
+    at RECOMMENDATION_SIMILARITY_PATH. Workers memory-map the arrays on first
+    use (and again whenever the file changes), so they share one copy
+    through the page cache instead of each recomputing it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.event_ids = None
+        self.matrix = None
+
+    @property
+    def path(self):
+        return Path(settings.RECOMMENDATION_SIMILARITY_PATH)
+
+    def reset(self):
+        with self._lock:
+            self._mtime = None
+            self.event_ids = None
+            self.matrix = None
+
+    def build(self, max_neighbours=100):
+        """Compute the matrix from every Registration and write it to disk."""
+        # SciPy and joblib are imported where used: most worker processes
+        # never build or load a matrix and shouldn't pay their import cost
+        import joblib
+        from scipy import sparse
+
+        event_ids = np.fromiter(Event.objects.order_by('pk').values_list('pk', flat=True), dtype=np.int64)
+        columns = {pk: i for i, pk in enumerate(event_ids.tolist())}
+
+        user_rows = {}
+        rows, cols = [], []
+        for user_id, event_id in Registration.objects.values_list('user_id', 'event_id').iterator(chunk_size=5000):
+            col = columns.get(event_id)
+            if col is not None:
+                rows.append(user_rows.setdefault(user_id, len(user_rows)))
+                cols.append(col)
+
+        n_events = len(event_ids)
+        registrations = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(user_rows), n_events),
+        )
+
+        # Co-registration counts, cosine-normalised by each event's popularity
+        co = (registrations.T @ registrations).tocsr()
+        popularity = np.sqrt(co.diagonal())
+        popularity[popularity == 0] = 1
+        co.setdiag(0)
+        co.eliminate_zeros()
+        scale = sparse.diags(1 / popularity)
+        similarity = (scale @ co @ scale).tocsr().astype(np.float32)
+        similarity = _keep_top_neighbours(similarity, max_neighbours)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            'event_ids': event_ids,
+            'data': similarity.data,
+            'indices': similarity.indices.astype(np.int32),
+            'indptr': similarity.indptr.astype(np.int64),
+            'shape': similarity.shape,
+        }
+        tmp = self.path.with_suffix('.tmp')
+        joblib.dump(payload, tmp)
+        os.replace(tmp, self.path)
+        self.reset()
+        return similarity
+
+    def load(self):
+        """Memory-map the persisted matrix; returns False if there is none."""
+        with self._lock:
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._mtime = self.matrix = self.event_ids = None
+                return False
+            if mtime != self._mtime:
+                import joblib
+                from scipy import sparse
+
+                payload = joblib.load(self.path, mmap_mode='r')
+                self.matrix = sparse.csr_matrix(
+                    (payload['data'], payload['indices'], payload['indptr']),
+                    shape=payload['shape'],
+                    copy=False,
+                )
+                self.event_ids = payload['event_ids']
+                self._mtime = mtime
+            return True
+
+    def user_scores(self, registered_event_ids):
+        """
+        Summed similarity to the given events, scaled to [0, 1].
+
+        Returns (event_ids, scores) or None when no matrix has been built.
+        """
+        if not self.load():
+            return None
+        matrix, event_ids = self.matrix, self.event_ids
+        if not len(event_ids):
+            return event_ids, np.zeros(0)
+        slots = np.searchsorted(event_ids, registered_event_ids).clip(max=len(event_ids) - 1)
+        slots = slots[event_ids[slots] == registered_event_ids]
+        if not len(slots):
+            return event_ids, np.zeros(len(event_ids))
+        scores = np.asarray(matrix[slots].sum(axis=0)).ravel()
+        peak = scores.max()
+        return event_ids, scores / peak if peak > 0 else scores
+
+
+def _keep_top_neighbours(matrix, limit):
+    """Drop all but the ``limit`` strongest similarities in each row."""
+    if not limit:
+        return matrix
+    lengths = np.diff(matrix.indptr)
+    for row in np.flatnonzero(lengths > limit):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        values = matrix.data[start:end]
+        cutoff = np.partition(values, -limit)[-limit]
+        values[values < cutoff] = 0
+    matrix.eliminate_zeros()
+    return matrix
+
+
+recommendation_index = RecommendationIndex()
+item_similarity = ItemSimilarity()
+
+
+# Candidates asked of the live index per recommendation shown. The index
+# already skips past and full events, but seats taken through another
+# worker only reach it on its next rebuild, so some may still be dropped
+LIVE_CANDIDATES_PER_PICK = 4
+
+
+def get_recommendations(user, limit=3):
+    """
+    Up to ``limit`` upcoming events with seats left for ``user``.
+
+    Precomputed rows win; the live index tops up users the batch job has
+    not seen yet, and those whose stored picks have since passed, filled
+    up or changed category.
+    """
+    now = timezone.now()
+    picks = [
+        rec.event
+        for rec in Recommendation.objects.filter(
+            user=user,
+            event__date__gte=now,
+            event__registered_seats__lt=F('event__capacity'),
+        )
+        .select_related('event')
+        .order_by('rank')[:limit]
+    ]
+    if len(picks) >= limit:
+        return picks
+
+    event_ids = recommendation_index.top_event_ids(user.pk, limit * LIVE_CANDIDATES_PER_PICK)
+    if not event_ids:
+        return picks
+
+    events = Event.objects.filter(date__gte=now, registered_seats__lt=F('capacity')).in_bulk(event_ids)
+    chosen = {event.pk for event in picks}
+    for pk in event_ids:
+        if len(picks) == limit:
+            break
+        if pk in events and pk not in chosen:
+            picks.append(events[pk])
+    return picks
+
+
+# Batch precompute (manage.py precompute_recommendations)
+
+def _top_k_chunk(weights, registered, event_categories, open_events, k):
+    """
+    Top-k event positions and scores for a block of users.
+
+    ``weights`` is a dense (users x categories) idf-weighted count matrix,
+    ``registered`` a sparse (users x events) mask of existing registrations
+    and ``open_events`` marks events that have not started and have seats
+    left. Orders events exactly like RecommendationIndex.top_event_ids.
+    """
+    from scipy import sparse
+
+    n_users, n_categories = weights.shape
+    n_events = len(event_categories)
+
+    # Competition rank of each category per user: equal weights share a rank
+    category_rank = (weights[:, None, :] > weights[:, :, None]).sum(axis=2)
+
+    # (users x categories) @ (categories x events) gives every event its
+    # category's rank for each user
+    onehot = sparse.csr_matrix(
+        (np.ones(n_events), (event_categories, np.arange(n_events))),
+        shape=(n_categories, n_events),
+    )
+    keys = (onehot.T @ category_rank.T).T.astype(np.int64) * n_events + np.arange(n_events)
+    keys[:, ~open_events] = EXCLUDED
+    rows, cols = registered.nonzero()
+    keys[rows, cols] = EXCLUDED
+
+    k = min(k, n_events)
+    top = np.argpartition(keys, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(top, np.argsort(np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+    valid = np.take_along_axis(keys, top, axis=1) != EXCLUDED
+
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    scores = np.take_along_axis(weights / norms, event_categories[top], axis=1)
+    return top, scores, valid
+
+
+def _top_k_chunk_star(args):
+    return _top_k_chunk(*args)
+
+
+# Recommendation rows per INSERT
+PRECOMPUTE_BATCH_SIZE = 5000
+
+
+def precompute_recommendations(k=10, chunk_size=500, workers=1):
+    """
+    Recompute the Recommendation table for every user with registrations.
+
+    Reads all registrations in one streaming query, builds the user x
+    category matrix with SciPy and scores users in chunks (optionally in a
+    process pool). Returns (users, rows written).
+    """
+    from scipy import sparse
+
+    now = timezone.now()
+    rows = list(
+        Event.objects.order_by('pk').values_list('pk', 'category', 'date', 'capacity', 'registered_seats')
+    )
+    if not rows:
+        return 0, 0
+    event_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    event_categories = np.fromiter(
+        (CATEGORY_INDEX.get(row[1], UNKNOWN) for row in rows),
+        dtype=np.int64,
+        count=len(rows),
+    )
+    open_events = np.fromiter(
+        (date >= now and registered_seats < capacity for _, _, date, capacity, registered_seats in rows),
+        dtype=bool,
+        count=len(rows),
+    )
+    positions = {pk: i for i, pk in enumerate(event_ids.tolist())}
+
+    user_rows = {}
+    reg_users = []
+    reg_events = []
+    for user_id, event_id in Registration.objects.values_list('user_id', 'event_id').iterator(chunk_size=5000):
+        position = positions.get(event_id)
+        if position is None:  # event created after the snapshot above
+            continue
+        reg_users.append(user_rows.setdefault(user_id, len(user_rows)))
+        reg_events.append(position)
+    if not user_rows:
+        return 0, 0
+
+    n_users, n_events = len(user_rows), len(event_ids)
+    registered = sparse.csr_matrix(
+        (np.ones(len(reg_users), dtype=np.int8), (reg_users, reg_events)),
+        shape=(n_users, n_events),
+    )
+    registered.sum_duplicates()
+
+    # users x categories counts, weighted by the same smoothed idf as the index
+    counts = sparse.csr_matrix(
+        (np.ones(len(reg_users)), (reg_users, event_categories[reg_events])),
+        shape=(n_users, UNKNOWN + 1),
+    )
+    category_sizes = np.bincount(event_categories, minlength=UNKNOWN + 1)
+    idf = np.log((1 + n_events) / (1 + category_sizes)) + 1
+    idf[UNKNOWN] = 0
+    weights = (counts @ sparse.diags(idf)).toarray()
+
+    chunks = [
+        (
+            weights[start:start + chunk_size],
+            registered[start:start + chunk_size],
+            event_categories,
+            open_events,
+            k,
+        )
+        for start in range(0, n_users, chunk_size)
+    ]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_top_k_chunk_star, chunks))
+    else:
+        results = [_top_k_chunk(*chunk) for chunk in chunks]
+
+    user_ids = np.fromiter(user_rows, dtype=np.int64, count=n_users)
+    recommendations = []
+    for offset, (top, scores, valid) in zip(range(0, n_users, chunk_size), results):
+        for row in range(top.shape[0]):
+            user_id = int(user_ids[offset + row])
+            picks = event_ids[top[row][valid[row]]].tolist()
+            for rank, (event_id, score) in enumerate(zip(picks, scores[row][valid[row]].tolist()), start=1):
+                recommendations.append(
+                    Recommendation(user_id=user_id, event_id=event_id, rank=rank, score=score)
+                )
+
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        Recommendation.objects.bulk_create(recommendations, batch_size=PRECOMPUTE_BATCH_SIZE)
+
+    return n_users, len(recommendations)
@@ -0,0 +1,105 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CategoryRollup, DailyRollup, Event, EventRollup
+
+
+def _bump(model, lookup, **deltas):
+    """Add ``deltas`` to the rollup row matching ``lookup``, creating it if needed."""
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        # Nothing to take away from (e.g. the row went with a deleted event)
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(**lookup).update(**changes)
+
+
+def _bump_category(event_id, category, **deltas):
+    """
+    _bump the CategoryRollup of ``event_id``'s category. Pass None for
+    ``category`` when it isn't loaded: the UPDATE then looks it up itself.
+    """
+    if category is not None:
+        _bump(CategoryRollup, {'category': category}, **deltas)
+        return
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes:
+        # Every category with an event has a row (see refresh_event_counts)
+        category = Event.objects.filter(pk=event_id).values('category')[:1]
+        CategoryRollup.objects.filter(category=Subquery(category)).update(**changes)
+
+
+def record_registration(event_id, category=None, delta=1, attended=0):
+    """Count a registration created (delta=1) or removed (delta=-1)."""
+    _bump_category(event_id, category, registrations=delta, attended=attended)
+    _bump(EventRollup, {'event_id': event_id}, registrations=delta, attended=attended)
+    if delta > 0:
+        _bump(DailyRollup, {'day': timezone.localdate()}, registrations=delta)
+
+
+def record_attendance(event_id, category=None, delta=1):
+    """Count check-ins (or, with a negative delta, revoked ones)."""
+    _bump_category(event_id, category, attended=delta)
+    _bump(EventRollup, {'event_id': event_id}, attended=delta)
+    if delta > 0:
+        _bump(DailyRollup, {'day': timezone.localdate()}, attended=delta)
+
+
+def record_event_attendance(counts):
+    """record_attendance for {event_id: check-ins}, when only event ids are known."""
+    for event_id, count in counts.items():
+        record_attendance(event_id, delta=count)
+
+
+def refresh_event_counts():
+    """
+    Recount each category's row from its events and their EventRollups.
+
+    Events are created, edited and deleted rarely (by admins), and an edit
+    can move an event, with its registrations and check-ins, between
+    categories, so a GROUP BY is simpler and cheaper to get right than
+    tracking each transition. The read and the writes share one
+    transaction, which the database opens with BEGIN IMMEDIATE, so no
+    registration can be counted between them and then overwritten.
+    """
+    with transaction.atomic():
+        totals = {
+            row.pop('category'): row
+            for row in Event.objects.values('category').annotate(
+                events=Count('pk'),
+                registrations=Coalesce(Sum('rollup__registrations'), 0),
+                attended=Coalesce(Sum('rollup__attended'), 0),
+            )
+        }
+        # Categories left with no events are zeroed, not skipped
+        known = [value for value, _ in Event.CATEGORY_CHOICES]
+        known += CategoryRollup.objects.values_list('category', flat=True)
+        for category in known:
+            totals.setdefault(category, {'events': 0, 'registrations': 0, 'attended': 0})
+        for category, counts in totals.items():
+            CategoryRollup.objects.update_or_create(category=category, defaults=counts)
+
+
+def category_summary():
+    """Rollup totals per category, in CATEGORY_CHOICES order."""
+    order = {value: i for i, (value, _) in enumerate(Event.CATEGORY_CHOICES)}
+    rollups = sorted(CategoryRollup.objects.all(), key=lambda r: order.get(r.category, len(order)))
+    return [
+        {
+            'category': r.category,
+            'events': r.events,
+            'registrations': r.registrations,
+            'attended': r.attended,
+        }
+        for r in rollups
+    ]
@@ -0,0 +1,70 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Event
+
+
+# Most results a search returns, best first
+SEARCH_RESULTS_LIMIT = 200
+
+# bm25() column weights, in index order: title, description, venue, category
+BM25_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def match_expression(query):
+    """
+    FTS5 MATCH expression for free text: every word must occur, each as a
+    prefix ("robo" finds "robotics"). Quoting keeps user input from being
+    read as FTS syntax. Returns None when there are no words.
+    """
+    tokens = TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_event_ids(query, category=None, limit=SEARCH_RESULTS_LIMIT):
+    """
+    Ids of events matching ``query`` over title, description, venue and
+    category, best match first (BM25 on SQLite's FTS5 index, see migration
+    0014; other databases fall back to unranked LIKE matching).
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+
+    if connection.vendor != 'sqlite':
+        events = Event.objects.all()
+        for token in TOKEN_RE.findall(query):
+            events = events.filter(
+                Q(title__icontains=token) | Q(description__icontains=token)
+                | Q(venue__icontains=token) | Q(category__icontains=token)
+            )
+        if category:
+            events = events.filter(category=category)
+        return list(events.order_by('date').values_list('pk', flat=True)[:limit])
+
+    if category:
+        expression = f'({expression}) AND category : "{category.replace(chr(34), "")}"'
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT rowid FROM events_event_fts WHERE events_event_fts MATCH %s '
+            f'ORDER BY bm25(events_event_fts, {weights}) LIMIT %s',
+            [expression, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_events(events, query, category=None):
+    """Narrow the ``events`` queryset to matches for ``query``, ranked."""
+    ids = search_event_ids(query, category)
+    ranking = Case(
+        *(When(pk=pk, then=Value(rank)) for rank, pk in enumerate(ids)),
+        output_field=IntegerField(),
+    )
+    return events.filter(pk__in=ids).order_by(ranking) if ids else events.none()
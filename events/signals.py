@@ -1,10 +1,127 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import UserProfile
+from django.db import transaction
+from .booking import promote_waitlist, release_seat
+from .chatbot import invalidate_facts
+from .models import Event, Recommendation, Registration, UserProfile
+from .pagecache import invalidate_catalogue
+from .recommendation import recommendation_index
+from .rollups import record_registration, refresh_event_counts
 
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        UserProfile.objects.create(user=instance, interests="")
\ No newline at end of file
+        UserProfile.objects.create(user=instance, interests="")
+
+
+@receiver(post_delete, sender=Registration)
+def release_registration_seat(sender, instance, **kwargs):
+    release_seat(instance.event_id)
+    # Hand the seat to the waitlist once the delete is durable
+    transaction.on_commit(lambda: promote_waitlist(instance.event_id))
+
+
+@receiver(post_save, sender=Event)
+def index_event(sender, instance, **kwargs):
+    recommendation_index.event_saved(instance)
+
+
+@receiver(post_delete, sender=Event)
+def unindex_event(sender, instance, **kwargs):
+    recommendation_index.event_deleted(instance.pk)
+
+
+@receiver(post_save, sender=Registration)
+def index_registration(sender, instance, **kwargs):
+    recommendation_index.registration_saved(instance.user_id, instance.event_id)
+
+
+@receiver(pre_save, sender=Event)
+def remember_stored_event(sender, instance, **kwargs):
+    # What the row held before this save, for the post_save receivers
+    stored = None
+    if instance.pk:
+        stored = Event.objects.filter(pk=instance.pk).values('category', 'capacity').first()
+    instance._stored = stored or {}
+
+
+@receiver(post_save, sender=Event)
+def drop_recategorised_recommendations(sender, instance, created, **kwargs):
+    # Precomputed picks were scored on the old category
+    stored = getattr(instance, '_stored', {})
+    if not created and stored.get('category', instance.category) != instance.category:
+        Recommendation.objects.filter(event=instance).delete()
+
+
+@receiver(post_save, sender=Event)
+def promote_on_added_capacity(sender, instance, created, **kwargs):
+    stored = getattr(instance, '_stored', {})
+    if not created and instance.capacity > stored.get('capacity', instance.capacity):
+        # Seats are free now, as when a registration is deleted
+        event_id = instance.pk
+        transaction.on_commit(lambda: promote_waitlist(event_id))
+
+
+@receiver(post_save, sender=Registration)
+def drop_fulfilled_recommendation(sender, instance, created, **kwargs):
+    if created:
+        Recommendation.objects.filter(user_id=instance.user_id, event_id=instance.event_id).delete()
+
+
+@receiver(post_delete, sender=Registration)
+def unindex_registration(sender, instance, **kwargs):
+    recommendation_index.registration_deleted(instance.user_id, instance.event_id)
+
+
+def _loaded_category(registration):
+    # The booking path attaches the event. A cascade from an event delete
+    # doesn't, and reading it would cost a query per registration, so the
+    # rollup UPDATE looks the category up instead.
+    if Registration.event.is_cached(registration):
+        return registration.event.category
+    return None
+
+
+@receiver(post_save, sender=Registration)
+def count_registration(sender, instance, created, **kwargs):
+    if created:
+        record_registration(instance.event_id, _loaded_category(instance))
+
+
+@receiver(post_delete, sender=Registration)
+def uncount_registration(sender, instance, **kwargs):
+    record_registration(
+        instance.event_id,
+        _loaded_category(instance),
+        delta=-1,
+        attended=-1 if instance.attended else 0,
+    )
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def count_events(sender, **kwargs):
+    refresh_event_counts()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def refresh_chatbot_facts(sender, **kwargs):
+    # After commit, so a concurrent reply can't re-cache the old facts
+    transaction.on_commit(invalidate_facts)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def refresh_catalogue_for_event(sender, instance, **kwargs):
+    event_id = instance.pk
+    transaction.on_commit(lambda: invalidate_catalogue(event_id))
+
+
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+def refresh_catalogue_for_registration(sender, **kwargs):
+    # Seat counts are part of each card's key, so only the pages move on
+    transaction.on_commit(invalidate_catalogue)
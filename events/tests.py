@@ -1,3 +1,1644 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, close_old_connections, connection
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from config.cache import cache_backends
+from config.database import (
+    PIN_COOKIE, REPLICA, ReplicaMiddleware, ReplicaRouter, RequestState, _request_state,
+)
+from .admission import LocalAdmissionBackend, reset_admission_backend
+from .chatbot import match_intent, normalize
+from .checkin import (
+    ALREADY_VERIFIED, EXPIRED, INVALID, NOT_FOUND, VERIFIED, WRONG_EVENT,
+    build_manifest, check_in, manifest_contains, sync_scans,
+)
+from .caching import CacheNamespace, cache_stats, reset_cache_stats
+from .booking import DUPLICATE, FULL, REGISTERED, join_waitlist, promote_waitlist, reserve_seat
+from .mail import deliver_batch, queue_mail
+from .search import search_event_ids
+from .passes import ExpiredPass, InvalidPass, pass_expiry, pass_payload, read_pass, sign_pass
+from . import qr as qr_module
+from .qr import qr_images
+from .models import (
+    CategoryRollup, DailyRollup, EmailOutbox, Event, EventRollup, Recommendation,
+    Registration, WaitlistEntry,
+)
+from .recommendation import get_recommendations, item_similarity, recommendation_index
+from .catalogue import catalogue, event_cards, keyset_page
+from .instrumentation import QueryBudgetExceeded
+from . import views
+from .views import _delta_window, _export_queryset, home, register_event
+
+
+def make_event(**kwargs):
+    defaults = {
+        'title': 'Tech Talk',
+        'description': 'An evening of talks.',
+        'date': timezone.now() + timedelta(days=7),
+        'venue': 'Main Auditorium',
+        'category': 'seminar',
+        'capacity': 100,
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+def make_student(username, **profile):
+    user = User.objects.create_user(username=username)
+    defaults = {
+        'college_email': f'{username}@mvgrce.edu.in',
+        'registration_number': f'REG-{username}',
+        'branch': 'CSE',
+        'department': 'Engineering',
+        'year_of_study': 2,
+    }
+    defaults.update(profile)
+    for field, value in defaults.items():
+        setattr(user.userprofile, field, value)
+    user.userprofile.save()
+    return user
+
+
+class ScratchCacheMixin:
+    """Give each test an empty file cache of its own, never var/cache."""
+
+    def setUp(self):
+        super().setUp()
+        scratch = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(CACHES=cache_backends(directory=Path(scratch) / 'cache')))
+
+
+class EventsTestCase(ScratchCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # The recommendation index lives in-process and outlives each
+        # test's rolled-back transaction
+        recommendation_index.reset()
+        item_similarity.reset()
+        reset_admission_backend()
+        scratch = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(
+            RECOMMENDATION_SIMILARITY_PATH=Path(scratch) / 'similarity.joblib',
+            QR_CACHE_DIR=Path(scratch) / 'qr',
+            QUERY_BUDGET_STRICT=True,
+        ))
+        qr_images.reset()
+
+
+class SeatReservationTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(capacity=2)
+        self.alice = make_student('alice')
+        self.bob = make_student('bob')
+        self.carol = make_student('carol')
+
+    def test_reserve_increments_counter(self):
+        self.assertEqual(reserve_seat(self.alice, self.event), REGISTERED)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_seats, 1)
+        self.assertEqual(self.event.seats_left(), 1)
+
+    def test_duplicate_rolls_back_counter(self):
+        reserve_seat(self.alice, self.event)
+        self.assertEqual(reserve_seat(self.alice, self.event), DUPLICATE)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_seats, 1)
+        self.assertEqual(Registration.objects.filter(event=self.event).count(), 1)
+
+    def test_full_event_rejects(self):
+        reserve_seat(self.alice, self.event)
+        reserve_seat(self.bob, self.event)
+        self.assertEqual(reserve_seat(self.carol, self.event), FULL)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_seats, 2)
+
+    def test_delete_releases_seat(self):
+        reserve_seat(self.alice, self.event)
+        Registration.objects.get(user=self.alice).delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_seats, 0)
+
+    def test_register_view(self):
+        self.client.force_login(self.alice)
+        response = self.client.get(f'/register/{self.event.id}/')
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertTrue(Registration.objects.filter(user=self.alice, event=self.event).exists())
+
+        # Second attempt is a duplicate and must not consume a seat
+        self.client.get(f'/register/{self.event.id}/')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_seats, 1)
+
+
+class RegistrationStampedeTests(ScratchCacheMixin, TransactionTestCase):
+    """Many threads race for the last seats of a popular event."""
+
+    capacity = 5
+    students = 25
+
+    def test_no_overbooking(self):
+        event = make_event(capacity=self.capacity)
+        users = [make_student(f'student{i}') for i in range(self.students)]
+        results = []
+        barrier = threading.Barrier(len(users))
+
+        def attempt(user):
+            barrier.wait()
+            try:
+                # Retry lock timeouts the same way a browser user would
+                for _ in range(50):
+                    try:
+                        results.append(reserve_seat(user, event))
+                        return
+                    except OperationalError:
+                        time.sleep(0.01)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        event.refresh_from_db()
+        self.assertEqual(len(results), self.students)
+        self.assertEqual(results.count(REGISTERED), self.capacity)
+        self.assertEqual(event.registered_seats, self.capacity)
+        self.assertEqual(Registration.objects.filter(event=event).count(), self.capacity)
+
+
+class HomeQueryCountTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student('dave')
+
+    def count_home_queries(self):
+        # Warm up session/auth lookups so only the page's own queries vary,
+        # then drop the cached page so they are all run
+        self.client.get('/')
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def add_events(self, count):
+        for i in range(count):
+            event = make_event(title=f'Event {i}', category='workshop', capacity=50)
+            reserve_seat(make_student(f'user-{event.pk}'), event)
+
+    def test_anonymous_query_count_is_constant(self):
+        self.add_events(2)
+        baseline = self.count_home_queries()
+        self.add_events(20)
+        self.assertEqual(self.count_home_queries(), baseline)
+
+    def test_authenticated_query_count_is_constant(self):
+        seminar = make_event(category='seminar')
+        reserve_seat(self.student, seminar)
+        self.client.force_login(self.student)
+
+        self.add_events(2)
+        baseline = self.count_home_queries()
+        self.add_events(20)
+        self.assertEqual(self.count_home_queries(), baseline)
+
+    def test_totals(self):
+        self.add_events(3)
+        response = self.client.get('/')
+        self.assertEqual(response.context['total_events'], 3)
+        self.assertEqual(response.context['total_capacity'], 150)
+        self.assertEqual(response.context['total_registered'], 3)
+
+
+class RecommendationIndexTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student('erin')
+        self.events = [
+            make_event(title='Robotics Workshop', category='workshop'),
+            make_event(title='AI Seminar', category='seminar'),
+            make_event(title='Dance Night', category='cultural'),
+            make_event(title='Cricket Cup', category='sports'),
+            make_event(title='Web Workshop', category='workshop'),
+            make_event(title='Cloud Seminar', category='seminar'),
+        ]
+
+    def legacy_ranking(self):
+        """The TF-IDF ranking the index replaced, for parity checks."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        events = list(Event.objects.order_by('pk'))
+        vectorizer = TfidfVectorizer()
+        event_vectors = vectorizer.fit_transform([e.category for e in events])
+        registered = [r.event for r in Registration.objects.filter(user=self.student)]
+        user_vector = vectorizer.transform([' '.join(e.category for e in registered)])
+        scores = list(enumerate(cosine_similarity(user_vector, event_vectors)[0]))
+        scores.sort(key=lambda x: x[1], reverse=True)
+        return [events[i].pk for i, _ in scores if events[i] not in registered]
+
+    def test_no_registrations(self):
+        self.assertEqual(get_recommendations(self.student), [])
+
+    def test_matches_tfidf_ranking(self):
+        reserve_seat(self.student, self.events[0])
+        reserve_seat(self.student, self.events[1])
+        reserve_seat(self.student, self.events[4])
+        expected = self.legacy_ranking()
+        self.assertEqual(recommendation_index.top_event_ids(self.student.pk, 10), expected)
+        self.assertEqual(
+            [e.pk for e in get_recommendations(self.student)], expected[:3]
+        )
+
+    def test_incremental_updates(self):
+        reserve_seat(self.student, self.events[2])
+        self.assertEqual(get_recommendations(self.student)[0].title, 'Robotics Workshop')
+
+        # New events and registrations are picked up without a rebuild
+        fest = make_event(title='Music Fest', category='cultural')
+        self.assertEqual(recommendation_index.top_event_ids(self.student.pk, 1), [fest.pk])
+        reserve_seat(self.student, fest)
+        self.assertNotIn(fest.pk, recommendation_index.top_event_ids(self.student.pk, 10))
+
+        Registration.objects.filter(user=self.student).delete()
+        self.assertEqual(get_recommendations(self.student), [])
+
+    def test_deleted_event_is_dropped(self):
+        reserve_seat(self.student, self.events[0])
+        self.events[4].delete()
+        self.assertNotIn(self.events[4].pk, recommendation_index.top_event_ids(self.student.pk, 10))
+        self.assertEqual(recommendation_index.top_event_ids(self.student.pk, 10), self.legacy_ranking())
+
+    def test_past_and_full_events_are_ranked_out(self):
+        reserve_seat(self.student, self.events[1])
+        past = [
+            make_event(title=f'Old Seminar {i}', date=timezone.now() - timedelta(days=i + 1))
+            for i in range(20)
+        ]
+        full = make_event(title='Packed Seminar', capacity=1)
+        reserve_seat(make_student('frank'), full)
+        upcoming = [make_event(title=f'New Seminar {i}') for i in range(3)]
+
+        ranked = recommendation_index.top_event_ids(self.student.pk, 3)
+        self.assertEqual(ranked, [self.events[5].pk, upcoming[0].pk, upcoming[1].pk])
+        self.assertFalse({event.pk for event in past + [full]} & set(
+            recommendation_index.top_event_ids(self.student.pk, 50)
+        ))
+        self.assertEqual(get_recommendations(self.student), [self.events[5], upcoming[0], upcoming[1]])
+
+
+class PrecomputeRecommendationsTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        categories = ['workshop', 'seminar', 'cultural', 'sports']
+        self.events = [
+            make_event(title=f'Event {i}', category=categories[i % 4]) for i in range(12)
+        ]
+        self.students = [make_student(f'student{i}') for i in range(5)]
+        for i, student in enumerate(self.students):
+            for event in self.events[i:i + 1 + i % 3]:
+                reserve_seat(student, event)
+        self.lonely = make_student('lonely')
+
+    def test_matches_live_index(self):
+        call_command('precompute_recommendations', '--top-k', '4', '--chunk-size', '2', stdout=io.StringIO())
+
+        for student in self.students:
+            stored = list(
+                Recommendation.objects.filter(user=student).values_list('event_id', flat=True)
+            )
+            self.assertEqual(stored, recommendation_index.top_event_ids(student.pk, 4))
+        self.assertFalse(Recommendation.objects.filter(user=self.lonely).exists())
+
+    def test_reads_with_one_query(self):
+        call_command('precompute_recommendations', stdout=io.StringIO())
+        student = self.students[0]
+        expected = recommendation_index.top_event_ids(student.pk, 3)
+        with self.assertNumQueries(1):
+            recommended = get_recommendations(student)
+        self.assertEqual([e.pk for e in recommended], expected)
+
+    def test_registering_drops_recommendation(self):
+        call_command('precompute_recommendations', stdout=io.StringIO())
+        student = self.students[0]
+        first = get_recommendations(student)[0]
+        reserve_seat(student, first)
+        self.assertNotIn(first, get_recommendations(student))
+
+    def test_stale_picks_are_skipped(self):
+        call_command('precompute_recommendations', stdout=io.StringIO())
+        student = self.students[0]
+        past, full, moved = get_recommendations(student)
+        Event.objects.filter(pk=past.pk).update(date=timezone.now() - timedelta(days=1))
+        Event.objects.filter(pk=full.pk).update(registered_seats=F('capacity'))
+        moved.category = 'sports' if moved.category != 'sports' else 'seminar'
+        moved.save()
+        self.assertFalse(Recommendation.objects.filter(event=moved).exists())
+
+        recommended = get_recommendations(student)
+        self.assertEqual(len(recommended), 3)
+        self.assertFalse({past, full} & set(recommended))
+
+    def test_skips_past_and_full_events(self):
+        student = self.students[0]
+        Event.objects.filter(pk=self.events[4].pk).update(date=timezone.now() - timedelta(days=1))
+        Event.objects.filter(pk=self.events[8].pk).update(registered_seats=F('capacity'))
+        call_command('precompute_recommendations', stdout=io.StringIO())
+
+        stored = set(Recommendation.objects.filter(user=student).values_list('event_id', flat=True))
+        closed = {self.events[4].pk, self.events[8].pk}
+        self.assertEqual(stored, {event.pk for event in self.events[1:]} - closed)
+
+
+class ItemSimilarityTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hackathon = make_event(title='Hackathon', category='workshop')
+        self.robotics = make_event(title='Robotics', category='workshop')
+        self.quiz = make_event(title='Tech Quiz', category='cultural')
+        self.dance = make_event(title='Dance Night', category='cultural')
+
+        # Hackathon regulars also turn up for the tech quiz
+        for i in range(3):
+            fan = make_student(f'fan{i}')
+            reserve_seat(fan, self.hackathon)
+            reserve_seat(fan, self.quiz)
+        self.student = make_student('newcomer')
+        reserve_seat(self.student, self.hackathon)
+
+    @override_settings(RECOMMENDATION_CF_WEIGHT=0.7)
+    def test_blends_co_registrations(self):
+        # Category signal alone prefers the other workshop
+        self.assertEqual(recommendation_index.top_event_ids(self.student.pk, 1), [self.robotics.pk])
+
+        call_command('build_similarity', stdout=io.StringIO())
+        self.assertTrue(item_similarity.path.exists())
+        ranked = recommendation_index.top_event_ids(self.student.pk, 3)
+        self.assertEqual(ranked[0], self.quiz.pk)
+        self.assertNotIn(self.hackathon.pk, ranked)
+
+    def test_similarity_is_symmetric_and_persisted(self):
+        matrix = item_similarity.build()
+        item_similarity.reset()
+        self.assertTrue(item_similarity.load())
+        dense = item_similarity.matrix.toarray()
+        self.assertTrue((dense == dense.T).all())
+        self.assertEqual(dense.diagonal().sum(), 0)
+        self.assertEqual(matrix.nnz, item_similarity.matrix.nnz)
+
+    @override_settings(RECOMMENDATION_CF_WEIGHT=0)
+    def test_weight_zero_disables_blend(self):
+        item_similarity.build()
+        self.assertEqual(recommendation_index.top_event_ids(self.student.pk, 1), [self.robotics.pk])
+
+
+class FlakyBackend(LocmemBackend):
+    """Locmem backend that rejects one address, to exercise retries."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'bounce@mvgrce.edu.in' in message.to:
+                raise ConnectionError('mailbox unavailable')
+        return super().send_messages(messages)
+
+
+class EmailOutboxTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event()
+        self.student = make_student('frank')
+        self.student.email = 'frank@mvgrce.edu.in'
+        self.student.save()
+
+    def test_registration_only_enqueues(self):
+        self.client.force_login(self.student)
+        self.client.get(f'/register/{self.event.id}/')
+        self.assertEqual(len(mail.outbox), 0)
+        queued = EmailOutbox.objects.get()
+        self.assertEqual(queued.recipients, ['frank@mvgrce.edu.in'])
+        self.assertEqual(queued.status, EmailOutbox.PENDING)
+
+    def test_worker_drains_in_batches(self):
+        for i in range(5):
+            queue_mail(f'Notice {i}', 'Body', 'admin@college.com', [f's{i}@mvgrce.edu.in'])
+        out = io.StringIO()
+        call_command('send_outbox', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.SENT).count(), 5)
+        self.assertEqual(out.getvalue().count('batch:'), 3)
+        self.assertIn('msg/s', out.getvalue())
+
+    def test_batch_reuses_one_connection(self):
+        for i in range(3):
+            queue_mail('Notice', 'Body', 'admin@college.com', [f's{i}@mvgrce.edu.in'])
+        connection = LocmemBackend()
+        opened = []
+        connection.open = lambda: opened.append(True)
+        stats = deliver_batch(connection=connection)
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(len(opened), 1)
+
+    @override_settings(EMAIL_BACKEND='events.tests.FlakyBackend')
+    def test_failures_back_off_then_give_up(self):
+        queue_mail('Notice', 'Body', 'admin@college.com', ['bounce@mvgrce.edu.in'])
+        queue_mail('Notice', 'Body', 'admin@college.com', ['ok@mvgrce.edu.in'])
+
+        stats = deliver_batch(max_attempts=2)
+        self.assertEqual((stats['sent'], stats['retried']), (1, 1))
+        bounced = EmailOutbox.objects.get(recipients=['bounce@mvgrce.edu.in'])
+        self.assertEqual(bounced.status, EmailOutbox.PENDING)
+        self.assertGreater(bounced.next_attempt_at, timezone.now())
+        self.assertIn('mailbox unavailable', bounced.last_error)
+
+        # Not due yet, so nothing is claimed
+        self.assertEqual(deliver_batch()['claimed'], 0)
+
+        EmailOutbox.objects.filter(pk=bounced.pk).update(next_attempt_at=timezone.now())
+        stats = deliver_batch(max_attempts=2)
+        self.assertEqual(stats['failed'], 1)
+        bounced.refresh_from_db()
+        self.assertEqual(bounced.status, EmailOutbox.FAILED)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class AdmissionQueueTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.backend = LocalAdmissionBackend(rate=2, burst=2, ticket_ttl=60, clock=self.clock)
+
+    def test_admits_burst_then_queues_in_order(self):
+        tickets = [self.backend.enter(1, user_id) for user_id in range(5)]
+        self.assertEqual([t.admitted for t in tickets], [True, True, False, False, False])
+        self.assertEqual([t.position for t in tickets[2:]], [1, 2, 3])
+
+        # Half a second refills one token, which goes to the head of the line
+        self.clock.now += 0.5
+        self.assertFalse(self.backend.enter(1, 4).admitted)
+        self.assertTrue(self.backend.enter(1, 2).admitted)
+        self.assertEqual(self.backend.enter(1, 4).position, 2)
+
+    def test_events_have_separate_buckets(self):
+        for user_id in range(2):
+            self.backend.enter(1, user_id)
+        self.assertTrue(self.backend.enter(2, 99).admitted)
+
+    def test_abandoned_tickets_expire(self):
+        for user_id in range(3):
+            self.backend.enter(1, user_id)
+        self.clock.now += 61
+        self.assertEqual(self.backend.enter(1, 7).number, 4)
+        self.assertEqual(self.backend.enter(1, 7).position, 0)
+
+    @override_settings(ADMISSION_RATE=0.001, ADMISSION_BURST=1)
+    def test_view_shows_waiting_room(self):
+        event = make_event()
+        first, second = make_student('gina'), make_student('hank')
+        self.client.force_login(first)
+        self.client.get(f'/register/{event.id}/')
+        self.client.force_login(second)
+        response = self.client.get(f'/register/{event.id}/')
+        self.assertTemplateUsed(response, 'waiting_room.html')
+        self.assertEqual(response.context['ticket'].position, 1)
+        self.assertFalse(Registration.objects.filter(user=second).exists())
+
+
+class WaitlistTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(capacity=1)
+        self.holder = make_student('ivy')
+        reserve_seat(self.holder, self.event)
+
+    def test_full_event_joins_waitlist(self):
+        student = make_student('jack')
+        self.client.force_login(student)
+        self.client.get(f'/register/{self.event.id}/')
+        self.assertTrue(WaitlistEntry.objects.filter(user=student, event=self.event).exists())
+        self.assertEqual(join_waitlist(make_student('kate'), self.event), 2)
+
+    def test_freed_seat_promotes_first_in_line(self):
+        first, second = make_student('leo'), make_student('mia')
+        join_waitlist(first, self.event)
+        join_waitlist(second, self.event)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Registration.objects.get(user=self.holder).delete()
+
+        self.assertTrue(Registration.objects.filter(user=first, event=self.event).exists())
+        self.assertFalse(Registration.objects.filter(user=second, event=self.event).exists())
+        self.assertEqual(list(WaitlistEntry.objects.values_list('user', flat=True)), [second.pk])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_seats, 1)
+
+    def test_incomplete_profile_fills_details_before_waitlist(self):
+        student = make_student('nina', college_email=None, registration_number=None)
+        self.client.force_login(student)
+        response = self.client.get(f'/register/{self.event.id}/')
+        self.assertTemplateUsed(response, 'register_event_form.html')
+        self.assertFalse(WaitlistEntry.objects.filter(user=student).exists())
+
+        # Joined some other way: held until the profile is complete
+        join_waitlist(student, self.event)
+        with self.captureOnCommitCallbacks(execute=True):
+            Registration.objects.get(user=self.holder).delete()
+        self.assertFalse(Registration.objects.filter(user=student).exists())
+        self.assertTrue(WaitlistEntry.objects.filter(user=student).exists())
+
+        profile = student.userprofile
+        profile.college_email, profile.registration_number = 'nina@mvgrce.edu.in', 'REG-nina'
+        profile.save()
+        self.assertEqual(promote_waitlist(self.event.id), [student])
+
+    def test_added_capacity_promotes(self):
+        waiting = [make_student(name) for name in ('omar', 'pia')]
+        for student in waiting:
+            join_waitlist(student, self.event)
+        # Edited as the admin does, on a freshly loaded row
+        self.event.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.capacity = 5
+            self.event.save()
+        self.assertEqual(Registration.objects.filter(user__in=waiting).count(), 2)
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_seats, 3)
+
+    def test_promotion_skips_already_registered(self):
+        join_waitlist(self.holder, self.event)
+        Event.objects.filter(pk=self.event.pk).update(capacity=2)
+        self.assertEqual(promote_waitlist(self.event.id), [])
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+
+class ExportCsvTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.workshop = make_event(title='Workshop', category='workshop')
+        self.seminar = make_event(
+            title='Seminar', category='seminar', date=timezone.now() + timedelta(days=30)
+        )
+
+    def add_registrations(self, event, count, verified=False):
+        for i in range(count):
+            reserve_seat(make_student(f'{event.category}-{event.registered_seats + i}'), event)
+        if verified:
+            Registration.objects.filter(event=event).update(
+                attended=True, verified_at=timezone.now(), verified_by=self.staff
+            )
+
+    def export(self, query=''):
+        self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/export-csv/' + query)
+            body = b''.join(response.streaming_content).decode()
+        return response, list(csv.reader(io.StringIO(body))), len(ctx.captured_queries)
+
+    def test_exports_every_row(self):
+        self.add_registrations(self.workshop, 3, verified=True)
+        response, rows, _ = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][-2], 'staff')
+        self.assertEqual(rows[1][1], rows[1][0] + '@mvgrce.edu.in')
+
+    def test_query_count_is_bounded(self):
+        self.add_registrations(self.workshop, 2, verified=True)
+        _, rows, baseline = self.export()
+        self.add_registrations(self.seminar, 25, verified=True)
+        _, rows, queries = self.export()
+        self.assertEqual(len(rows), 28)
+        self.assertEqual(queries, baseline)
+
+    def test_filters(self):
+        self.add_registrations(self.workshop, 2)
+        self.add_registrations(self.seminar, 3)
+        self.assertEqual(len(self.export(f'?event={self.workshop.id}')[1]), 3)
+        self.assertEqual(len(self.export('?category=seminar')[1]), 4)
+        later = (timezone.now() + timedelta(days=20)).date().isoformat()
+        self.assertEqual(len(self.export(f'?from={later}')[1]), 4)
+        self.assertEqual(len(self.export(f'?to={later}')[1]), 3)
+
+    def test_bad_filter(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get('/export-csv/?from=yesterday').status_code, 400)
+
+    def test_students_are_refused(self):
+        self.client.force_login(make_student('nosy'))
+        self.assertEqual(self.client.get('/export-csv/').status_code, 403)
+
+
+class DeltaExportTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='registrar', is_staff=True)
+        self.client.force_login(self.staff)
+        self.event = make_event()
+
+    def pull(self, cursor, extra=''):
+        response = self.client.get(f'/export-csv/?since={cursor}{extra}')
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        if 'gzip' in extra:
+            body = gzip.decompress(body)
+        rows = list(csv.reader(io.StringIO(body.decode())))[1:]
+        return rows, response['X-Export-Cursor']
+
+    @mock.patch('events.views.DELTA_EXPORT_LAG', timedelta(0))
+    def test_only_new_and_changed_rows(self):
+        first = make_student('olga')
+        reserve_seat(first, self.event)
+
+        rows, cursor = self.pull(0)
+        self.assertEqual([r[0] for r in rows], ['olga'])
+
+        # Nothing changed since the cursor
+        rows, cursor = self.pull(cursor)
+        self.assertEqual(rows, [])
+
+        reserve_seat(make_student('pete'), self.event)
+        reg = Registration.objects.get(user=first)
+        reg.attended = True
+        reg.save()
+
+        rows, cursor = self.pull(cursor)
+        self.assertEqual(sorted(r[0] for r in rows), ['olga', 'pete'])
+        self.assertEqual(self.pull(cursor)[0], [])
+
+    def test_recent_writes_wait_for_next_pull(self):
+        reserve_seat(make_student('quinn'), self.event)
+        rows, _ = self.pull(0)
+        self.assertEqual(rows, [])
+
+    @mock.patch('events.views.DELTA_EXPORT_LAG', timedelta(0))
+    def test_gzip(self):
+        reserve_seat(make_student('rita'), self.event)
+        response = self.client.get('/export-csv/?since=0&gzip=1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        rows, _ = self.pull(0, '&gzip=1')
+        self.assertEqual(rows[0][0], 'rita')
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get('/export-csv/?since=yesterday').status_code, 400)
+        self.assertEqual(self.client.get('/export-csv/?since=-5').status_code, 400)
+        self.assertEqual(self.client.get(f'/export-csv/?since={10 ** 30}').status_code, 400)
+
+
+class AnalyticsRollupTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.workshop = make_event(title='Workshop', category='workshop')
+        self.seminar = make_event(title='Seminar', category='seminar')
+        self.student = make_student('asha')
+
+    def rollup(self, category):
+        return CategoryRollup.objects.get(category=category)
+
+    def test_rollups_follow_registrations(self):
+        reserve_seat(self.student, self.workshop)
+        reserve_seat(make_student('ravi'), self.workshop)
+
+        self.assertEqual(self.rollup('workshop').registrations, 2)
+        self.assertEqual(self.rollup('workshop').events, 1)
+        self.assertEqual(EventRollup.objects.get(event=self.workshop).registrations, 2)
+        self.assertEqual(DailyRollup.objects.get().registrations, 2)
+
+        self.client.force_login(self.staff)
+        reg = Registration.objects.get(user=self.student)
+        self.client.post('/verify-qr/', {'registration_id': str(reg.registration_id)})
+        self.client.post('/verify-qr/', {'registration_id': str(reg.registration_id)})
+        self.assertEqual(self.rollup('workshop').attended, 1)
+
+        reg.refresh_from_db()
+        reg.delete()
+        workshop = self.rollup('workshop')
+        self.assertEqual((workshop.registrations, workshop.attended), (1, 0))
+
+        self.workshop.delete()
+        self.assertEqual(self.rollup('workshop').events, 0)
+        self.assertFalse(EventRollup.objects.filter(event_id=self.workshop.pk).exists())
+
+    def test_event_delete_skips_per_registration_lookups(self):
+        for i in range(5):
+            reserve_seat(make_student(f'fan{i}'), self.workshop)
+        reserve_seat(self.student, self.seminar)
+        event = Event.objects.get(pk=self.workshop.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            event.delete()
+        lookups = [
+            q for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT') and 'FROM "events_event"' in q['sql']
+        ]
+        self.assertLessEqual(len(lookups), 1)
+        workshop, seminar = self.rollup('workshop'), self.rollup('seminar')
+        self.assertEqual((workshop.events, workshop.registrations), (0, 0))
+        self.assertEqual((seminar.events, seminar.registrations), (1, 1))
+
+    def test_recategorised_event_takes_its_totals(self):
+        reserve_seat(self.student, self.workshop)
+        reserve_seat(make_student('ravi'), self.workshop)
+        reg = Registration.objects.get(user=self.student)
+        check_in([str(reg.registration_id)], self.staff)
+
+        self.workshop.category = 'seminar'
+        self.workshop.save()
+        workshop, seminar = self.rollup('workshop'), self.rollup('seminar')
+        self.assertEqual((workshop.events, workshop.registrations, workshop.attended), (0, 0, 0))
+        self.assertEqual((seminar.events, seminar.registrations, seminar.attended), (2, 2, 1))
+
+    def test_dashboard_reads_rollups(self):
+        reserve_seat(self.student, self.seminar)
+        self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/analytics/')
+        scans = [q for q in ctx.captured_queries if '"events_registration"' in q['sql']]
+        self.assertEqual(scans, [])
+        self.assertEqual(response.context['total_events'], 2)
+        self.assertEqual(response.context['total_registrations'], 1)
+
+    def test_chart_renders_once_per_data(self):
+        self.client.force_login(self.staff)
+        with mock.patch('events.charts.render_category_chart', return_value=b'png') as render:
+            url = self.client.get('/analytics/').context['chart_digest']
+            for _ in range(3):
+                response = self.client.get(f'/analytics/chart/{url}.png')
+                self.assertEqual(response.content, b'png')
+            self.assertEqual(render.call_count, 1)
+            self.assertIn('immutable', response['Cache-Control'])
+
+            cached = self.client.get(
+                f'/analytics/chart/{url}.png', HTTP_IF_NONE_MATCH=response['ETag']
+            )
+            self.assertEqual(cached.status_code, 304)
+
+            make_event(title='Match', category='sports')
+            new_url = self.client.get('/analytics/').context['chart_digest']
+            self.assertNotEqual(new_url, url)
+            self.assertEqual(self.client.get(f'/analytics/chart/{url}.png').status_code, 404)
+            self.client.get(f'/analytics/chart/{new_url}.png')
+            self.assertEqual(render.call_count, 2)
+
+
+class LazyImportTests(ScratchCacheMixin, SimpleTestCase):
+    def test_startup_skips_heavy_libraries(self):
+        # A fresh interpreter, since this test process has already imported them
+        script = (
+            'import json, sys, django; django.setup(); import config.urls; '
+            'print(json.dumps(sorted(sys.modules)))'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=settings.BASE_DIR, check=True, capture_output=True, text=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings'},
+        ).stdout
+        loaded = {name.split('.')[0] for name in json.loads(output)}
+        for heavy in ('matplotlib', 'qrcode', 'PIL', 'scipy', 'sklearn', 'joblib'):
+            self.assertNotIn(heavy, loaded)
+
+
+class QRImageTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student('asha')
+        reserve_seat(self.student, make_event())
+        self.registration = Registration.objects.get(user=self.student)
+        self.url = f'/qr/{self.registration.registration_id}'
+        self.client.force_login(self.student)
+
+    def test_pass_page_links_image(self):
+        response = self.client.get(self.url + '/')
+        self.assertContains(response, f'src="{self.url}.png?v=')
+
+    def test_renders_once_then_revalidates(self):
+        with mock.patch('events.qr.render_qr', wraps=qr_module.render_qr) as render:
+            first = self.client.get(self.url + '.png')
+            second = self.client.get(self.url + '.png')
+            qr_images.reset()  # a fresh worker reads the disk copy
+            third = self.client.get(self.url + '.png')
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first['Content-Type'], 'image/png')
+        self.assertTrue(first.content.startswith(b'\x89PNG'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first.content, third.content)
+        self.assertIn('immutable', first['Cache-Control'])
+
+        revalidated = self.client.get(self.url + '.png', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+
+    def test_svg(self):
+        response = self.client.get(self.url + '.svg')
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', response.content)
+        self.assertNotEqual(response['ETag'], self.client.get(self.url + '.png')['ETag'])
+
+    def test_memory_cache_is_bounded(self):
+        with override_settings(QR_MEMORY_CACHE_SIZE=1):
+            self.client.get(self.url + '.png')
+            self.client.get(self.url + '.svg')
+        self.assertEqual(len(qr_images._images), 1)
+
+    def test_other_students_and_formats_are_refused(self):
+        self.client.force_login(make_student('ravi'))
+        self.assertEqual(self.client.get(self.url + '.png').status_code, 404)
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(self.url + '.gif').status_code, 404)
+
+
+class GeneratePassesTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event()
+        for name in ('asha', 'ravi', 'meena'):
+            reserve_seat(make_student(name), self.event)
+        reserve_seat(make_student('other'), make_event(title='Other'))
+        self.output = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'passes.zip'
+
+    def generate(self, *args):
+        out = io.StringIO()
+        call_command('generate_passes', '--event', str(self.event.pk), '--output', str(self.output), *args, stdout=out)
+        return out.getvalue()
+
+    def expected(self, fmt='png'):
+        return {
+            f'{reg.user.username}-{reg.registration_id}.{fmt}':
+                qr_images.get(pass_payload(reg), fmt)[1]
+            for reg in Registration.objects.filter(event=self.event).select_related('user', 'event')
+        }
+
+    def test_writes_one_pass_per_registration(self):
+        self.assertIn('Wrote 3 passes', self.generate('--batch-size', '2'))
+        with zipfile.ZipFile(self.output) as archive:
+            # Same bytes as the pass endpoint serves for each registration
+            self.assertEqual({name: archive.read(name) for name in archive.namelist()}, self.expected())
+
+    def test_process_pool(self):
+        self.generate('--workers', '2', '--batch-size', '1', '--format', 'svg')
+        with zipfile.ZipFile(self.output) as archive:
+            self.assertEqual({name: archive.read(name) for name in archive.namelist()}, self.expected('svg'))
+
+    def test_unknown_event(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_passes', '--event', '0', '--output', str(self.output))
+
+
+class CheckInTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.event = make_event(category='workshop')
+        for name in ('asha', 'ravi'):
+            reserve_seat(make_student(name), self.event)
+        self.asha, self.ravi = Registration.objects.order_by('user__username')
+        self.client.force_login(self.staff)
+
+    def post(self, scans):
+        return self.client.post('/api/check-in/', json.dumps({'scans': scans}), content_type='application/json')
+
+    def test_batch_statuses(self):
+        check_in([str(self.ravi.registration_id)], self.staff)
+        before = self.asha.updated_at
+        scans = [
+            f'PASS {self.asha.registration_id} ',
+            str(self.ravi.registration_id),
+            str(self.asha.registration_id).upper(),  # scanned twice in one batch
+            '00000000-0000-0000-0000-000000000000',
+            'not a pass',
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(scans)
+        results = response.json()['results']
+        self.assertEqual(
+            [r['status'] for r in results],
+            [VERIFIED, ALREADY_VERIFIED, ALREADY_VERIFIED, NOT_FOUND, NOT_FOUND],
+        )
+        self.assertEqual([r['scan'] for r in results], scans)
+        self.assertEqual(results[0]['username'], 'asha')
+        self.assertEqual(results[0]['event'], self.event.title)
+        # One UPDATE per pass plus a constant number of other queries
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "events_registration"')]
+        self.assertEqual(len(updates), 4)  # one per parseable scan, none per attendee
+        self.assertLessEqual(len(ctx.captured_queries), len(updates) + 8)
+
+        self.asha.refresh_from_db()
+        self.assertTrue(self.asha.attended)
+        self.assertEqual(self.asha.verified_by, self.staff)
+        self.assertGreater(self.asha.updated_at, before)
+        self.assertEqual(CategoryRollup.objects.get(category='workshop').attended, 2)
+
+    def test_html_form_shares_the_conditional_update(self):
+        for expected in (VERIFIED, ALREADY_VERIFIED):
+            response = self.client.post('/verify-qr/', {'registration_id': str(self.asha.registration_id)})
+            status = 'verified_success' if expected == VERIFIED else 'already_verified'
+            self.assertEqual(response.context['result']['status'], status)
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.client.post('/api/check-in/', 'nope', content_type='application/json').status_code, 400)
+        self.assertEqual(self.post('not a list').status_code, 400)
+        with mock.patch('events.views.CHECKIN_MAX_BATCH', 1):
+            self.assertEqual(self.post(['a', 'b']).status_code, 400)
+        self.assertEqual(self.client.get('/api/check-in/').status_code, 405)
+        self.client.force_login(User.objects.get(username='asha'))
+        self.assertEqual(self.post([str(self.asha.registration_id)]).status_code, 403)
+
+
+class CheckInRaceTests(ScratchCacheMixin, TransactionTestCase):
+    """Several scanners read the same pass at the same moment."""
+
+    def test_exactly_one_scanner_verifies(self):
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        reserve_seat(make_student('asha'), make_event())
+        scan = str(Registration.objects.get().registration_id)
+        statuses = []
+        barrier = threading.Barrier(8)
+
+        def scanner():
+            barrier.wait()
+            try:
+                for _ in range(50):
+                    try:
+                        [(status, _)] = check_in([scan], staff)
+                        statuses.append(status)
+                        return
+                    except OperationalError:
+                        time.sleep(0.01)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=scanner) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(statuses), 8)
+        self.assertEqual(statuses.count(VERIFIED), 1)
+        self.assertEqual(CategoryRollup.objects.get(category='seminar').attended, 1)
+
+
+class OfflineGateTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.other_staff = User.objects.create_user(username='gate2', is_staff=True)
+        self.event = make_event()
+        for name in ('asha', 'ravi', 'meena'):
+            reserve_seat(make_student(name), self.event)
+        reserve_seat(make_student('other'), make_event(title='Other'))
+        self.asha, self.ravi, self.meena = (
+            Registration.objects.get(event=self.event, user__username=name)
+            for name in ('asha', 'ravi', 'meena')
+        )
+        self.client.force_login(self.staff)
+
+    def sync(self, scans):
+        return self.client.post(
+            '/api/check-in/sync/',
+            json.dumps({'scans': [{'scan': scan, 'scanned_at': at.isoformat()} for scan, at in scans]}),
+            content_type='application/json',
+        )
+
+    def test_manifest(self):
+        response = self.client.get(f'/events/{self.event.pk}/manifest/')
+        manifest = response.content
+        self.assertEqual(len(manifest), 16 + 3 * 16 + 3 * 16)
+        for registration in Registration.objects.all():
+            self.assertEqual(
+                manifest_contains(manifest, registration.registration_id),
+                registration.event_id == self.event.pk,
+            )
+
+        cached = self.client.get(f'/events/{self.event.pk}/manifest/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        reserve_seat(make_student('late'), self.event)
+        fresh = self.client.get(f'/events/{self.event.pk}/manifest/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+
+        self.client.force_login(User.objects.get(username='asha'))
+        self.assertEqual(self.client.get(f'/events/{self.event.pk}/manifest/').status_code, 403)
+
+    def test_manifest_holds_signed_passes(self):
+        manifest = build_manifest(self.event.pk)
+        for registration in Registration.objects.select_related('event'):
+            self.assertEqual(
+                manifest_contains(manifest, f'PASS {pass_payload(registration)}'),
+                registration.event_id == self.event.pk,
+            )
+        # Right registration, wrong signature
+        forged = sign_pass(self.asha.pk, self.event.pk, pass_expiry(self.event.date) + 1)
+        self.assertFalse(manifest_contains(manifest, forged))
+        self.assertFalse(manifest_contains(manifest, 'no pass here'))
+
+    def test_sync_keeps_earliest_scan(self):
+        now = timezone.now()
+        early, late = now - timedelta(minutes=30), now - timedelta(minutes=10)
+        # ravi was checked in online after his offline scan; meena before hers
+        check_in([str(self.ravi.registration_id)], self.other_staff)
+        Registration.objects.filter(pk=self.meena.pk).update(
+            attended=True, verified_at=early - timedelta(minutes=5), verified_by=self.other_staff
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.sync([
+                (str(self.asha.registration_id), late),
+                (str(self.asha.registration_id), early),
+                (str(self.ravi.registration_id), early),
+                (str(self.meena.registration_id), early),
+                ('00000000-0000-0000-0000-000000000000', early),
+                ('junk', early),
+            ])
+        statuses = {r['registration_id']: r['status'] for r in response.json()['results']}
+        self.assertEqual(statuses, {
+            str(self.asha.registration_id): VERIFIED,
+            str(self.ravi.registration_id): ALREADY_VERIFIED,
+            str(self.meena.registration_id): ALREADY_VERIFIED,
+            '00000000-0000-0000-0000-000000000000': NOT_FOUND,
+            'junk': NOT_FOUND,
+        })
+        writes = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "events_registration"')]
+        self.assertEqual(len(writes), 1)
+
+        for registration, at, by in (
+            (self.asha, early, self.staff),
+            (self.ravi, early, self.staff),
+            (self.meena, early - timedelta(minutes=5), self.other_staff),
+        ):
+            registration.refresh_from_db()
+            self.assertTrue(registration.attended)
+            self.assertEqual((registration.verified_at, registration.verified_by), (at, by))
+        self.assertEqual(CategoryRollup.objects.get(category='seminar').attended, 2)
+
+    def test_sync_merges_legacy_and_signed_scans(self):
+        now = timezone.now()
+        early, late = now - timedelta(minutes=30), now - timedelta(minutes=10)
+        asha = Registration.objects.select_related('event').get(pk=self.asha.pk)
+        statuses = sync_scans([
+            (pass_payload(asha), late),
+            (str(asha.registration_id), early),
+        ], self.staff)
+        self.assertEqual(statuses, {str(asha.registration_id): VERIFIED})
+        asha.refresh_from_db()
+        self.assertEqual(asha.verified_at, early)
+        self.assertEqual(CategoryRollup.objects.get(category='seminar').attended, 1)
+        self.assertEqual(EventRollup.objects.get(event=self.event).attended, 1)
+
+    def test_sync_clamps_future_scans_and_rejects_bad_logs(self):
+        self.sync([(str(self.asha.registration_id), timezone.now() + timedelta(days=1))])
+        self.asha.refresh_from_db()
+        self.assertLessEqual(self.asha.verified_at, timezone.now())
+
+        bad = self.client.post(
+            '/api/check-in/sync/', json.dumps({'scans': [{'scan': 'x'}]}), content_type='application/json'
+        )
+        self.assertEqual(bad.status_code, 400)
+
+
+class SignedPassTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.event = make_event()
+        reserve_seat(make_student('asha'), self.event)
+        self.registration = Registration.objects.select_related('event').get()
+        self.payload = pass_payload(self.registration)
+
+    def test_round_trip_and_tampering(self):
+        claims = read_pass(self.payload)
+        self.assertEqual((claims.registration_pk, claims.event_id), (self.registration.pk, self.event.pk))
+
+        tampered = sign_pass(self.registration.pk, self.event.pk + 1, claims.expires)[:-16] + self.payload[-16:]
+        with self.assertRaises(InvalidPass):
+            read_pass(tampered)
+        with override_settings(PASS_SIGNING_KEY='rotated'):
+            with self.assertRaises(InvalidPass):
+                read_pass(self.payload)
+        with self.assertRaises(ExpiredPass):
+            read_pass(self.payload, now=self.event.date + timedelta(days=2))
+
+    def test_smaller_qr_code(self):
+        import qrcode
+
+        versions = []
+        for text in (self.payload, str(self.registration.registration_id)):
+            code = qrcode.QRCode()
+            code.add_data(text)
+            code.make(fit=True)
+            versions.append(code.version)
+        self.assertLess(versions[0], versions[1])
+
+    def test_fast_path_reads_nothing(self):
+        with CaptureQueriesContext(connection) as ctx:
+            [(status, registration)] = check_in([self.payload], self.staff, event_id=self.event.pk, details=False)
+        self.assertEqual((status, registration), (VERIFIED, None))
+        reads = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(reads, [])
+        self.assertEqual(CategoryRollup.objects.get(category='seminar').attended, 1)
+
+        [(status, _)] = check_in([self.payload], self.staff, event_id=self.event.pk, details=False)
+        self.assertEqual(status, ALREADY_VERIFIED)
+
+    def test_rejections(self):
+        other = make_event(title='Other')
+        expired = sign_pass(self.registration.pk, self.event.pk, int(time.time()) - 1)
+        results = check_in(
+            [self.payload, expired, 'A' * 37, f'EVENT PASS {self.payload.lower()}'],
+            self.staff, event_id=other.pk,
+        )
+        self.assertEqual([status for status, _ in results], [WRONG_EVENT, EXPIRED, INVALID, WRONG_EVENT])
+        self.assertFalse(Registration.objects.get().attended)
+
+    def test_gate_form_and_offline_sync_accept_signed_passes(self):
+        self.client.force_login(self.staff)
+        response = self.client.post('/verify-qr/', {'registration_id': self.payload})
+        self.assertEqual(response.context['result']['status'], 'verified_success')
+
+        scanned_at = timezone.now() - timedelta(hours=1)
+        response = self.client.post(
+            '/api/check-in/sync/',
+            json.dumps({'scans': [{'scan': self.payload, 'scanned_at': scanned_at.isoformat()}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['results'], [
+            {'registration_id': str(self.registration.registration_id), 'status': ALREADY_VERIFIED},
+        ])
+        self.registration.refresh_from_db()
+        self.assertEqual(self.registration.verified_at, scanned_at)
+
+
+class ChatbotTests(EventsTestCase):
+    def reply(self, message):
+        return self.client.get('/chatbot/', {'message': message}).json()['reply']
+
+    def test_intents_follow_original_priorities(self):
+        for message, intent in (
+            ('Hello there', 'greeting'),
+            ('what is this', 'greeting'),  # "this" contains "hi"
+            ('about portal', 'about'),
+            ('total number of EVENTS', 'event_count'),
+            ('any sports?', 'sports'),
+            ('sport', 'sports'),
+            ('how to register', 'register'),
+            ('where do I export', 'export'),
+            ('qr code please', 'qr_pass'),
+            ('lost qr', 'lost_qr'),
+            ('lost qr pass', 'qr_pass'),
+            ('admin  event', 'admin'),
+            ('xyz', None),
+        ):
+            self.assertEqual(match_intent(normalize(message))[0], intent, message)
+
+    def test_facts_are_cached_until_events_change(self):
+        make_event(title='Robotics', category='workshop')
+        self.assertEqual(self.reply('workshops'), "Available workshops: Robotics.")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.reply('how many events'), "There are currently 1 events available.")
+            self.reply('how do I sign up')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_event(title='Kabaddi', category='sports')
+        self.assertEqual(self.reply('how many events'), "There are currently 2 events available.")
+        self.assertEqual(self.reply('cultural'), "There are no cultural events available right now.")
+        self.assertEqual(self.reply('  '), self.reply(''))
+
+
+class EventSearchTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.robotics = make_event(title='Robotics Workshop', description='Build a line follower.', category='workshop')
+        self.dance = make_event(title='Dance Night', description='Robot dance battle.', venue='Open Air Theatre', category='cultural')
+        self.chess = make_event(title='Chess Open', description='Rapid rounds.', venue='Library', category='sports')
+
+    def titles(self, query):
+        return [e.title for e in self.client.get('/', {'q': query}).context['events']]
+
+    def test_ranked_prefix_search_over_all_fields(self):
+        self.assertEqual(self.titles('robo'), ['Robotics Workshop', 'Dance Night'])
+        self.assertEqual(self.titles('theatre'), ['Dance Night'])
+        self.assertEqual(self.titles('library chess'), ['Chess Open'])
+        self.assertEqual(self.titles('"); drop table --'), [])
+        response = self.client.get('/', {'q': 'robo', 'category': 'cultural'})
+        self.assertEqual([e.title for e in response.context['events']], ['Dance Night'])
+
+    def test_index_follows_writes(self):
+        self.robotics.title = 'Drone Workshop'
+        self.robotics.save()
+        self.assertEqual(search_event_ids('drone'), [self.robotics.pk])
+        self.assertEqual(search_event_ids('robotics'), [self.dance.pk])  # stems to "robot"
+        self.dance.delete()
+        self.assertEqual(search_event_ids('robot'), [])
+
+        # Seat counter updates leave the index alone
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'events_event_fts_%'")
+            self.assertEqual(len(cursor.fetchall()), 3)
+
+    def test_chatbot_finds_events(self):
+        reply = self.client.get('/chatbot/', {'message': 'Find events about robots?'}).json()['reply']
+        self.assertEqual(reply, "Events about robots: Robotics Workshop, Dance Night.")
+        reply = self.client.get('/chatbot/', {'message': 'show me events on knitting'}).json()['reply']
+        self.assertEqual(reply, "I couldn't find any events about knitting.")
+
+
+@override_settings(EVENTS_PAGE_SIZE=3)
+class EventsApiTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # Two events share a start time so the id tie-break matters
+        self.events = [
+            make_event(title=f'Event {i}', category='sports' if i % 2 else 'seminar',
+                       date=now + timedelta(days=i // 2 * 2 - 3), description='x' * 300)
+            for i in range(8)
+        ]
+
+    def walk(self, **params):
+        pages, after = [], None
+        while True:
+            response = self.client.get('/api/events/', {**params, **({'after': after} if after else {})})
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            pages.append([event['title'] for event in page['events']])
+            after = page['next']
+            if after is None:
+                return pages
+
+    def test_pages_follow_date_then_id(self):
+        expected = [e.title for e in sorted(self.events, key=lambda e: (e.date, e.pk))]
+        pages = self.walk()
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual(sum(pages, []), expected)
+
+        event = self.client.get('/api/events/', {'limit': 1}).json()['events'][0]
+        self.assertEqual(set(event), {
+            'id', 'title', 'category', 'date', 'venue', 'capacity', 'registered_seats',
+            'seats_remaining', 'summary', 'image',
+        })
+        self.assertEqual(event['summary'], 'x' * 109 + '…')
+
+    def test_filters(self):
+        pages = self.walk(category='sports', upcoming='1')
+        now = timezone.now()
+        expected = [e.title for e in self.events if e.category == 'sports' and e.date >= now]
+        self.assertEqual(sorted(sum(pages, [])), sorted(expected))
+
+    def test_page_queries_do_not_grow(self):
+        first = self.client.get('/api/events/').json()['next']
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/events/', {'after': first})
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('OFFSET', ctx.captured_queries[0]['sql'])
+
+    def test_bad_requests(self):
+        for params in ({'after': 'not-a-cursor'}, {'limit': '0'}, {'limit': 'lots'}):
+            self.assertEqual(self.client.get('/api/events/', params).status_code, 400)
+
+    def test_home_renders_first_page(self):
+        response = self.client.get('/')
+        self.assertEqual(len(response.context['events']), 3)
+        self.assertEqual(response.context['event_count'], 8)
+        self.assertContains(response, f'data-next="{response.context["next_cursor"]}"')
+
+        response = self.client.get('/', {'category': 'sports'})
+        self.assertEqual(response.context['event_count'], 4)
+        rest = self.client.get('/api/events/', {'category': 'sports', 'after': response.context['next_cursor']})
+        self.assertEqual(len(response.context['events']) + len(rest.json()['events']), 4)
+
+
+class CatalogueCacheTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(title='Robotics Expo', capacity=10)
+        self.student = make_student('hana')
+
+    def home_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_anonymous_page_served_from_cache(self):
+        first, _ = self.home_queries()
+        second, queries = self.home_queries()
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.content, first.content)
+
+        # Another category is another page
+        response = self.client.get('/', {'category': 'sports'})
+        self.assertIsNotNone(response.context)
+
+    def test_unknown_category_not_cached(self):
+        for category in ('nonsense', 'a b\x00' * 100):
+            # Rendered each time, never served from the cache
+            for _ in range(2):
+                response = self.client.get('/', {'category': category})
+                self.assertIsNotNone(response.context)
+                self.assertEqual(response.context['event_count'], 0)
+
+    def test_registration_updates_seats(self):
+        self.assertContains(self.client.get('/'), '0/10')
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seat(self.student, self.event)
+        self.assertContains(self.client.get('/'), '1/10')
+
+    def test_event_edit_shows_new_title(self):
+        self.client.get('/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.title = 'Drone Expo'
+            self.event.save()
+        response = self.client.get('/')
+        self.assertContains(response, 'Drone Expo')
+        self.assertNotContains(response, 'Robotics Expo')
+
+    def test_pending_messages_bypass_page(self):
+        self.client.get('/')
+        self.client.force_login(self.student)
+        response = self.client.get('/logout/', follow=True)
+        self.assertContains(response, 'Logged out successfully!')
+        # Shown once, and the page cached without it is served again
+        self.assertNotContains(self.client.get('/'), 'Logged out successfully!')
+
+    def test_signed_in_users_share_cards_not_pages(self):
+        self.client.force_login(self.student)
+        self.client.get('/')
+        response, queries = self.home_queries()
+        self.assertContains(response, 'Register Now')
+        self.assertEqual(response.context['events'][0].pk, self.event.pk)
+        # Session, user and recommendations; the listing comes from the cache
+        self.assertLessEqual(queries, 4)
+
+        self.client.logout()
+        self.assertContains(self.client.get('/'), 'Login to Register')
+
+
+class CachingTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        reset_cache_stats()
+        self.namespace = CacheNamespace('test', timeout=60)
+
+    def test_backends(self):
+        self.assertEqual(
+            cache_backends(directory='/tmp/c')['default']['BACKEND'],
+            'django.core.cache.backends.filebased.FileBasedCache',
+        )
+        redis = cache_backends('redis://cache:6379/1', version=3)['default']
+        self.assertEqual(redis['BACKEND'], 'django.core.cache.backends.redis.RedisCache')
+        self.assertEqual((redis['LOCATION'], redis['VERSION']), ('redis://cache:6379/1', 3))
+        self.assertEqual(cache_backends('memcached://cache:11211')['default']['LOCATION'], 'cache:11211')
+        with self.assertRaisesMessage(ValueError, "'mongodb'"):
+            cache_backends('mongodb://cache')
+
+    def test_single_flight_across_threads(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.namespace.get_or_set('slow', compute)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 4)
+        self.assertEqual(len(calls), 1)
+
+    def test_waits_for_another_process(self):
+        # Another worker holds the lock and stores the value shortly
+        cache.add('test:slow:lock', 1)
+        timer = threading.Timer(0.2, lambda: cache.set('test:slow', ('theirs', None, 0.1)))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(self.namespace.get_or_set('slow', lambda: 'ours'), 'theirs')
+        self.assertEqual(cache_stats()['test'], {'hits': 0, 'misses': 1, 'waits': 1})
+
+    def test_refreshes_before_expiry(self):
+        # Took 5s to compute and expires in 1s: a refresh is due
+        cache.set('test:key', ('old', time.time() + 1, 5.0))
+        with mock.patch('events.caching.random.random', return_value=0.5):
+            self.assertEqual(self.namespace.get_or_set('key', lambda: 'new'), 'new')
+        # Just stored, so the next reads hit without recomputing
+        self.assertEqual(self.namespace.get_or_set('key', lambda: 'never'), 'new')
+        self.assertEqual(cache_stats()['test'], {'hits': 2, 'misses': 0, 'early_refreshes': 1})
+
+    def test_versioned_invalidate(self):
+        namespace = CacheNamespace('versioned', versioned=True)
+        version = namespace.version()
+        namespace.set('key', 'value', version=version)
+        self.assertEqual(namespace.get('key'), 'value')
+        namespace.invalidate()
+        self.assertIsNone(namespace.get('key'))
+        # A value computed from the old version is stored out of reach
+        namespace.set('key', 'stale', version=version)
+        self.assertIsNone(namespace.get('key'))
+
+        with self.assertRaises(ValueError):
+            self.namespace.invalidate()
+
+    def test_request_counts_in_server_timing(self):
+        make_event()
+        self.client.get('/')
+        response = self.client.get('/')
+        self.assertIn('cache;desc="1/1 hits"', response['Server-Timing'])
+
+
+class DatabaseConfigTests(EventsTestCase):
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertGreater(connection.settings_dict['CONN_MAX_AGE'], 0)
+
+    def test_router_sends_replica_view_reads_to_replica(self):
+        router = ReplicaRouter()
+        middleware = ReplicaMiddleware(lambda request: None)
+        request = RequestFactory().get('/')
+        token = _request_state.set(RequestState())
+        try:
+            middleware.process_view(request, register_event, (), {})
+            self.assertEqual(router.db_for_read(Event), 'default')
+
+            middleware.process_view(request, home, (), {})
+            with mock.patch.dict(settings.DATABASES, {REPLICA: settings.DATABASES['default']}):
+                self.assertEqual(router.db_for_read(Event), REPLICA)
+                self.assertEqual(router.db_for_read(User), 'default')  # auth stays on the primary
+                self.assertEqual(router.db_for_write(Event), 'default')
+                self.assertEqual(router.db_for_read(Event), 'default')  # read your own writes
+            self.assertEqual(router.db_for_read(Event), 'default')  # no replica configured
+        finally:
+            _request_state.reset(token)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        self.assertNotIn(PIN_COOKIE, self.client.get('/').cookies)
+
+        event = make_event()
+        self.client.force_login(make_student('erin'))
+        response = self.client.get(f'/register/{event.id}/')
+        self.assertEqual(Registration.objects.filter(event=event).count(), 1)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        state = RequestState()
+        token = _request_state.set(state)
+        try:
+            request = RequestFactory().get('/')
+            request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+            ReplicaMiddleware(lambda request: None).process_view(request, home, (), {})
+            self.assertFalse(state.use_replica)
+        finally:
+            _request_state.reset(token)
+
+
+class QueryPlanTests(EventsTestCase):
+    """
+    EXPLAIN QUERY PLAN for the hot queries: none may read a whole table.
+    Walking an index ("SCAN t USING INDEX") under a LIMIT or a partial
+    index's condition is fine; a bare "SCAN t" is not.
+    """
+
+    FULL_SCAN_RE = re.compile(r'\bSCAN (\w+)\b(?! USING| VIRTUAL TABLE)')
+
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(title='Robotics Workshop', category='workshop')
+        self.student = make_student('fay')
+        reserve_seat(self.student, self.event)
+        self.staff = User.objects.create_superuser('root', 'root@example.com', 'pw')
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain() if hasattr(queryset, 'explain') else queryset
+        self.assertFalse(self.FULL_SCAN_RE.findall(plan), f"Full table scan in:\n{plan}")
+
+    def sql_plan(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def test_catalogue(self):
+        make_event(title='Chess Open', category='sports')
+        _, after = keyset_page(catalogue(), 1)
+        for events in (catalogue(), catalogue('workshop'), catalogue(upcoming=True), event_cards(catalogue())):
+            with self.subTest(query=str(events.query)):
+                self.assertNoFullScan(events.order_by('date', 'pk')[:25])
+        with CaptureQueriesContext(connection) as ctx:
+            keyset_page(catalogue(), 24, after=after)
+        plan = self.sql_plan(ctx.captured_queries[0]['sql'], [])
+        self.assertIn('event_date_idx (date>?)', plan)  # seeks, rather than walking from the start
+
+    def test_search(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(search_event_ids('robo'), [self.event.pk])
+        self.assertNoFullScan(self.sql_plan(ctx.captured_queries[0]['sql'], []))
+
+    def test_student_paths(self):
+        self.assertNoFullScan(Registration.objects.filter(user=self.student))
+        self.assertNoFullScan(Registration.objects.filter(user=self.student, event=self.event))
+        self.assertNoFullScan(WaitlistEntry.objects.filter(event_id=self.event.pk).select_related('user', 'event')[:1])
+        self.assertNoFullScan(Recommendation.objects.filter(user=self.student).order_by('rank')[:5])
+
+    def test_check_in_paths(self):
+        registration = Registration.objects.get()
+        for field, value in (('pk', registration.pk), ('registration_id', registration.registration_id)):
+            self.assertNoFullScan(Registration.objects.filter(**{field: value, 'attended': False}))
+        self.assertNoFullScan(Registration.objects.filter(event_id=self.event.pk).values_list('registration_id'))
+
+    def test_exports(self):
+        for params in ({'event': self.event.pk}, {'category': 'workshop'}, {'from': '2026-01-01', 'to': '2026-01-31'}):
+            with self.subTest(params=params):
+                self.assertNoFullScan(_export_queryset(RequestFactory().get('/', params)))
+        registrations, _ = _delta_window(Registration.objects.all(), '0')
+        self.assertNoFullScan(registrations)
+
+    def test_admin_filters(self):
+        model_admin = admin.site._registry[Registration]
+        for params in ({'attended__exact': '1'}, {'attended__exact': '0'}, {'event__category': 'workshop'}):
+            with self.subTest(params=params):
+                request = RequestFactory().get('/admin/events/registration/', params)
+                request.user = self.staff
+                changelist = model_admin.get_changelist_instance(request)
+                self.assertNoFullScan(changelist.queryset[:changelist.list_per_page])
+
+    def test_mail_claim(self):
+        self.assertNoFullScan(EmailOutbox.objects.filter(
+            status__in=[EmailOutbox.PENDING, EmailOutbox.SENDING], next_attempt_at__lte=timezone.now(),
+        ).order_by('next_attempt_at', 'pk')[:50])
+
+
+class InstrumentationTests(EventsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student('gus')
+        self.client.force_login(self.student)
+
+    def test_server_timing(self):
+        response = self.client.get('/')
+        metrics = dict(
+            (entry.split(';')[0].strip(), entry) for entry in response['Server-Timing'].split(',')
+        )
+        self.assertEqual(set(metrics), {'db', 'tpl', 'cache', 'view', 'total'})
+        self.assertRegex(metrics['db'], r'db;dur=[\d.]+;desc="\d+ queries"')
+
+    def test_budget_fails_tests_and_warns_in_production(self):
+        with mock.patch.object(views.home, 'query_budget', 1):
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'over its budget of 1'):
+                self.client.get('/')
+            with override_settings(QUERY_BUDGET_STRICT=False), self.assertLogs('events.instrumentation', 'WARNING'):
+                self.assertEqual(self.client.get('/').status_code, 200)
+
+    def test_my_registrations_within_budget(self):
+        for i in range(5):
+            reserve_seat(self.student, make_event(title=f'Talk {i}'))
+        self.assertContains(self.client.get('/my-events/'), 'Talk 4')
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_slow_queries_logged(self):
+        with self.assertLogs('events.instrumentation', 'WARNING') as logs:
+            self.client.get('/api/events/')
+        self.assertIn('Slow query', logs.output[0])
+        self.assertIn('events_event', logs.output[0])
@@ -1,59 +1,154 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.mail import send_mail
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
 from .models import Event, Registration
 from .recommendation import get_recommendations
-import io
-import urllib, base64
-from collections import Counter
-import qrcode
-from django.http import HttpResponse
+from .admission import get_admission_backend
+from .booking import join_waitlist, reserve_seat, FULL, DUPLICATE
+from .mail import queue_mail
+from .charts import category_chart_png, chart_digest
+from .chatbot import reply_to
+from .instrumentation import query_budget
+from .search import search_events
+from .catalogue import InvalidCursor, card_json, catalogue, event_cards, keyset_page
+from .pagecache import catalogue_pages, render_cards
+from .rollups import category_summary
+from .checkin import (
+    EXPIRED, INVALID, NOT_FOUND, UUID_RE, VERIFIED, build_manifest, check_in, sync_scans,
+)
+from .passes import find_pass, pass_payload
+from .qr import FORMATS as QR_FORMATS, qr_digest, qr_images
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_POST
 import csv
+import hashlib
+import itertools
+import json
+from collections import Counter
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.utils import timezone
-import re
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 from .forms import StudentProfileForm
 from .models import UserProfile
 from django.http import JsonResponse
 
+# Session, user, totals, first page and recommendations (three more
+# when the recommendation index is rebuilt); a cached page runs none of
+# the listing queries
+@query_budget(8)
 def home(request):
     query = request.GET.get('q', '')
     selected_category = request.GET.get('category', '')
+    authenticated = request.user.is_authenticated
 
-    events = Event.objects.all().order_by('date')
+    # Read before any query, so a page built from rows that a concurrent
+    # change has replaced is stored under the version it made obsolete
+    version = catalogue_pages.version()
 
-    if query:
-        events = events.filter(title__icontains=query)
+    # Only known categories are cached: the parameter goes into cache keys,
+    # and every other value would be one more entry anyone could add
+    cacheable = not query and (
+        not selected_category or selected_category in dict(Event.CATEGORY_CHOICES)
+    )
 
-    if selected_category:
-        events = events.filter(category=selected_category)
+    # Anonymous listing pages are the same for every visitor, so they are
+    # served whole; not while a flash message is waiting to be shown
+    page = None
+    if cacheable and not authenticated and not len(messages.get_messages(request)):
+        page = f'home:{selected_category}'
+        html = catalogue_pages.get(page, version=version)
+        if html is not None:
+            return HttpResponse(html)
+
+    if not cacheable:
+        listing = _catalogue_listing(query, selected_category, authenticated)
+    else:
+        listing = catalogue_pages.get_or_set(
+            f'listing:{selected_category}:{int(authenticated)}',
+            lambda: _catalogue_listing(query, selected_category, authenticated),
+            version=version,
+        )
 
     recommendations = []
-    if request.user.is_authenticated:
+    if authenticated:
         recommendations = get_recommendations(request.user)
 
-    all_events = Event.objects.all()
-    total_events = all_events.count()
-    total_capacity = sum(event.capacity for event in all_events)
-    total_registered = sum(event.registered_count() for event in all_events)
-
-    category_choices = Event.CATEGORY_CHOICES
-
-    return render(request, 'home.html', {
-        'events': events,
+    response = render(request, 'home.html', {
+        **listing,
         'recommendations': recommendations,
-        'total_events': total_events,
-        'total_capacity': total_capacity,
-        'total_registered': total_registered,
-        'category_choices': category_choices,
+        'category_choices': Event.CATEGORY_CHOICES,
         'selected_category': selected_category,
         'query': query,
     })
+    if page is not None:
+        catalogue_pages.set(page, response.content, version=version)
+    return response
+
+
+def _catalogue_listing(query, selected_category, authenticated):
+    totals = Event.objects.aggregate(
+        total_events=Count('id'),
+        total_capacity=Coalesce(Sum('capacity'), 0),
+        total_registered=Coalesce(Sum('registered_seats'), 0),
+    )
+
+    # Seat figures come from the denormalized counter, so every card is
+    # rendered from one query. Search results are ranked and capped; the
+    # full listing shows its first page and the browser pulls the rest
+    # from events_api.
+    next_cursor = None
+    if query:
+        events = list(search_events(catalogue(), query, selected_category))
+        event_count = len(events)
+    else:
+        events = catalogue(selected_category)
+        event_count = events.count() if selected_category else totals['total_events']
+        events, next_cursor = keyset_page(events, settings.EVENTS_PAGE_SIZE)
+
+    return {
+        'events': events,
+        'cards': render_cards(events, authenticated),
+        'event_count': event_count,
+        'next_cursor': next_cursor,
+        **totals,
+    }
+
+
+# Largest page events_api serves
+EVENTS_API_MAX_LIMIT = 100
+
+
+@query_budget(1)
+def events_api(request):
+    """
+    Event listing for infinite scroll: GET with optional "category",
+    "upcoming=1", "limit" and "after" (the "next" cursor of the previous
+    page). Responds with {"events": [...], "next": cursor or null}, in
+    date order, each event trimmed to what a card shows.
+    """
+    try:
+        limit = int(request.GET.get('limit', settings.EVENTS_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': "'limit' must be a number."}, status=400)
+    if not 1 <= limit <= EVENTS_API_MAX_LIMIT:
+        return JsonResponse({'error': f"'limit' must be between 1 and {EVENTS_API_MAX_LIMIT}."}, status=400)
+
+    events = catalogue(
+        request.GET.get('category') or None,
+        upcoming=request.GET.get('upcoming') in ('1', 'true'),
+    )
+    try:
+        rows, next_cursor = keyset_page(event_cards(events), limit, request.GET.get('after') or None)
+    except InvalidCursor as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'events': [card_json(row) for row in rows], 'next': next_cursor})
 
 def signup_view(request):
     if request.method == 'POST':
@@ -87,31 +182,35 @@ def logout_view(request):
     return redirect('/')
 
 
+# Includes the rollup and outbox writes a registration triggers; the first
+# registration of the day for an event also creates its two rollup rows
+@query_budget(19)
 @login_required
 def register_event(request, event_id):
     event = get_object_or_404(Event, id=event_id)
 
-    # Check event capacity
-    if event.seats_left() <= 0:
-        messages.error(request, "Event is full.")
-        return redirect('/')
-
-    # Prevent duplicate registration
-    if Registration.objects.filter(user=request.user, event=event).exists():
-        messages.error(request, "You have already registered for this event.")
-        return redirect('/')
-
     # Ensure user profile exists
     profile, _ = UserProfile.objects.get_or_create(user=request.user)
 
     # Check if required student details are missing
-    profile_incomplete = not all([
-        profile.college_email,
-        profile.registration_number,
-        profile.branch,
-        profile.department,
-        profile.year_of_study,
-    ])
+    profile_incomplete = not profile.is_complete()
+
+    # Check event capacity (reads the denormalized counter, no COUNT query).
+    # A full event takes only complete profiles onto its waitlist, since
+    # promotion registers without asking; the rest fill in their details
+    # first and join it from _complete_registration.
+    if event.seats_left() <= 0:
+        if not profile_incomplete:
+            return _join_waitlist(request, event)
+    else:
+        # Flash openings: hold requesters in a queue and let them through at
+        # ADMISSION_RATE per second instead of all hitting the database at once
+        ticket = get_admission_backend().enter(event.id, request.user.pk)
+        if not ticket.admitted:
+            return render(request, 'waiting_room.html', {
+                'event': event,
+                'ticket': ticket,
+            })
 
     # If profile is incomplete, collect details first
     if profile_incomplete:
@@ -121,18 +220,9 @@ def register_event(request, event_id):
                 form.save()
 
                 # Proceed with registration after saving profile
-                Registration.objects.create(user=request.user, event=event)
-
-                send_mail(
-                    'Event Registration Confirmation',
-                    f'You have successfully registered for {event.title}',
-                    'admin@college.com',
-                    [request.user.email],
-                    fail_silently=True,
+                return _complete_registration(
+                    request, event, "Profile saved and event registered successfully!"
                 )
-
-                messages.success(request, "Profile saved and event registered successfully!")
-                return redirect('/')
         else:
             form = StudentProfileForm(instance=profile)
 
@@ -142,93 +232,142 @@ def register_event(request, event_id):
         })
 
     # If profile already complete, register directly
-    Registration.objects.create(user=request.user, event=event)
+    return _complete_registration(
+        request, event, "Successfully registered! Confirmation email sent."
+    )
+
 
-    send_mail(
+def _complete_registration(request, event, success_message):
+    status = reserve_seat(request.user, event)
+    get_admission_backend().leave(event.id, request.user.pk)
+
+    if status == FULL:
+        return _join_waitlist(request, event)
+
+    # Duplicates are rejected by the unique (user, event) constraint
+    if status == DUPLICATE:
+        messages.error(request, "You have already registered for this event.")
+        return redirect('/')
+
+    # Delivered by `manage.py send_outbox`, not inside the request
+    queue_mail(
         'Event Registration Confirmation',
         f'You have successfully registered for {event.title}',
         'admin@college.com',
         [request.user.email],
-        fail_silently=True,
     )
 
-    messages.success(request, "Successfully registered! Confirmation email sent.")
+    messages.success(request, success_message)
+    return redirect('/')
+
+
+def _join_waitlist(request, event):
+    if Registration.objects.filter(user=request.user, event=event).exists():
+        messages.error(request, "You have already registered for this event.")
+        return redirect('/')
+
+    position = join_waitlist(request.user, event)
+    messages.error(
+        request,
+        f"Event is full. You are #{position} on the waitlist and will be registered automatically if a seat opens up.",
+    )
     return redirect('/')
 
 
+@query_budget(3)
 @login_required
 def my_registrations(request):
-    registrations = Registration.objects.filter(user=request.user)
+    registrations = Registration.objects.filter(user=request.user).select_related('event')
     return render(request, 'my_registrations.html', {'registrations': registrations})
 
+@query_budget(3)
 @login_required
 def analytics_dashboard(request):
     if not request.user.is_staff:
         return render(request, 'unauthorized.html', status=403)
-    events = Event.objects.all()
-    registrations = Registration.objects.all()
 
-    total_events = events.count()
-    total_registrations = registrations.count()
+    # Totals come from the rollup rows kept current by signals, so the page
+    # costs one small query however many registrations there are
+    summary = category_summary()
+    counts = _category_event_counts(summary)
 
-    categories = [event.category for event in events]
-    category_counts = Counter(categories)
+    return render(request, 'analytics.html', {
+        'total_events': sum(row['events'] for row in summary),
+        'total_registrations': sum(row['registrations'] for row in summary),
+        'summary': summary,
+        'chart_digest': chart_digest(counts),
+    })
 
-    # Create chart
-    fig, ax = plt.subplots()
-    ax.bar(category_counts.keys(), category_counts.values())
-    ax.set_title("Event Category Distribution")
 
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png')
-    plt.close(fig)
-    buffer.seek(0)
-    image_png = buffer.getvalue()
-    buffer.close()
+def _category_event_counts(summary):
+    return {row['category']: row['events'] for row in summary if row['events']}
 
-    graph = base64.b64encode(image_png).decode('utf-8')
-    graph = urllib.parse.quote(graph)
 
-    return render(request, 'analytics.html', {
-        'total_events': total_events,
-        'total_registrations': total_registrations,
-        'graph': graph
-    })
+@login_required
+def analytics_chart(request, digest):
+    """
+    The category chart as a PNG. URLs embed a hash of the chart's data, so
+    a response never goes stale and browsers may keep it indefinitely.
+    """
+    if not request.user.is_staff:
+        return render(request, 'unauthorized.html', status=403)
+
+    etag = f'"{digest}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        current, png = category_chart_png(_category_event_counts(category_summary()))
+        if current != digest:
+            raise Http404("Chart data has changed.")
+        response = HttpResponse(png, content_type='image/png')
+    return _immutable(response, etag)
 
 @login_required
 def generate_qr(request, registration_id):
     registration = get_object_or_404(
-        Registration,
+        Registration.objects.select_related('event'),
         registration_id=registration_id,
         user=request.user
     )
 
-    qr_data = str(registration.registration_id)
-    qr = qrcode.make(qr_data)
-
-    import io
-    import base64
-
-    buffer = io.BytesIO()
-    qr.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-    buffer.close()
-
+    # The image URL carries a hash of the payload, so a pass that changes
+    # (event rescheduled, signing key rotated) is never served from a
+    # browser's immutable cache
     return render(request, 'qr_view.html', {
         'registration': registration,
-        'qr_base64': qr_base64,
+        'pass_version': qr_digest(pass_payload(registration), 'png')[:16],
     })
 
+
 @login_required
-def export_registrations_csv(request):
-    if not request.user.is_staff:
-        return render(request, 'unauthorized.html', status=403)
+def qr_image(request, registration_id, fmt):
+    """
+    The QR pass as a PNG or SVG. Pages link it with a ``?v=`` hash of the
+    payload, so each URL's image never changes and browsers may keep it
+    forever.
+    """
+    if fmt not in QR_FORMATS:
+        raise Http404("Unsupported image format.")
+    registration = get_object_or_404(
+        Registration.objects.select_related('event').only('pk', 'event_id', 'event__date'),
+        registration_id=registration_id,
+        user=request.user
+    )
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="registrations.csv"'
+    value = pass_payload(registration)
+    etag = f'"{qr_digest(value, fmt)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        _, image = qr_images.get(value, fmt)
+        response = HttpResponse(image, content_type=QR_FORMATS[fmt])
+    return _immutable(response, etag)
 
-    writer = csv.writer(response)
-    writer.writerow([
+
+def _immutable(response, etag):
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+CSV_HEADER = [
     'Username',
     'College Email',
     'Registration Number',
@@ -243,14 +382,22 @@ def export_registrations_csv(request):
     'Verified At',
     'Verified By',
     'Registration ID'
-])
+]
+
+EXPORT_CHUNK_SIZE = 2000
 
-    registrations = Registration.objects.select_related('user', 'event').all()
 
-    for reg in registrations:
-        profile = getattr(reg.user, 'userprofile', None)
+class _Echo:
+    """File-like object for csv.writer that hands each row straight back."""
 
-    writer.writerow([
+    def write(self, value):
+        return value
+
+
+def _csv_row(reg):
+    profile = getattr(reg.user, 'userprofile', None)
+
+    return [
         reg.user.username,
         getattr(profile, 'college_email', '') if profile else '',
         getattr(profile, 'registration_number', '') if profile else '',
@@ -265,153 +412,285 @@ def export_registrations_csv(request):
         reg.verified_at,
         reg.verified_by.username if reg.verified_by else '',
         reg.registration_id
-    ])
+    ]
 
-    return response
 
-@login_required
-def verify_qr(request):
-    # Allow only staff/admin to verify entries
-    if not request.user.is_staff:
-        return render(request, 'unauthorized.html', status=403)
+def _export_queryset(request):
+    """
+    Registrations for the export, narrowed by the optional ``event``,
+    ``category``, ``from`` and ``to`` (event date, YYYY-MM-DD) parameters.
 
-    result = None
-    error = None
+    Raises ValueError for malformed parameters.
+    """
+    registrations = Registration.objects.select_related(
+        'user__userprofile', 'event', 'verified_by'
+    ).order_by('pk')
 
-    if request.method == 'POST':
-        raw_input = request.POST.get('registration_id', '').strip()
+    event_id = request.GET.get('event')
+    if event_id:
+        registrations = registrations.filter(event_id=int(event_id))
 
-        # Extract UUID even if scanned text contains extra words
-        uuid_match = re.search(
-            r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}',
-            raw_input
-        )
+    category = request.GET.get('category')
+    if category:
+        registrations = registrations.filter(event__category=category)
 
-        if not uuid_match:
-            error = "Invalid QR format. UUID not found."
-            return render(request, 'verify_qr.html', {'result': None, 'error': error})
+    # Compared as a datetime range rather than with __date, which wraps the
+    # column in a function and so cannot use the event date index
+    for param, lookup, offset in (('from', 'event__date__gte', 0), ('to', 'event__date__lt', 1)):
+        value = request.GET.get(param)
+        if value:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Invalid date for '{param}': {value}")
+            start = datetime.combine(day + timedelta(days=offset), datetime.min.time())
+            registrations = registrations.filter(**{lookup: timezone.make_aware(start)})
+
+    return registrations
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@login_required
+def export_registrations_csv(request):
+    """
+    Full export, or with ``?since=<cursor>`` only rows created or changed
+    after that cursor (``since=0`` starts from scratch). Delta responses
+    carry the cursor for the next pull in an ``X-Export-Cursor`` header.
+    ``?gzip=1`` compresses either mode.
+    """
+    if not request.user.is_staff:
+        return render(request, 'unauthorized.html', status=403)
 
-        registration_id = uuid_match.group(0)
+    try:
+        registrations = _export_queryset(request)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
 
+    next_cursor = None
+    since = request.GET.get('since')
+    if since is not None:
         try:
-            reg = Registration.objects.select_related('user', 'event').get(registration_id=registration_id)
-
-            if reg.attended:
-                result = {
-                    'status': 'already_verified',
-                    'registration': reg
-                }
-            else:
-                reg.attended = True
-                reg.verified_at = timezone.now()
-                reg.verified_by = request.user
-                reg.save()
-
-                result = {
-                    'status': 'verified_success',
-                    'registration': reg
-                }
-
-        except Registration.DoesNotExist:
-            error = "Invalid QR / Registration ID not found."
+            registrations, next_cursor = _delta_window(registrations, since)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor.")
+
+    # Rows are written as the chunked cursor yields them, so memory stays
+    # flat no matter how many registrations there are
+    writer = csv.writer(_Echo())
+    rows = itertools.chain(
+        [CSV_HEADER],
+        (_csv_row(reg) for reg in registrations.iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+    )
+    lines = (writer.writerow(row) for row in rows)
 
-    return render(request, 'verify_qr.html', {
-        'result': result,
-        'error': error
-    })
-def chatbot_reply(request):
-    msg = request.GET.get('message', '').strip().lower()
+    filename = 'registrations.csv' if next_cursor is None else f'registrations-{next_cursor}.csv'
+    if request.GET.get('gzip'):
+        response = StreamingHttpResponse(_gzip_stream(lines), content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if next_cursor is not None:
+        response['X-Export-Cursor'] = next_cursor
+    return response
 
-    if not msg:
-        return JsonResponse({'reply': "Hi! Ask me about events, registration, QR pass, login, verification, analytics, or admin features."})
 
-    events = Event.objects.all()
-    total_events = events.count()
+# Rows written within this window may still be in uncommitted transactions,
+# so a delta export stops short of it and picks them up next time
+DELTA_EXPORT_LAG = timedelta(seconds=5)
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Largest cursor that is still a datetime
+CURSOR_MAX = (datetime.max.replace(tzinfo=dt_timezone.utc) - CURSOR_EPOCH) // timedelta(microseconds=1)
 
-    # Greetings
-    if any(word in msg for word in ['hello', 'hi', 'hey', 'hii']):
-        reply = "Hello! 👋 I’m your Event Assistant. I can help with registration, QR pass, event search, verification, and analytics access."
 
-    # About portal
-    elif 'what is this' in msg or 'what is this portal' in msg or 'about portal' in msg:
-        reply = "This is a College Event Registration Portal where students can register for events, get QR passes, and staff can verify attendance."
+def _delta_window(registrations, since):
+    """
+    Narrow an export to rows whose ``updated_at`` falls after the ``since``
+    cursor and up to a fixed upper bound, which becomes the next cursor.
 
-    # Event counts
-    elif 'how many events' in msg or ('total' in msg and 'event' in msg):
-        reply = f"There are currently {total_events} events available."
+    Cursors are microseconds since the epoch. Raises ValueError on a bad one.
+    """
+    start = int(since)
+    if not 0 <= start <= CURSOR_MAX:
+        raise ValueError(since)
+    upper = timezone.now() - DELTA_EXPORT_LAG
+    upper_us = max(start, (upper - CURSOR_EPOCH) // timedelta(microseconds=1))
 
-    # Category-specific queries
-    elif 'workshop' in msg:
-        q = events.filter(category='workshop')
-        reply = f"Available workshops: {', '.join([e.title for e in q[:5]])}." if q.exists() else "There are no workshop events available right now."
+    registrations = registrations.filter(
+        updated_at__gt=_from_cursor(start),
+        updated_at__lte=_from_cursor(upper_us),
+    ).order_by('updated_at', 'pk')
+    return registrations, str(upper_us)
 
-    elif 'seminar' in msg:
-        q = events.filter(category='seminar')
-        reply = f"Available seminars: {', '.join([e.title for e in q[:5]])}." if q.exists() else "There are no seminar events available right now."
 
-    elif 'sports' in msg or 'sport' in msg:
-        q = events.filter(category='sports')
-        reply = f"Available sports events: {', '.join([e.title for e in q[:5]])}." if q.exists() else "There are no sports events available right now."
+def _from_cursor(value):
+    return CURSOR_EPOCH + timedelta(microseconds=value)
 
-    elif 'cultural' in msg:
-        q = events.filter(category='cultural')
-        reply = f"Available cultural events: {', '.join([e.title for e in q[:5]])}." if q.exists() else "There are no cultural events available right now."
+VERIFY_ERRORS = {
+    NOT_FOUND: "Invalid QR / Registration ID not found.",
+    INVALID: "Invalid QR. This pass was not issued by this portal.",
+    EXPIRED: "This pass has expired.",
+}
 
-    # Registration flow
-    elif 'how to register' in msg or ('register' in msg and 'event' in msg):
-        reply = "To register: Login → choose an event → click Register → complete student details (first time only) → registration confirmed."
 
-    elif 'can i register without login' in msg or ('without login' in msg and 'register' in msg):
-        reply = "No. You must login first to register for events and receive your QR pass."
+@login_required
+def verify_qr(request):
+    # Allow only staff/admin to verify entries
+    if not request.user.is_staff:
+        return render(request, 'unauthorized.html', status=403)
 
-    elif 'already registered' in msg or 'why can’t i register again' in msg or 'duplicate registration' in msg:
-        reply = "The system allows only one registration per user per event. Duplicate registrations are blocked automatically."
+    result = None
+    error = None
 
-    elif 'event full' in msg or 'why event full' in msg or 'capacity' in msg or 'seat' in msg:
-        reply = "Each event has a capacity limit. If seats are full, the system blocks registration and shows 'Event Full'."
+    if request.method == 'POST':
+        raw_input = request.POST.get('registration_id', '').strip()
 
-    # Student profile details
-    elif 'registration number' in msg or 'college email' in msg or 'branch' in msg or 'year of study' in msg:
-        reply = "During first event registration, you’ll be asked to fill student details like college email, registration number, branch, department, and year of study."
+        # Find the pass even if scanned text contains extra words
+        if not (find_pass(raw_input) or UUID_RE.search(raw_input)):
+            error = "Invalid QR format. No pass found."
+            return render(request, 'verify_qr.html', {'result': None, 'error': error})
 
-    # Login / signup
-    elif 'login' in msg or 'signup' in msg or 'sign up' in msg or 'create account' in msg:
-        reply = "Use Signup to create an account, then Login to register for events, access your QR pass, and view your registrations."
+        [(status, reg)] = check_in([raw_input], request.user)
 
-    # QR pass
-    elif 'qr' in msg and ('pass' in msg or 'code' in msg):
-        reply = "After registration, go to 'My Events' and click 'View QR Pass'. Show this QR at event entry for verification."
+        if status in VERIFY_ERRORS:
+            error = VERIFY_ERRORS[status]
+        else:
+            result = {
+                'status': 'verified_success' if status == VERIFIED else 'already_verified',
+                'registration': reg
+            }
 
-    elif 'lost qr' in msg or 'lose qr' in msg or 'where is my qr' in msg:
-        reply = "You can reopen your QR pass anytime from the 'My Events' page after logging in."
+    return render(request, 'verify_qr.html', {
+        'result': result,
+        'error': error
+    })
 
-    # Verification / scanning
-    elif 'verify' in msg or 'scan' in msg:
-        reply = "Staff/Admin can use the Verify QR page to scan QR codes or paste the registration ID manually. Duplicate scans are blocked."
 
-    elif 'already verified' in msg or 'duplicate scan' in msg:
-        reply = "If the same QR is scanned again after successful verification, the system shows 'Already Verified' and prevents duplicate entry."
+# Passes accepted per check-in request; a handheld flushes its queue in
+# batches of at most this many
+CHECKIN_MAX_BATCH = 500
 
-    # Admin / analytics / CSV
-    elif 'analytics' in msg:
-        reply = "Analytics dashboard is available for Admin/Staff users and shows event and registration statistics."
 
-    elif 'csv' in msg or 'export' in msg:
-        reply = "Admin/Staff can export registration records as CSV from the navigation bar using the Export CSV option."
+@login_required
+@require_POST
+def check_in_api(request):
+    """
+    JSON check-in for scanners: POST {"scans": ["<pass text>", ...]},
+    optionally with "event" (the gate's event id) and "details": false.
+
+    Responds with one {"scan", "status"} result per scan, in order, where
+    status is "verified", "already_verified", "not_found", "invalid",
+    "expired" or "wrong_event". Unless details are turned off, results for
+    passes that exist include the attendee and event; turning them off lets
+    first scans of signed passes skip every database read.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': "Staff only."}, status=403)
+
+    try:
+        body = json.loads(request.body)
+        scans = body['scans']
+        event_id = body.get('event')
+        details = body.get('details', True)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': "Expected a JSON body with a 'scans' list."}, status=400)
+    if not isinstance(scans, list) or not all(isinstance(scan, str) for scan in scans):
+        return JsonResponse({'error': "'scans' must be a list of strings."}, status=400)
+    if event_id is not None and not isinstance(event_id, int):
+        return JsonResponse({'error': "'event' must be an event id."}, status=400)
+    if len(scans) > CHECKIN_MAX_BATCH:
+        return JsonResponse({'error': f"At most {CHECKIN_MAX_BATCH} scans per request."}, status=400)
+
+    results = []
+    checked = check_in(scans, request.user, event_id=event_id, details=bool(details))
+    for scan, (status, registration) in zip(scans, checked):
+        result = {'scan': scan, 'status': status}
+        if registration is not None:
+            result['registration_id'] = str(registration.registration_id)
+            result['username'] = registration.user.username
+            result['event'] = registration.event.title
+        results.append(result)
+    return JsonResponse({'results': results})
+
+# Largest offline scan log accepted in one sync request
+SYNC_MAX_SCANS = 20000
 
-    elif 'admin' in msg and 'event' in msg:
-        reply = "Admins can create, edit, and manage events using the Django Admin panel."
 
-    # Search / filter
-    elif 'find' in msg or 'search' in msg or 'filter' in msg:
-        reply = "Use the search box and category filter on the home page to quickly find events."
+@login_required
+def event_manifest(request, event_id):
+    """
+    Binary manifest of an event's passes for offline scanners (see
+    events.checkin.build_manifest). Unchanged manifests revalidate as 304.
+    """
+    if not request.user.is_staff:
+        return render(request, 'unauthorized.html', status=403)
+    event = get_object_or_404(Event, pk=event_id)
+
+    manifest = build_manifest(event.pk)
+    etag = f'"{hashlib.sha256(manifest).hexdigest()[:32]}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(manifest, content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="event-{event.pk}.manifest"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
-    # Email confirmation
-    elif 'email' in msg:
-        reply = "A confirmation email is generated when you register for an event. In demo mode, it appears in the server terminal."
 
-    # Fallback
-    else:
-        reply = "im a Basic chatbot where I can help with login/signup, event registration, student details form, QR pass, QR verification, analytics, CSV export, and event search.Please ask questions related to these only"
+@login_required
+@require_POST
+def check_in_sync(request):
+    """
+    Upload an offline scan log:
+    POST {"scans": [{"scan": "<pass text>", "scanned_at": "<ISO 8601>"}, ...]}.
+
+    Responds with the status of each distinct pass, resolved by its
+    earliest scan, and per-status totals.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': "Staff only."}, status=403)
+
+    try:
+        entries = json.loads(request.body)['scans']
+        if not isinstance(entries, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': "Expected a JSON body with a 'scans' list."}, status=400)
+    if len(entries) > SYNC_MAX_SCANS:
+        return JsonResponse({'error': f"At most {SYNC_MAX_SCANS} scans per request."}, status=400)
+
+    now = timezone.now()
+    scans = []
+    for entry in entries:
+        try:
+            scan = entry['scan']
+            scanned_at = parse_datetime(entry['scanned_at'])
+        except (KeyError, TypeError, ValueError):
+            scanned_at = None
+        if scanned_at is None or not isinstance(scan, str):
+            return JsonResponse({'error': f"Malformed scan: {entry!r}"}, status=400)
+        if timezone.is_naive(scanned_at):
+            scanned_at = timezone.make_aware(scanned_at)
+        # A device clock running fast must not date a check-in in the future
+        scans.append((scan, min(scanned_at, now)))
+
+    statuses = sync_scans(scans, request.user)
+    return JsonResponse({
+        'results': [
+            {'registration_id': registration_id, 'status': status}
+            for registration_id, status in statuses.items()
+        ],
+        'totals': dict(Counter(statuses.values())),
+    })
 
-    return JsonResponse({'reply': reply})
\ No newline at end of file
+# A facts refresh; cached replies need none
+@query_budget(5)
+def chatbot_reply(request):
+    return JsonResponse({'reply': reply_to(request.GET.get('message', ''))})